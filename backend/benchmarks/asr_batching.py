@@ -0,0 +1,147 @@
+# Throughput benchmark for cross-job batched Whisper decoding.
+# Run from the project root: python -m backend.benchmarks.asr_batching [audio files...]
+#
+# Reports audio-hours processed per wall-hour at queue depths 1, 4 and 16,
+# once with batching disabled (batch size 1) and once with the configured batch size.
+#
+# With --check, instead transcribes each file longer than one 30-second window with
+# ASR_BATCHING on and off and compares the words; exits 1 if a file differs overall by
+# more than --min-similarity allows, or has differences at more than --max-seam-share of
+# the batched window seams (words cut off or repeated where one window ends).
+
+import argparse
+import asyncio
+import difflib
+import glob
+import json
+import re
+import sys
+import time
+from typing import List
+
+from ..services import asr
+
+QUEUE_DEPTHS = (1, 4, 16)
+SEAM_TOLERANCE_S = 2.0 # --check: differences this close to a window seam are counted against it
+
+
+async def _run_depth(files: List[str], depth: int, jobs: int) -> dict:
+    """Runs `jobs` transcriptions with at most `depth` in flight and measures throughput."""
+    semaphore = asyncio.Semaphore(depth)
+    audio_seconds = 0.0
+
+    async def one(path: str):
+        nonlocal audio_seconds
+        async with semaphore:
+            result = await asr.transcribe_audio(path)
+            audio_seconds += result.get("duration") or 0.0
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(files[i % len(files)]) for i in range(jobs)))
+    wall_seconds = time.perf_counter() - start
+
+    return {
+        "queue_depth": depth,
+        "jobs": jobs,
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        # Audio-hours per wall-hour reduces to audio-seconds per wall-second
+        "audio_hours_per_wall_hour": round(audio_seconds / wall_seconds, 3) if wall_seconds else None,
+    }
+
+
+async def _words(path: str) -> tuple:
+    """
+    Transcribes `path` in the current ASR_BATCHING mode. Returns (words, word times,
+    info); each word is timed by interpolating within its segment.
+    """
+    info: dict = {}
+    words, times = [], []
+    async for segment in asr.stream_segments(path, info=info):
+        segment_words = re.findall(r"[\w']+", segment["text"].lower())
+        for index, word in enumerate(segment_words):
+            words.append(word)
+            times.append(segment["start"] + (segment["end"] - segment["start"]) * (index + 0.5) / len(segment_words))
+    return words, times, info
+
+
+async def check(files: List[str], min_similarity: float, max_seam_share: float) -> bool:
+    """
+    Compares batched and unbatched transcripts of every file longer than one window.
+    A file fails if the words differ overall by more than `min_similarity` allows, or if
+    more than `max_seam_share` of the batched window seams have a difference within
+    SEAM_TOLERANCE_S (words cut off or repeated at a seam, which whole-file similarity hides).
+    """
+    passed = True
+    for path in files:
+        asr.ASR_BATCHING = False
+        reference, times, info = await _words(path)
+        duration = info.get("duration") or 0.0
+        if duration <= asr.WINDOW_SECONDS:
+            print(json.dumps({"file": path, "skipped": f"only {duration:.1f}s of audio"}))
+            continue
+        asr.ASR_BATCHING = True
+        batched, _, batched_info = await _words(path)
+        seams = batched_info.get("window_starts", [])[1:]
+
+        matcher = difflib.SequenceMatcher(None, reference, batched, autojunk=False)
+        differences, seams_hit = [], set()
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            around = times[max(i1 - 1, 0):max(i2, i1 + 1)]
+            hit = {seam for seam in seams if any(abs(t - seam) <= SEAM_TOLERANCE_S for t in around)}
+            seams_hit |= hit
+            differences.append({"unbatched": " ".join(reference[i1:i2]), "batched": " ".join(batched[j1:j2]), "at_seam": bool(hit)})
+        similarity = matcher.ratio()
+        seam_share = len(seams_hit) / len(seams) if seams else 0.0
+        file_passed = similarity >= min_similarity and seam_share <= max_seam_share
+        passed = passed and file_passed
+        print(json.dumps({
+            "file": path,
+            "duration": round(duration, 1),
+            "unbatched_words": len(reference),
+            "batched_words": len(batched),
+            "similarity": round(similarity, 4),
+            "seams": len(seams),
+            "seams_with_differences": len(seams_hit),
+            "passed": file_passed,
+            "differences": differences[:20],
+        }))
+    return passed
+
+
+async def main(files: List[str], batch_size: int, max_wait_ms: float, jobs_per_depth: int) -> dict:
+    report = {"model": asr.WHISPER_MODEL_NAME, "device": asr.ASR_DEVICE, "runs": []}
+    for label, size in (("unbatched", 1), ("batched", batch_size)):
+        asr._scheduler = asr.BatchScheduler(max_batch_size=size, max_wait_s=max_wait_ms / 1000)
+        for depth in QUEUE_DEPTHS:
+            result = await _run_depth(files, depth, max(jobs_per_depth, depth))
+            result.update({"mode": label, "max_batch_size": size})
+            print(json.dumps(result))
+            report["runs"].append(result)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Whisper batching throughput benchmark")
+    parser.add_argument("files", nargs="*", help="Audio files to transcribe (default: uploads/*.wav)")
+    parser.add_argument("--batch-size", type=int, default=asr.ASR_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=asr.ASR_BATCH_MAX_WAIT_MS)
+    parser.add_argument("--jobs", type=int, default=16, help="Jobs per queue depth")
+    parser.add_argument("--output", help="Write the full JSON report to this path")
+    parser.add_argument("--check", action="store_true", help="Compare batched and unbatched transcripts instead")
+    parser.add_argument("--min-similarity", type=float, default=0.9, help="Word-level similarity --check requires")
+    parser.add_argument("--max-seam-share", type=float, default=0.25, help="Share of window seams --check allows a difference at")
+    args = parser.parse_args()
+
+    audio_files = args.files or sorted(glob.glob("uploads/*.wav"))
+    if not audio_files:
+        parser.error("No audio files given and none found in uploads/")
+    if args.check:
+        sys.exit(0 if asyncio.run(check(audio_files, args.min_similarity, args.max_seam_share)) else 1)
+    asr.ASR_BATCHING = True
+    report = asyncio.run(main(audio_files, args.batch_size, args.max_wait_ms, args.jobs))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,165 @@
+# End-to-end latency added by speaker diarization, compared with ASR alone.
+# Run from the project root: python -m backend.benchmarks.diarization_latency --minutes 10
+#
+# Synthesizes a conversation between --speakers voices (harmonic sources with their own
+# pitch and vocal-tract length, speaking vowel syllables in turns of a few seconds), then
+# for each run times:
+#   asr_only        - consuming every ASR segment
+#   with_diarization - the same, with services/diarization.py started on the decoded audio
+#                      and the turns merged into the segments afterwards
+# and, for reference, diarization on its own (what running it after ASR would add).
+# ASR is fakes.FakeWhisper in cpu_bound mode, so both stages compete for the CPU; pass
+# --real to use the Whisper model from services/asr.py instead. Accuracy is the share
+# of speech frames labelled with the right speaker (after mapping labels to speakers).
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from . import fakes
+
+SAMPLE_RATE = fakes.SAMPLE_RATE
+FRAME_S = 0.01 # Accuracy is scored on 10 ms frames
+# (F1, F2, F3) in Hz for five vowels of an adult male voice
+VOWELS = ((730, 1090, 2440), (270, 2290, 3010), (300, 870, 2240), (530, 1840, 2480), (570, 840, 2410))
+
+
+def _syllable(rng: np.random.Generator, f0: float, scale: float, tilt: float, seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = f0 * (1 + 0.06 * np.sin(2 * np.pi * rng.uniform(2, 4) * t + rng.uniform(0, 6.3)))
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    harmonics = np.arange(1, int(4000 / f0) + 1)
+    formants = np.array(VOWELS[rng.integers(len(VOWELS))]) * scale
+    amplitudes = np.exp(-0.5 * ((harmonics[:, None] * f0 - formants[None, :]) / 90.0) ** 2).sum(axis=1) * tilt ** harmonics
+    envelope = np.sin(np.pi * t / seconds) ** 0.5
+    return (amplitudes @ np.sin(np.outer(harmonics, phase))) * envelope
+
+
+def synthesize(minutes: float, speakers: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns (16 kHz audio, speaker index per 10 ms frame with -1 for silence)."""
+    rng = np.random.default_rng(seed)
+    voices = [
+        (rng.uniform(90, 240), rng.uniform(0.85, 1.2), rng.uniform(0.8, 0.95)) # f0, formant scale, spectral tilt
+        for _ in range(speakers)
+    ]
+    pieces: List[np.ndarray] = []
+    labels: List[np.ndarray] = []
+
+    def add(samples: np.ndarray, speaker: int):
+        pieces.append(samples)
+        labels.append(np.full(int(round(len(samples) / SAMPLE_RATE / FRAME_S)), speaker))
+
+    speaker = 0
+    total = 0.0
+    while total < minutes * 60:
+        turn = rng.uniform(2, 12)
+        elapsed = 0.0
+        while elapsed < turn:
+            seconds = rng.uniform(0.15, 0.35)
+            add(_syllable(rng, *voices[speaker], seconds) * rng.uniform(0.6, 1.0), speaker)
+            gap = rng.choice([0.0, 0.05, 0.3], p=[0.6, 0.3, 0.1])
+            add(np.zeros(int(gap * SAMPLE_RATE)), -1)
+            elapsed += seconds + gap
+        pause = rng.uniform(0.2, 1.0)
+        add(np.zeros(int(pause * SAMPLE_RATE)), -1)
+        total += elapsed + pause
+        speaker = (speaker + rng.integers(1, speakers)) % speakers if speakers > 1 else 0
+    audio = np.concatenate(pieces)
+    audio = audio / np.abs(audio).max() * 0.5 + rng.normal(0, 0.002, len(audio)) # Faint room noise
+    return audio.astype(np.float32), np.concatenate(labels)
+
+
+def accuracy(turns: List[Dict[str, Any]], truth: np.ndarray) -> float:
+    """Share of speech frames whose predicted speaker maps to the true one (greedy mapping)."""
+    predicted = np.full(len(truth), -1)
+    names = sorted({turn["speaker"] for turn in turns})
+    for turn in turns:
+        predicted[int(turn["start"] / FRAME_S):int(turn["end"] / FRAME_S)] = names.index(turn["speaker"])
+    speech = truth >= 0
+    confusion = np.zeros((max(len(names), 1), truth.max() + 1))
+    labelled = speech & (predicted >= 0)
+    np.add.at(confusion, (predicted[labelled], truth[labelled]), 1)
+    correct = 0.0
+    while confusion.size and confusion.max() > 0:
+        i, j = np.unravel_index(np.argmax(confusion), confusion.shape)
+        correct += confusion[i, j]
+        confusion[i, :] = 0
+        confusion[:, j] = 0
+    return correct / max(int(speech.sum()), 1)
+
+
+async def _pipeline(asr, diarization, path: str, diarize: bool) -> Dict[str, Any]:
+    task = None
+
+    def on_audio(audio):
+        nonlocal task
+        task = diarization.start(audio)
+
+    start = time.perf_counter()
+    segments = [segment async for segment in asr.stream_segments(path, on_audio=on_audio if diarize else None)]
+    asr_s = time.perf_counter() - start
+    turns = await diarization.finish(task, segments)
+    return {"total_s": time.perf_counter() - start, "asr_s": asr_s, "turns": turns, "segments": segments}
+
+
+async def main(args) -> Dict[str, Any]:
+    from ..services import diarization
+
+    if args.real:
+        from ..services import asr
+    else:
+        asr = fakes.FakeWhisper(window_latency=args.window_latency, cpu_bound=True)
+
+    audio, truth = synthesize(args.minutes, args.speakers)
+    path = os.path.join(tempfile.mkdtemp(prefix="fluent-diarization-bench-"), "meeting.wav")
+    fakes.write_wav(path, audio)
+
+    alone = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        turns = diarization.diarize(fakes.read_wav(path))
+        alone.append(time.perf_counter() - start)
+
+    asr_only, combined = [], []
+    for _ in range(args.runs):
+        asr_only.append((await _pipeline(asr, diarization, path, diarize=False))["total_s"])
+        run = await _pipeline(asr, diarization, path, diarize=True)
+        combined.append(run["total_s"])
+
+    asr_s, with_s, alone_s = (float(np.median(values)) for values in (asr_only, combined, alone))
+    result = {
+        "audio_s": round(len(audio) / SAMPLE_RATE, 1),
+        "asr": "whisper" if args.real else f"fake, {args.window_latency}s CPU per window",
+        "asr_only_s": round(asr_s, 3),
+        "with_diarization_s": round(with_s, 3),
+        "added_s": round(with_s - asr_s, 3),
+        "added_pct": round(100 * (with_s - asr_s) / asr_s, 1),
+        "diarization_alone_s": round(alone_s, 3), # What it would add if run after ASR
+        "speakers_true": args.speakers,
+        "speakers_found": len({turn["speaker"] for turn in turns}),
+        "speech_frame_accuracy": round(accuracy(turns, truth), 3),
+        "segments_labelled": sum("speaker" in segment for segment in run["segments"]),
+        "segments": len(run["segments"]),
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diarization latency on top of ASR")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--speakers", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--window-latency", type=float, default=0.5, help="Fake ASR CPU seconds per 30 s window")
+    parser.add_argument("--real", action="store_true", help="Use the Whisper model (WHISPER_MODEL_NAME) instead of the fake")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("DIARIZATION", "true")
+    asyncio.run(main(args))
@@ -0,0 +1,213 @@
+# End-to-end benchmark and load test with stubbed models.
+# Run from the project root:
+#   python -m backend.benchmarks.e2e --output bench.json
+#   python -m backend.benchmarks.e2e --output new.json --compare bench.json
+#
+# Everything runs offline in a temporary working directory: Whisper and the LLM are
+# replaced by fakes with configurable latency, and the API is driven in-process
+# through httpx's ASGI transport. Scenarios:
+#   - upload -> done latency at each concurrency level
+#   - GET /meetings/, /meetings/search/ and /meetings/pdf/{id} at each corpus size
+#     and concurrency level
+# The JSON report can be compared against a previous one to flag regressions.
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from . import fakes
+
+# A one-hour meeting at ~150 words per minute
+DEFAULT_TRANSCRIPT_WORDS = 9000
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _summarize(latencies: List[float], wall_seconds: float) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "throughput_rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else None,
+    }
+
+
+async def _load(request: Callable[[int], Awaitable[None]], concurrency: int, requests: int) -> Dict[str, Any]:
+    """Issues `requests` calls with `concurrency` in flight and returns latency stats."""
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for index in counter:
+            start = time.perf_counter()
+            await request(index)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summarize(latencies, time.perf_counter() - start)
+
+
+async def _seed_corpus(storage, target: int, words: int):
+    """Tops the corpus up to `target` meetings, written through the storage service."""
+    conn = storage.get_db_connection()
+    try:
+        existing = conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+    finally:
+        conn.close()
+    for index in range(existing, target):
+        await storage.save_processed_data(f"bench-{index:06d}", f"bench-{index:06d}.wav", {
+            "transcript": fakes.make_transcript(words, seed=index),
+            "summary": "The team reviewed the budget and the release roadmap.",
+            "action_items": ["Alice to send the budget review by Friday", "Bob to fix the export bug"],
+            "decisions": ["Ship the release next week"],
+        })
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+async def run_suite(args, workdir: str) -> Dict[str, Any]:
+    import httpx
+    from ..main import app
+    from ..services import asr, summarizer, storage
+
+    fake_whisper = fakes.FakeWhisper(window_latency=args.asr_window_latency)
+    asr.stream_segments = fake_whisper.stream_segments
+    asr.transcribe_audio = fake_whisper.transcribe_audio
+    summarizer.build_chains(fakes.FakeLLM(latency=args.llm_latency))
+
+    audio_path = os.path.join(workdir, "sample.wav")
+    fakes.write_silent_wav(audio_path, args.audio_seconds)
+    with open(audio_path, "rb") as f:
+        audio_bytes = f.read()
+
+    results: Dict[str, Any] = {"upload_to_done": [], "list": [], "search": [], "pdf": []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+
+        async def upload_until_done(_: int):
+            response = await client.post("/upload/upload-audio", files={"file": ("sample.wav", audio_bytes, "audio/wav")})
+            response.raise_for_status()
+            job_id = response.json()["job_id"]
+            while True:
+                status = (await client.get(f"/meetings/status/{job_id}")).json()
+                if status.get("stage") in ("done", "failed"):
+                    return
+                await asyncio.sleep(0.01)
+
+        for concurrency in args.concurrency:
+            stats = await _load(upload_until_done, concurrency, max(args.upload_jobs, concurrency))
+            stats.update({"concurrency": concurrency, "audio_seconds": args.audio_seconds})
+            print(json.dumps({"scenario": "upload_to_done", **stats}))
+            results["upload_to_done"].append(stats)
+
+        for corpus_size in args.corpus_sizes:
+            await _seed_corpus(storage, corpus_size, args.transcript_words)
+            queries = ["budget", "release roadmap", "customer AND deadline", "latency"]
+
+            async def list_meetings(_: int):
+                (await client.get("/meetings/")).raise_for_status()
+
+            async def search(index: int):
+                (await client.get("/meetings/search/", params={"query": queries[index % len(queries)]})).raise_for_status()
+
+            async def pdf(index: int):
+                job_id = f"bench-{index % corpus_size:06d}"
+                (await client.get(f"/meetings/pdf/{job_id}")).raise_for_status()
+
+            for name, request, count in (("list", list_meetings, args.requests), ("search", search, args.requests), ("pdf", pdf, args.pdf_requests)):
+                for concurrency in args.concurrency:
+                    stats = await _load(request, concurrency, max(count, concurrency))
+                    stats.update({"concurrency": concurrency, "corpus_size": corpus_size})
+                    print(json.dumps({"scenario": name, **stats}))
+                    results[name].append(stats)
+
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Returns a line per scenario whose p50 latency regressed by more than `threshold` (fraction)."""
+    regressions = []
+    for scenario, runs in current["results"].items():
+        previous = {
+            (run.get("concurrency"), run.get("corpus_size")): run
+            for run in baseline.get("results", {}).get(scenario, [])
+        }
+        for run in runs:
+            old = previous.get((run.get("concurrency"), run.get("corpus_size")))
+            if not old or not old["p50_ms"]:
+                continue
+            change = (run["p50_ms"] - old["p50_ms"]) / old["p50_ms"]
+            line = (f"{scenario} concurrency={run.get('concurrency')} corpus={run.get('corpus_size')}: "
+                    f"p50 {old['p50_ms']}ms -> {run['p50_ms']}ms ({change:+.1%})")
+            print(line)
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark with fake Whisper/LLM")
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 16])
+    parser.add_argument("--corpus-sizes", type=lambda v: [int(x) for x in v.split(",")], default=[100, 1000])
+    parser.add_argument("--transcript-words", type=int, default=DEFAULT_TRANSCRIPT_WORDS)
+    parser.add_argument("--audio-seconds", type=float, default=300, help="Length of the uploaded sample")
+    parser.add_argument("--asr-window-latency", type=float, default=0.05, help="Fake Whisper seconds per 30 s window")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake LLM seconds per call")
+    parser.add_argument("--upload-jobs", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pdf-requests", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p50 slowdown before failing (fraction)")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    revision = _git_revision()
+
+    # Isolate all on-disk state (uploads, PDFs, database) before the backend is imported
+    workdir = tempfile.mkdtemp(prefix="fluent-bench-")
+    os.environ["WHISPER_LOAD_MODEL"] = "false"
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "db_data", "bench.db")
+    os.chdir(workdir)
+
+    results = asyncio.run(run_suite(args, workdir))
+    report = {
+        "revision": revision,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# Offline stand-ins for Whisper and the LangChain LLM, plus synthetic data helpers.
+# Used by the benchmark suite so it runs without model weights or an LLM server.
+
+import asyncio
+import random
+import struct
+import time
+import wave
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.language_models.llms import LLM
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30.0
+
+# Small vocabulary so generated transcripts compress and match search terms like real ones
+VOCABULARY = (
+    "the we should budget release roadmap customer team meeting next week deadline review "
+    "design launch marketing engineering sprint backlog priority feature bug fix deploy "
+    "alice bob carol dave agreed decided follow up action item owner quarter revenue plan "
+    "hiring onboarding feedback metrics latency database search export report summary"
+).split()
+
+
+def make_transcript(words: int, seed: int = 0) -> str:
+    """Returns pseudo-meeting text of roughly `words` words, one sentence per line."""
+    rng = random.Random(seed)
+    lines = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        lines.append(" ".join(rng.choice(VOCABULARY) for _ in range(length)).capitalize() + ".")
+        remaining -= length
+    return "\n".join(lines)
+
+
+def write_silent_wav(path: str, seconds: float):
+    """Writes a 16 kHz mono 16-bit WAV of the given length (content is irrelevant to the fakes)."""
+    frames = int(seconds * SAMPLE_RATE)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        chunk = struct.pack("<h", 0) * SAMPLE_RATE
+        for _ in range(int(seconds)):
+            wav.writeframes(chunk)
+        wav.writeframes(struct.pack("<h", 0) * (frames - int(seconds) * SAMPLE_RATE))
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def write_wav(path: str, audio: np.ndarray):
+    """Writes float samples in [-1, 1] as a 16 kHz mono 16-bit WAV."""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def read_wav(path: str) -> np.ndarray:
+    """Reads a 16-bit mono WAV as float32 in [-1, 1], like whisper.load_audio returns."""
+    with wave.open(path, "rb") as wav:
+        return np.frombuffer(wav.readframes(wav.getnframes()), "<i2").astype(np.float32) / 32768
+
+
+def _burn_cpu(iterations: int):
+    """A fixed amount of matrix work on the BLAS threads, as Whisper inference on the CPU does."""
+    matrix = np.random.default_rng(0).standard_normal((256, 256)).astype(np.float32)
+    for _ in range(iterations):
+        matrix = np.tanh(matrix @ matrix)
+
+
+def _calibrate_cpu(seconds: float) -> int:
+    """Iterations of _burn_cpu that take `seconds` on an otherwise idle machine."""
+    start = time.perf_counter()
+    _burn_cpu(50)
+    return max(1, round(seconds / ((time.perf_counter() - start) / 50)))
+
+
+class FakeWhisper:
+    """
+    Replaces asr.stream_segments / asr.transcribe_audio.
+
+    Each 30-second window takes `window_latency` seconds and, like the real model,
+    windows are decoded one at a time across all jobs (a single shared lock). With
+    `cpu_bound` each window is instead a fixed amount of computation on a worker thread
+    (calibrated to take `window_latency` when the CPU is idle), so stages running
+    alongside ASR slow it down as they would slow Whisper.
+    """
+
+    def __init__(self, window_latency: float = 0.05, words_per_minute: int = 150, cpu_bound: bool = False):
+        self.window_latency = window_latency
+        self.words_per_minute = words_per_minute
+        self.cpu_bound = cpu_bound
+        self._iterations = _calibrate_cpu(window_latency) if cpu_bound else 0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def stream_segments(
+        self,
+        file_path: str,
+        language: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None,
+        on_audio: Optional[Callable[[np.ndarray], Any]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        info = info if info is not None else {}
+        if on_audio is not None:
+            on_audio(await asyncio.to_thread(read_wav, file_path))
+        duration = wav_duration(file_path)
+        info.update({"duration": duration, "language": language or "en"})
+        words_per_window = int(self.words_per_minute * WINDOW_SECONDS / 60)
+        segment_id = 0
+        window = 0
+        while window * WINDOW_SECONDS < duration:
+            async with self._lock:
+                if self.cpu_bound:
+                    await asyncio.to_thread(_burn_cpu, self._iterations)
+                else:
+                    await asyncio.sleep(self.window_latency)
+            start = window * WINDOW_SECONDS
+            text = make_transcript(words_per_window, seed=window)
+            for line_index, line in enumerate(text.split("\n")[:3]):
+                yield {"id": segment_id, "start": start + line_index * 10, "end": min(start + (line_index + 1) * 10, duration), "text": " " + line}
+                segment_id += 1
+            window += 1
+
+    async def transcribe_audio(self, file_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        info: Dict[str, Any] = {}
+        segments = [segment async for segment in self.stream_segments(file_path, language, info=info)]
+        return {
+            "transcript": "\n".join(segment["text"] for segment in segments),
+            "language": info.get("language"),
+            "segments": segments,
+            "duration": info.get("duration"),
+            "diarization": [],
+            "timestamps": [],
+        }
+
+
+class FakeLLM(LLM):
+    """LangChain LLM that answers every prompt with a fixed bullet list after `latency` seconds."""
+
+    latency: float = 0.2
+    response: str = "- Alice to send the budget review by Friday\n- Team agreed to ship the release next week"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        time.sleep(self.latency)
+        return self.response
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        await asyncio.sleep(self.latency)
+        return self.response
@@ -0,0 +1,141 @@
+# Exercises the shared LLM dispatcher against a local OpenAI-compatible stub server.
+# Run from the project root: python -m backend.benchmarks.llm_dispatcher
+#
+# Scenarios (each prints one JSON line; exit code is non-zero if a check fails):
+#   burst     - 10 jobs finish ASR together; peak concurrency at the server must stay
+#               within LLM_MAX_IN_FLIGHT
+#   flaky     - 30% of responses are HTTP 500; every job must still complete via retries
+#   hang      - 10% of requests hang; per-call timeouts + retries must finish every job
+#   outage    - every request fails; the circuit breaker must open and fail fast
+#   breaker   - with one concurrency slot: the breaker opens and fails fast without a
+#               request, half-open lets exactly one trial reach the server, and
+#               cancelling that trial gives the slot back (the next call closes the circuit)
+#   hedging   - long-tail latency; hedged requests must cut the slowest call
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+from .llm_stub import start_stub_server
+
+JOBS = 10
+
+
+async def _run_jobs(summarizer, jobs: int = JOBS) -> dict:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(summarizer.process_transcript(f"Meeting {i} transcript.") for i in range(jobs)))
+    failed = sum(1 for r in results if str(r["summary"]).startswith("Error") or any(str(a).startswith("Error") for a in r["action_items"]))
+    return {"jobs": jobs, "failed_jobs": failed, "wall_s": round(time.perf_counter() - start, 3)}
+
+
+async def _breaker(summarizer, state) -> dict:
+    dispatcher = summarizer.dispatcher = summarizer.LLMDispatcher(
+        max_in_flight=1, max_retries=0, breaker_failures=3, breaker_cooldown_s=0.5,
+    )
+
+    async def call():
+        return await dispatcher.invoke(summarizer.summary_chain, {"transcript": "Meeting transcript."}, "summary")
+
+    # Open: three failures in a row, then a call that must not reach the server
+    state.reset(latency=0.01, error_rate=1.0, hang_rate=0.0)
+    for _ in range(dispatcher.breaker_failures):
+        try:
+            await call()
+        except Exception:
+            pass
+    opened = dispatcher.circuit_open
+    before = state.requests
+    try:
+        await call()
+        fails_fast = False
+    except summarizer.CircuitOpenError:
+        fails_fast = state.requests == before
+
+    # Half-open: of five concurrent calls, only the trial reaches the (hanging) server
+    await asyncio.sleep(dispatcher.breaker_cooldown_s)
+    state.reset(latency=0.01, error_rate=0.0, hang_rate=1.0, hang_seconds=2.0)
+    calls = [asyncio.create_task(call()) for _ in range(5)]
+    await asyncio.sleep(0.3)
+    rejected = sum(1 for task in calls if task.done() and isinstance(task.exception(), summarizer.CircuitOpenError))
+    trial_requests = state.requests
+
+    # Cancelling the trial must free both the trial and the only slot
+    for task in calls:
+        task.cancel()
+    await asyncio.gather(*calls, return_exceptions=True)
+    state.reset(latency=0.01, error_rate=0.0, hang_rate=0.0)
+    try:
+        recovered = bool(await asyncio.wait_for(call(), 5.0)) and not dispatcher.circuit_open
+    except Exception:
+        recovered = False
+
+    return {
+        "opened": opened, "fails_fast": fails_fast, "half_open_requests": trial_requests,
+        "half_open_rejected": rejected, "recovered_after_cancel": recovered,
+    }
+
+
+async def main() -> bool:
+    server, state, base_url = start_stub_server()
+    os.environ.update({"LLM_PROVIDER": "openai", "LLM_MODEL_NAME": "stub", "OPENAI_API_KEY": "stub", "OPENAI_API_BASE": base_url})
+    from ..services import summarizer
+
+    ok = True
+
+    def report(name: str, result: dict, passed: bool):
+        nonlocal ok
+        ok = ok and passed
+        print(json.dumps({"scenario": name, "passed": passed, **result}))
+
+    # burst: concurrency is capped globally
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=4)
+    state.reset(latency=0.2)
+    result = await _run_jobs(summarizer)
+    result.update({"requests": state.requests, "peak_in_flight": state.peak_in_flight, "max_in_flight": 4})
+    report("burst", result, state.peak_in_flight <= 4 and result["failed_jobs"] == 0)
+
+    # flaky: retries absorb transient 500s
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=8, max_retries=5, retry_base_s=0.05, retry_max_s=0.5, breaker_failures=1000)
+    state.reset(latency=0.02, error_rate=0.3)
+    result = await _run_jobs(summarizer)
+    result.update({"requests": state.requests})
+    report("flaky", result, result["failed_jobs"] == 0)
+
+    # hang: timeouts turn hung requests into retries
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=8, timeout_s=0.5, max_retries=5, retry_base_s=0.05, retry_max_s=0.2, breaker_failures=1000)
+    state.reset(latency=0.02, hang_rate=0.1, hang_seconds=5.0)
+    result = await _run_jobs(summarizer)
+    result.update({"requests": state.requests})
+    report("hang", result, result["failed_jobs"] == 0 and result["wall_s"] < 5.0)
+
+    # outage: the breaker opens and later calls never reach the server
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=4, max_retries=1, retry_base_s=0.01, breaker_failures=3, breaker_cooldown_s=60)
+    state.reset(latency=0.01, error_rate=1.0)
+    result = await _run_jobs(summarizer)
+    result.update({"requests": state.requests, "circuit_open": summarizer.dispatcher.circuit_open})
+    report("outage", result, summarizer.dispatcher.circuit_open and state.requests < JOBS * 3 * 2)
+
+    # breaker: open, a single half-open trial, and a cancelled trial releasing its slot
+    result = await _breaker(summarizer, state)
+    report("breaker", result, (
+        result["opened"] and result["fails_fast"] and result["half_open_requests"] == 1
+        and result["half_open_rejected"] == 4 and result["recovered_after_cancel"]
+    ))
+
+    # hedging: a duplicate after 0.2s beats a 25% chance of a 2s stall
+    state.reset(latency=0.05, hang_rate=0.25, hang_seconds=2.0)
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=16, hedge_after_s=0.0)
+    unhedged = await _run_jobs(summarizer)
+    state.reset(latency=0.05, hang_rate=0.25, hang_seconds=2.0)
+    summarizer.dispatcher = summarizer.LLMDispatcher(max_in_flight=16, hedge_after_s=0.2)
+    hedged = await _run_jobs(summarizer)
+    report("hedging", {"unhedged_wall_s": unhedged["wall_s"], "hedged_wall_s": hedged["wall_s"]}, hedged["wall_s"] < unhedged["wall_s"])
+
+    server.shutdown()
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
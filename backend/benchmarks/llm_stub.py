@@ -0,0 +1,96 @@
+# Minimal OpenAI-compatible chat completions server for exercising the LLM dispatcher.
+# Latency, error rate and hang rate are adjustable at runtime; the server records the
+# peak number of concurrent requests it saw.
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class StubState:
+    def __init__(self):
+        self.latency = 0.05 # Seconds per successful response
+        self.error_rate = 0.0 # Fraction answered with HTTP 500
+        self.hang_rate = 0.0 # Fraction that sleep for `hang_seconds` before answering
+        self.hang_seconds = 30.0
+        self.response = "- Alice to send the budget review by Friday\n- Ship the release next week"
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def reset(self, **settings):
+        with self._lock:
+            for key, value in settings.items():
+                setattr(self, key, value)
+            self.requests = 0
+            self.in_flight = 0
+            self.peak_in_flight = 0
+
+    def enter(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def _make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, so the client's connection pool is exercised
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state.enter()
+            try:
+                roll = random.random()
+                if roll < state.hang_rate:
+                    time.sleep(state.hang_seconds)
+                time.sleep(state.latency)
+                if random.random() < state.error_rate:
+                    self._send(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                    return
+                self._send(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "stub",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": state.response},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+            except (BrokenPipeError, ConnectionResetError):
+                pass # Client cancelled (timeout or losing hedge)
+            finally:
+                state.leave()
+
+    return Handler
+
+
+def start_stub_server(port: int = 0, state: Optional[StubState] = None):
+    """Starts the stub on a background thread. Returns (server, state, base_url)."""
+    state = state or StubState()
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/v1"
@@ -0,0 +1,95 @@
+# Search latency before and after a background maintenance pass (services/maintenance.py).
+# Run from the project root: python -m backend.benchmarks.search_maintenance --meetings 2000
+#
+# Seeds the database one save per meeting (every save adds a level-0 segment to the FTS
+# index) and then re-saves a share of the meetings with edited text, which leaves delete
+# markers behind. Search latency is measured on that fragmented index, then again after
+# maintenance.run_once(force=True) has merged the segments, refreshed the planner
+# statistics and vacuumed the free pages.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict
+
+from . import fakes
+from .storage_compression import SEARCH_QUERIES, _latency_stats, _make_segments
+
+
+async def _save(storage, index: int, words: int, seed: int):
+    transcript = fakes.make_transcript(words, seed=seed)
+    await storage.save_processed_data(f"bench-{index:06d}", f"bench-{index:06d}.wav", {
+        "transcript": transcript,
+        "segments": _make_segments(transcript),
+        "summary": "The team reviewed the budget.",
+        "action_items": [f"Owner {seed % 7} to send the budget review"],
+        "decisions": ["Ship next week"],
+    })
+
+
+def _db_stats(path: str) -> Dict[str, int]:
+    conn = sqlite3.connect(path)
+    try:
+        return {
+            "db_bytes": os.path.getsize(path),
+            "freelist_pages": conn.execute("PRAGMA freelist_count").fetchone()[0],
+            "fts_segments": conn.execute("SELECT count(DISTINCT segid) FROM meetings_fts_idx").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+async def _measure(storage, searches: int) -> Dict[str, Any]:
+    full, count_only = [], []
+    for index in range(searches):
+        query = SEARCH_QUERIES[index % len(SEARCH_QUERIES)]
+        start = time.perf_counter()
+        await storage.search_transcripts(query)
+        full.append(time.perf_counter() - start)
+
+        conn = storage.get_db_connection()
+        start = time.perf_counter()
+        conn.execute("SELECT count(*) FROM meetings_fts WHERE meetings_fts MATCH ?", (query,)).fetchone()
+        count_only.append(time.perf_counter() - start)
+        conn.close()
+    return {"search": _latency_stats(full), "match_count": _latency_stats(count_only), **_db_stats(storage.DATABASE_PATH)}
+
+
+async def main(args) -> Dict[str, Any]:
+    from ..services import maintenance, storage
+
+    storage.init_db()
+    for index in range(args.meetings):
+        await _save(storage, index, args.transcript_words, seed=index)
+    rng = random.Random(0)
+    for index in rng.sample(range(args.meetings), int(args.meetings * args.resave_share)):
+        await _save(storage, index, args.transcript_words, seed=args.meetings + index) # Edited text: old postings deleted
+
+    result: Dict[str, Any] = {"meetings": args.meetings, "before": await _measure(storage, args.searches)}
+    start = time.perf_counter()
+    result["maintenance"] = await maintenance.run_once(force=True)
+    result["maintenance_s"] = round(time.perf_counter() - start, 3)
+    result["after"] = await _measure(storage, args.searches)
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search latency before/after database maintenance")
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--transcript-words", type=int, default=2000)
+    parser.add_argument("--resave-share", type=float, default=0.3, help="Share of meetings re-saved with new text")
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    # Keep the benchmark database out of the real db_data directory, and the per-save logs quiet.
+    # Merge every segment in one pass, however many saves created them.
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("FTS_MERGE_MAX_STEPS", "100000")
+    os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="fluent-maintenance-bench-"), "bench.db")
+    asyncio.run(main(args))
@@ -0,0 +1,171 @@
+# Database size and read/search latency for each transcript storage format.
+# Run from the project root: python -m backend.benchmarks.storage_compression --meetings 1000
+#
+# Modes:
+#   legacy - the original schema: TEXT transcripts and an external-content FTS5 table
+#            kept in sync by triggers (no per-segment data)
+#   none   - current schema, TEXT transcripts and no segments (STORE_SEGMENTS default),
+#            contentless FTS5 index
+#   zlib   - current schema, zlib-compressed transcripts and segments
+#   zstd   - current schema, zstd-compressed (skipped if 'zstandard' is not installed)
+#
+# Cold reads evict the database file from the OS page cache (posix_fadvise DONTNEED)
+# before each get_meeting_data call; every call opens a fresh connection, so SQLite's
+# own cache is cold too.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from . import fakes
+
+SEARCH_QUERIES = ["budget", "release roadmap", "customer AND deadline", "latency", "hiring NOT revenue"]
+
+
+def _make_segments(transcript: str) -> List[Dict[str, Any]]:
+    """One segment per line, ~4 s each, with the fields the ASR pipeline produces."""
+    return [
+        {"id": index, "start": index * 4.0, "end": index * 4.0 + 4.0, "text": " " + line, "avg_logprob": -0.25, "no_speech_prob": 0.01}
+        for index, line in enumerate(transcript.split("\n"))
+    ]
+
+
+def _evict(path: str):
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _latency_stats(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+    }
+
+
+def _seed_legacy(path: str, meetings: int, words: int):
+    """Builds the pre-compression schema directly, as the storage service used to."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE meetings (job_id TEXT PRIMARY KEY, filename TEXT, transcript TEXT, summary TEXT,
+            action_items TEXT, decisions TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, timings TEXT);
+        CREATE VIRTUAL TABLE meetings_fts USING fts5(job_id UNINDEXED, transcript, content='meetings', content_rowid='rowid');
+        CREATE TRIGGER meetings_ai AFTER INSERT ON meetings BEGIN
+            INSERT INTO meetings_fts (rowid, job_id, transcript) VALUES (new.rowid, new.job_id, new.transcript);
+        END;
+    """)
+    for index in range(meetings):
+        conn.execute(
+            "INSERT INTO meetings (job_id, filename, transcript, summary, action_items, decisions) VALUES (?, ?, ?, ?, ?, ?)",
+            (f"bench-{index:06d}", f"bench-{index:06d}.wav", fakes.make_transcript(words, seed=index),
+             "The team reviewed the budget.", json.dumps(["Alice to send the budget review"]), json.dumps(["Ship next week"])),
+        )
+    conn.commit()
+    conn.close()
+
+
+async def _seed_current(storage, meetings: int, words: int):
+    for index in range(meetings):
+        transcript = fakes.make_transcript(words, seed=index)
+        await storage.save_processed_data(f"bench-{index:06d}", f"bench-{index:06d}.wav", {
+            "transcript": transcript,
+            "segments": _make_segments(transcript),
+            "summary": "The team reviewed the budget.",
+            "action_items": ["Alice to send the budget review"],
+            "decisions": ["Ship next week"],
+        })
+
+
+async def run_mode(storage, mode: str, workdir: str, args) -> Dict[str, Any]:
+    path = os.path.join(workdir, f"{mode}.db")
+    storage.DATABASE_PATH = path
+    if mode == "legacy":
+        _seed_legacy(path, args.meetings, args.transcript_words)
+    else:
+        storage.TRANSCRIPT_COMPRESSION = mode
+        storage.STORE_SEGMENTS = mode != "none" # The default for each format
+        storage.init_db()
+        await _seed_current(storage, args.meetings, args.transcript_words)
+
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    conn.close()
+    result: Dict[str, Any] = {"mode": mode, "meetings": args.meetings, "db_bytes": os.path.getsize(path)}
+
+    rng = random.Random(0)
+    cold = []
+    for _ in range(args.reads):
+        job_id = f"bench-{rng.randrange(args.meetings):06d}"
+        _evict(path)
+        start = time.perf_counter()
+        if mode == "legacy":
+            conn = storage.get_db_connection() # The old read path: SELECT * and two json.loads
+            row = dict(conn.execute("SELECT * FROM meetings WHERE job_id = ?", (job_id,)).fetchone())
+            json.loads(row["action_items"]), json.loads(row["decisions"])
+            conn.close()
+        else:
+            await storage.get_meeting_data(job_id)
+        cold.append(time.perf_counter() - start)
+    result["cold_read"] = _latency_stats(cold)
+
+    searches = []
+    for index in range(args.searches):
+        query = SEARCH_QUERIES[index % len(SEARCH_QUERIES)]
+        start = time.perf_counter()
+        if mode == "legacy":
+            conn = storage.get_db_connection()
+            conn.execute("""
+                SELECT m.*, rank FROM meetings_fts fts JOIN meetings m ON fts.rowid = m.rowid
+                WHERE fts.transcript MATCH ? ORDER BY rank
+            """, (query,)).fetchall()
+            conn.close()
+        else:
+            await storage.search_transcripts(query)
+        searches.append(time.perf_counter() - start)
+    result["search"] = _latency_stats(searches)
+    return result
+
+
+async def main(args) -> List[Dict[str, Any]]:
+    from ..services import storage
+
+    modes = ["legacy", "none", "zlib"]
+    try:
+        import zstandard # noqa: F401
+        modes.append("zstd")
+    except ImportError:
+        print("zstandard not installed; skipping zstd", file=sys.stderr)
+
+    workdir = os.path.dirname(os.environ["DATABASE_PATH"])
+    results = []
+    for mode in modes:
+        result = await run_mode(storage, mode, workdir, args)
+        print(json.dumps(result))
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcript storage format benchmark")
+    parser.add_argument("--meetings", type=int, default=1000)
+    parser.add_argument("--transcript-words", type=int, default=9000, help="About one hour of speech")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--searches", type=int, default=200)
+    args = parser.parse_args()
+
+    # Keep the benchmark databases out of the real db_data directory, and the per-save logs quiet
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="fluent-storage-bench-"), "init.db")
+    asyncio.run(main(args))
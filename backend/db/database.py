@@ -3,6 +3,9 @@ import datetime
 from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Define the path to the database file within the db_data directory
 DB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db_data')
@@ -24,7 +27,7 @@ class Meeting(Base):
     id = Column(String, primary_key=True, index=True) # Using job_id as primary key
     filename = Column(String, index=True)
     upload_time = Column(DateTime, default=datetime.datetime.utcnow)
-    status = Column(String, default="processing") # Added status field
+    status = Column(String, default="processing") # Added status field (live stage/progress is kept in storage's job_status table)
     transcript = Column(Text, nullable=True)
     summary = Column(Text, nullable=True)
     action_items = Column(Text, nullable=True) # Storing as JSON string
@@ -43,5 +46,5 @@ def get_db():
     finally:
         db.close()
 
-print("SQLAlchemy Database module initialized.")
-print(f"Database URL: {SQLALCHEMY_DATABASE_URL}")
+logger.info("SQLAlchemy Database module initialized.")
+logger.info("Database URL: %s", SQLALCHEMY_DATABASE_URL)
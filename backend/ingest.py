@@ -0,0 +1,239 @@
+# Bulk ingest of a directory of recordings, without going through the HTTP API.
+# Run from the project root:
+#   python -m backend.ingest /path/to/recordings --workers 4
+#
+# Files are hashed (SHA-256) and deduplicated: the job ID is derived from the content
+# hash, and hashes already in the database are skipped, so an interrupted run can
+# simply be started again. Each worker process loads its own Whisper model and LLM
+# client and runs asr.transcribe_audio -> summarizer.process_transcript; the parent
+# collects results and writes them with storage.save_processed_batch, one transaction
+# per batch. Recordings stay where they are (audio_status 'external'), so the
+# retention sweeper never touches them.
+
+import argparse
+import asyncio
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from .services import storage
+from .utils.log import get_logger
+
+logger = get_logger(__name__)
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a"} # Same as routers/upload.py ALLOWED_EXTENSIONS
+# Namespace for job IDs derived from content hashes (uuid5), so re-runs map to the same job
+INGEST_NAMESPACE = uuid.UUID("5b0c3f4e-2a57-4d0e-9a3c-4f2f6f1d8a10")
+SEGMENT_KEYS = ("id", "start", "end", "text", "avg_logprob", "no_speech_prob", "speaker")
+HASH_CHUNK_BYTES = 1024 * 1024
+# Attempts to write a batch (e.g. while the API server or maintenance holds the write
+# lock), with exponential backoff from FLUSH_RETRY_BASE_S, before saving entries one by one
+FLUSH_ATTEMPTS = 5
+FLUSH_RETRY_BASE_S = 1.0
+
+
+def find_audio_files(directory: str, extensions: set) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in extensions:
+                paths.append(os.path.abspath(os.path.join(root, name)))
+    return sorted(paths)
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# --- Worker process ---
+# One event loop per worker for its whole life: the ASR batch scheduler, the LLM
+# dispatcher and the pooled HTTP client are bound to the loop they first run on
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _init_worker(threads: int):
+    global _worker_loop
+    # Runs in each spawned worker before the models are imported, so the per-process
+    # thread pools share the CPU instead of each one assuming it owns every core
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+
+def _process_file(path: str, language: Optional[str]) -> Dict[str, Any]:
+    """Transcribes and summarizes one file in a worker process. Raises on failure."""
+    from .services import asr, summarizer # Loaded once per worker, on first use
+
+    async def pipeline() -> Dict[str, Any]:
+        asr_result = await asr.transcribe_audio(path, language)
+        transcript = asr_result.get("transcript") or ""
+        if not asr_result.get("segments") and transcript.startswith(("Error", "Transcription failed")):
+            raise RuntimeError(transcript)
+        processed = await summarizer.process_transcript(transcript)
+        processed["transcript"] = transcript
+        processed["segments"] = [{key: segment.get(key) for key in SEGMENT_KEYS} for segment in asr_result.get("segments", [])]
+        processed["duration"] = asr_result.get("duration")
+        return processed
+
+    return _worker_loop.run_until_complete(pipeline())
+
+
+# --- Parent process ---
+class Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.started = time.perf_counter()
+        self._last_report = 0.0
+
+    def report(self, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self._last_report < 5:
+            return
+        self._last_report = now
+        elapsed = now - self.started
+        finished = self.done + self.failed
+        rate = finished / elapsed if elapsed else 0.0
+        eta = (self.total - finished) / rate if rate else float("inf")
+        logger.info(
+            "%d/%d files (%d failed) | %.1f files/min | %.2f audio-h/wall-h | elapsed %.1f min, eta %.1f min",
+            finished, self.total, self.failed, rate * 60, self.audio_seconds / elapsed if elapsed else 0,
+            elapsed / 60, eta / 60,
+        )
+
+
+async def _hash_all(paths: List[str], threads: int) -> List[Tuple[str, str]]:
+    """Hashes files on a thread pool (hashlib releases the GIL); returns (path, hash) pairs."""
+    loop = asyncio.get_running_loop()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        hashes = await asyncio.gather(*(loop.run_in_executor(pool, hash_file, path) for path in paths))
+    return list(zip(paths, hashes))
+
+
+async def _save_batch(entries: List[Dict[str, Any]]) -> int:
+    """
+    Writes finished results, retrying the batch with backoff while the write fails, then
+    one entry at a time so a single bad entry cannot drop the rest. Returns how many were saved.
+    """
+    for attempt in range(FLUSH_ATTEMPTS):
+        if await storage.save_processed_batch(entries) == len(entries):
+            return len(entries)
+        if attempt < FLUSH_ATTEMPTS - 1:
+            delay = FLUSH_RETRY_BASE_S * 2 ** attempt
+            logger.warning("Writing %d results failed; retrying in %.0fs", len(entries), delay)
+            await asyncio.sleep(delay)
+    saved = 0
+    for entry in entries:
+        if await storage.save_processed_batch([entry]):
+            saved += 1
+        else:
+            logger.error("Could not save the results for %s; a re-run will process it again", entry["audio_path"])
+    return saved
+
+
+async def ingest(args) -> int:
+    paths = find_audio_files(args.directory, AUDIO_EXTENSIONS)
+    logger.info("Found %d audio files under %s; hashing...", len(paths), args.directory)
+    hashed = await _hash_all(paths, args.hash_threads)
+
+    already_stored = await storage.get_content_hashes()
+    pending: List[Tuple[str, str]] = []
+    seen = set()
+    duplicates = 0
+    for path, content_hash in hashed:
+        if content_hash in already_stored or content_hash in seen:
+            duplicates += content_hash in seen
+            continue
+        seen.add(content_hash)
+        pending.append((path, content_hash))
+    logger.info(
+        "%d to process, %d already ingested, %d duplicate files skipped",
+        len(pending), len(hashed) - len(pending) - duplicates, duplicates,
+    )
+    if not pending or args.dry_run:
+        return 0
+
+    progress = Progress(len(pending))
+    batch: List[Dict[str, Any]] = []
+    last_flush = time.perf_counter()
+
+    async def flush():
+        nonlocal batch, last_flush
+        # Taken before saving, so results finishing during a retry go into the next batch
+        entries, batch, last_flush = batch, [], time.perf_counter()
+        if entries:
+            unsaved = len(entries) - await _save_batch(entries)
+            progress.done -= unsaved # Counted as failed; a re-run retries them
+            progress.failed += unsaved
+
+    loop = asyncio.get_running_loop()
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"), # Fresh interpreters: no forked torch/CUDA or sqlite state
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+    # Keep a bounded number of files queued per worker so Ctrl-C stops promptly
+    semaphore = asyncio.Semaphore(args.workers * 2)
+
+    async def run(path: str, content_hash: str):
+        async with semaphore:
+            try:
+                processed = await loop.run_in_executor(pool, _process_file, path, args.language)
+            except Exception as e:
+                progress.failed += 1
+                logger.error("Failed to ingest %s: %s", path, e)
+                return
+        progress.done += 1
+        progress.audio_seconds += processed.pop("duration", None) or 0.0
+        batch.append({
+            "job_id": str(uuid.uuid5(INGEST_NAMESPACE, content_hash)),
+            "filename": os.path.basename(path),
+            "processed_data": processed,
+            "content_hash": content_hash,
+            "audio_path": path,
+            "audio_status": "external",
+        })
+        if len(batch) >= args.batch_size or time.perf_counter() - last_flush >= args.flush_seconds:
+            await flush()
+        progress.report()
+
+    try:
+        await asyncio.gather(*(run(path, content_hash) for path, content_hash in pending))
+    finally:
+        await flush() # Keep whatever finished, also on Ctrl-C
+        pool.shutdown(wait=False, cancel_futures=True)
+        progress.report(force=True)
+    return 1 if progress.failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe and summarize a directory of recordings into the database")
+    parser.add_argument("directory", help="Directory to scan recursively for .wav/.mp3/.m4a files")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (each loads its own Whisper model)")
+    parser.add_argument("--language", default=None, help="Language code for every file (default: auto-detect)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Results written per database transaction")
+    parser.add_argument("--flush-seconds", type=float, default=30, help="Write a partial batch after this long")
+    parser.add_argument("--hash-threads", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be processed")
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    sys.exit(asyncio.run(ingest(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
 import os
 from .db.database import create_db_and_tables # Import the function
+from .services import export, maintenance, metrics, retention
+from .utils.log import get_logger
+
+logger = get_logger(__name__)
 
 # Define directories relative to main.py location
 PDF_OUTPUT_DIR = "generated_pdfs" # Should match pdf_generator.py
@@ -24,7 +29,7 @@ app = FastAPI(
 # --- Create Database Tables ---
 # This should be called once on startup
 create_db_and_tables()
-print("Database tables checked/created.")
+logger.info("Database tables checked/created.")
 
 
 # --- CORS Middleware ---
@@ -45,6 +50,10 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
+# --- Metrics Middleware ---
+# Records request count and latency per route template; scraped from /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 # --- Mount Static Directory for PDFs ---
 # Serve files from the 'generated_pdfs' directory under the '/static/pdfs' URL path
 # Example: A file at generated_pdfs/meeting_abc.pdf will be accessible at http://localhost:8000/static/pdfs/meeting_abc.pdf
@@ -53,11 +62,35 @@ app.add_middleware(
 app.mount(f"/{PDF_STATIC_PATH}", StaticFiles(directory=PDF_OUTPUT_DIR), name="static_pdfs")
 
 
+# --- Background Maintenance ---
+_background_tasks = []
+
+@app.on_event("startup")
+async def start_background_tasks():
+    for task in (retention.start_sweeper(), maintenance.start_maintenance(), workers.start_recovery()):
+        if task:
+            _background_tasks.append(task)
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in _background_tasks:
+        task.cancel()
+    export.shutdown()
+
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Fluent Note Taker AI Backend"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics():
+    """Pipeline, storage and HTTP metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Include routers
-from .routers import upload, transcript
+from .routers import upload, transcript, stream, items, workers
 app.include_router(upload.router)
 app.include_router(transcript.router)
+app.include_router(stream.router)
+app.include_router(items.router)
+app.include_router(workers.router)
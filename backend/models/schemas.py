@@ -25,3 +25,21 @@ class TranscriptResponse(BaseModel):
 class SummaryResponse(BaseModel):
     meeting_id: int
     summary: str
+
+# Remote ASR worker protocol (routers/workers.py)
+
+class WorkerHeartbeat(BaseModel):
+    lease_token: str
+    progress: float | None = None # Fraction of the audio transcribed (0-1)
+
+class WorkerResult(BaseModel):
+    lease_token: str
+    segments: list[dict] # Whisper segments: id, start, end, text, avg_logprob, no_speech_prob, speaker
+    language: str | None = None
+    duration: float | None = None # Audio length in seconds
+    asr_seconds: float | None = None # Worker wall time spent transcribing
+
+class WorkerFailure(BaseModel):
+    lease_token: str
+    error: str
+    retry: bool = True # Give the job to another worker (up to ASR_WORKER_MAX_ATTEMPTS)
@@ -0,0 +1,53 @@
+import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from ..services import storage
+
+router = APIRouter(
+    tags=["items"],
+)
+
+
+async def _query(kind: str, **filters) -> JSONResponse:
+    try:
+        result = await storage.query_items(kind, **filters)
+    except ValueError as e: # Invalid FTS query in `q`
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(content=dict(result, limit=filters["limit"], offset=filters["offset"]))
+
+
+@router.get("/action-items/")
+async def list_action_items(
+    q: Optional[str] = Query(None, min_length=1, description="Full-text search over item text (FTS5 syntax)"),
+    assignee: Optional[str] = Query(None, description="Assignee parsed from the item, case-insensitive"),
+    job_id: Optional[str] = None,
+    since: Optional[datetime.date] = Query(None, description="Meetings on or after this date"),
+    until: Optional[datetime.date] = Query(None, description="Meetings on or before this date"),
+    due_from: Optional[datetime.date] = Query(None, description="Due on or after this date"),
+    due_to: Optional[datetime.date] = Query(None, description="Due on or before this date"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Lists action items across all meetings, newest meetings first, e.g.
+    /action-items/?assignee=alice&since=2024-05-01 for Alice's items from May.
+    """
+    return await _query(
+        "action_items", q=q, assignee=assignee, job_id=job_id, since=since, until=until,
+        due_from=due_from, due_to=due_to, limit=limit, offset=offset,
+    )
+
+
+@router.get("/decisions/")
+async def list_decisions(
+    q: Optional[str] = Query(None, min_length=1, description="Full-text search over decision text (FTS5 syntax)"),
+    job_id: Optional[str] = None,
+    since: Optional[datetime.date] = Query(None, description="Meetings on or after this date"),
+    until: Optional[datetime.date] = Query(None, description="Meetings on or before this date"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """Lists decisions across all meetings, newest meetings first."""
+    return await _query("decisions", q=q, job_id=job_id, since=since, until=until, limit=limit, offset=offset)
@@ -0,0 +1,428 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+import asyncio
+import bisect
+import collections
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..services import asr, summarizer, storage, metrics # Import necessary services
+from ..utils import log
+
+logger = log.get_logger(__name__)
+
+# --- Configuration ---
+STREAM_SAMPLE_RATE = 16000 # Whisper expects 16 kHz mono
+# Re-run Whisper once this much new audio has arrived
+STREAM_STEP_SECONDS = float(os.getenv("STREAM_STEP_SECONDS", "1.0"))
+# Upper bound on uncommitted audio held per connection (one Whisper window)
+STREAM_MAX_BUFFER_SECONDS = float(os.getenv("STREAM_MAX_BUFFER_SECONDS", "30"))
+# Upper bound on received-but-unprocessed audio per connection (seconds, after decoding);
+# the socket stops being read while it is full, which applies TCP backpressure to the client
+STREAM_MAX_QUEUED_SECONDS = float(os.getenv("STREAM_MAX_QUEUED_SECONDS", "30"))
+# Largest binary message accepted; a bigger one closes the connection (1009)
+STREAM_MAX_FRAME_BYTES = int(os.getenv("STREAM_MAX_FRAME_BYTES", str(1024 * 1024)))
+# Segments ending this close to the live edge are never committed early
+STREAM_COMMIT_MARGIN_SECONDS = float(os.getenv("STREAM_COMMIT_MARGIN_SECONDS", "1.0"))
+
+SUPPORTED_ENCODINGS = {"pcm_s16le", "pcm_f32le", "opus"}
+
+router = APIRouter(
+    prefix="/ws",
+    tags=["streaming"],
+)
+
+
+# --- Latency Metric ---
+class LatencyTracker:
+    """Keeps recent speech-to-text delays (seconds between audio arriving and its text being committed)."""
+
+    def __init__(self, window: int = 1000):
+        self.recent = collections.deque(maxlen=window)
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.recent.append(seconds)
+        self.count += 1
+        metrics.STREAM_DELAY_SECONDS.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        values = sorted(self.recent)
+        if not values:
+            return {"count": self.count, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        def pct(p):
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 1)
+        return {"count": self.count, "p50_ms": pct(0.5), "p95_ms": pct(0.95), "max_ms": round(values[-1] * 1000, 1)}
+
+
+speech_to_text_delay = LatencyTracker()
+active_streams = 0
+
+# Keep references to finalization tasks so they are not garbage-collected mid-flight
+_background_tasks = set()
+
+
+# --- Frame Decoding ---
+def _make_decoder(encoding: str, sample_rate: int):
+    """Returns a function converting one received frame into float32 samples at 16 kHz."""
+    if encoding == "opus":
+        try:
+            import opuslib
+        except ImportError:
+            raise ImportError("Opus streaming requested, but 'opuslib' is not installed. Run: pip install opuslib")
+        opus_decoder = opuslib.Decoder(sample_rate, 1)
+        max_frame_size = int(sample_rate * 0.12) # Opus frames are at most 120 ms
+
+        def decode_bytes(frame: bytes) -> np.ndarray:
+            pcm = opus_decoder.decode(frame, max_frame_size)
+            return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+    elif encoding == "pcm_f32le":
+        def decode_bytes(frame: bytes) -> np.ndarray:
+            return np.frombuffer(frame, dtype="<f4").astype(np.float32)
+    else:
+        def decode_bytes(frame: bytes) -> np.ndarray:
+            return np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+
+    if sample_rate == STREAM_SAMPLE_RATE:
+        return decode_bytes
+
+    def decode_resampled(frame: bytes) -> np.ndarray:
+        samples = decode_bytes(frame)
+        target_length = int(round(len(samples) * STREAM_SAMPLE_RATE / sample_rate))
+        positions = np.linspace(0, len(samples) - 1, num=target_length) if target_length else np.empty(0)
+        return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return decode_resampled
+
+
+class AudioQueue:
+    """
+    Decoded frames waiting to be transcribed, bounded by their total audio length (not
+    their count, which says nothing about their size). `put` waits while the queue is full.
+    """
+
+    def __init__(self, max_seconds: float):
+        self.max_seconds = max_seconds
+        self.seconds = 0.0
+        self._items: collections.deque = collections.deque()
+        self._changed = asyncio.Condition()
+
+    def empty(self) -> bool:
+        return not self._items
+
+    async def put(self, item: Optional[tuple]):
+        """Queues (samples, arrival time), or None to mark the end of the stream."""
+        seconds = len(item[0]) / STREAM_SAMPLE_RATE if item else 0.0
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.seconds + seconds <= self.max_seconds)
+            self._items.append(item)
+            self.seconds += seconds
+            self._changed.notify_all()
+
+    async def get(self) -> Optional[tuple]:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._items)
+            item = self._items.popleft()
+            if item:
+                self.seconds -= len(item[0]) / STREAM_SAMPLE_RATE
+            self._changed.notify_all()
+            return item
+
+
+def _is_end_event(text: str) -> bool:
+    try:
+        return json.loads(text).get("event") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+# --- Streaming Session ---
+class StreamSession:
+    """
+    Sliding-window transcription state for one connection.
+
+    Uncommitted audio is re-transcribed every STREAM_STEP_SECONDS. A segment is
+    committed (sent as 'final') once two consecutive hypotheses agree on it and it
+    ends at least STREAM_COMMIT_MARGIN_SECONDS before the live edge; the buffer is
+    then trimmed to the end of the last committed segment.
+    """
+
+    def __init__(self, language: Optional[str]):
+        self.language = language
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0.0 # Stream time (seconds) of buffer[0]
+        self.received_seconds = 0.0 # Total stream time received so far
+        self.pending_seconds = 0.0 # Audio received since the last decode
+        self.previous: List[Dict[str, Any]] = []
+        self.committed: List[Dict[str, Any]] = []
+        # (stream time at end of frame, wall clock time the frame arrived), for latency
+        self._arrivals_t: List[float] = []
+        self._arrivals_wall: List[float] = []
+
+    @property
+    def buffer_end(self) -> float:
+        return self.buffer_start + len(self.buffer) / STREAM_SAMPLE_RATE
+
+    def append(self, samples: np.ndarray, arrived_at: float):
+        self.buffer = np.concatenate([self.buffer, samples])
+        seconds = len(samples) / STREAM_SAMPLE_RATE
+        self.received_seconds += seconds
+        self.pending_seconds += seconds
+        self._arrivals_t.append(self.received_seconds)
+        self._arrivals_wall.append(arrived_at)
+
+    def _arrival_of(self, stream_time: float) -> float:
+        if not self._arrivals_wall:
+            return time.time()
+        index = bisect.bisect_left(self._arrivals_t, stream_time)
+        return self._arrivals_wall[min(index, len(self._arrivals_wall) - 1)]
+
+    def _commit(self, segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        now = time.time()
+        finals = []
+        for segment in segments:
+            if not segment["text"].strip():
+                continue
+            latency = max(0.0, now - self._arrival_of(segment["end"]))
+            speech_to_text_delay.observe(latency)
+            segment = dict(segment, id=len(self.committed), latency_ms=round(latency * 1000, 1))
+            self.committed.append(segment)
+            finals.append(segment)
+        if segments:
+            self._trim(segments[-1]["end"])
+        return finals
+
+    def _trim(self, until: float):
+        """Drops buffered audio (and arrival bookkeeping) before stream time `until`."""
+        drop = int((until - self.buffer_start) * STREAM_SAMPLE_RATE)
+        if drop > 0:
+            self.buffer = self.buffer[drop:]
+            self.buffer_start += drop / STREAM_SAMPLE_RATE
+        keep_from = bisect.bisect_left(self._arrivals_t, self.buffer_start)
+        del self._arrivals_t[:keep_from]
+        del self._arrivals_wall[:keep_from]
+
+    async def step(self, final: bool = False) -> Dict[str, Any]:
+        """Re-transcribes the buffer and returns newly committed segments plus the partial tail."""
+        self.pending_seconds = 0.0
+        if len(self.buffer) == 0:
+            return {"finals": [], "partial": None}
+
+        prompt = " ".join(seg["text"].strip() for seg in self.committed[-5:]) or None
+        result = await asr.transcribe_pcm(self.buffer, language=self.language, prompt=prompt)
+        self.language = self.language or result.get("language")
+        hypothesis = [
+            {
+                "start": round(self.buffer_start + seg["start"], 2),
+                "end": round(min(self.buffer_start + seg["end"], self.buffer_end), 2),
+                "text": seg["text"],
+            }
+            for seg in result.get("segments", [])
+        ]
+
+        if final:
+            finals = self._commit(hypothesis)
+            self._trim(self.buffer_end)
+            return {"finals": finals, "partial": None}
+
+        # Commit the prefix on which this and the previous hypothesis agree
+        stable = 0
+        for current, previous in zip(hypothesis, self.previous):
+            if _normalize(current["text"]) != _normalize(previous["text"]):
+                break
+            if current["end"] > self.buffer_end - STREAM_COMMIT_MARGIN_SECONDS:
+                break
+            stable += 1
+
+        # Keep the buffer bounded: when full, force out everything but the live tail, or
+        # a single segment that never settles (one long utterance) as it stands
+        if self.buffer_end - self.buffer_start >= STREAM_MAX_BUFFER_SECONDS:
+            stable = max(stable, len(hypothesis) - 1 if len(hypothesis) > 1 else len(hypothesis))
+
+        finals = self._commit(hypothesis[:stable])
+        if self.buffer_end - self.buffer_start >= STREAM_MAX_BUFFER_SECONDS:
+            self._trim(self.buffer_end - STREAM_MAX_BUFFER_SECONDS / 2) # Silence (or no progress): discard old audio
+        self.previous = hypothesis[stable:]
+        tail = self.previous
+        partial = None
+        if tail:
+            partial = {"start": tail[0]["start"], "end": tail[-1]["end"], "text": "".join(seg["text"] for seg in tail)}
+        return {"finals": finals, "partial": partial}
+
+    @property
+    def transcript(self) -> str:
+        return "\n".join(seg["text"] for seg in self.committed)
+
+
+async def _finalize_stream(job_id: str, filename: str, session: StreamSession):
+    """Persists the finished stream, then fills in summary/action items/decisions."""
+    transcript = session.transcript
+    try:
+        saved = await storage.save_processed_data(job_id=job_id, filename=filename, processed_data={
+            "transcript": transcript,
+            "summary": "",
+            "action_items": [],
+            "decisions": [],
+        })
+        if not saved:
+            raise RuntimeError("Could not save the transcript to the database.")
+        await storage.update_job_status(job_id, "summarizing", 60)
+
+        async def on_summary_text(summary: str):
+            await storage.save_partial_data(job_id, filename, {"summary": summary})
+
+        processed_data = await summarizer.process_transcript(transcript, on_summary_text=on_summary_text)
+        processed_data["transcript"] = transcript
+        if not await storage.save_processed_data(job_id=job_id, filename=filename, processed_data=processed_data):
+            raise RuntimeError("Could not save the meeting to the database.")
+        await storage.update_job_status(job_id, "done", 100)
+        logger.info("Stream summarization completed.")
+    except Exception as e:
+        logger.exception("Error summarizing stream: %s", e)
+        await storage.update_job_status(job_id, "failed", 100, error=str(e))
+
+
+async def _fail_stream(job_id: str, filename: str, session: StreamSession, error: str):
+    """Marks a stream that ended in an error failed, keeping any text committed before it."""
+    if session.committed:
+        await storage.save_processed_data(job_id=job_id, filename=filename, processed_data={
+            "transcript": session.transcript,
+            "summary": "Error",
+            "action_items": [],
+            "decisions": [],
+        })
+    await storage.update_job_status(job_id, "failed", 100, error=error)
+
+
+@router.websocket("/transcribe")
+async def transcribe_stream(websocket: WebSocket):
+    """
+    Live transcription over a WebSocket.
+
+    Query parameters: encoding (pcm_s16le | pcm_f32le | opus), sample_rate, language, filename.
+    The client sends binary audio frames and finishes with the text message {"event": "end"}
+    (or simply disconnects). The server replies with JSON messages of type 'ready',
+    'partial' (unstable tail, may change), 'final' (committed segment) and 'done'.
+    """
+    global active_streams
+    params = websocket.query_params
+    encoding = params.get("encoding", "pcm_s16le").lower()
+    language = params.get("language") or None
+    job_id = str(uuid.uuid4())
+    filename = params.get("filename") or f"live_{job_id}"
+
+    await websocket.accept()
+    try:
+        sample_rate = int(params.get("sample_rate", STREAM_SAMPLE_RATE))
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding '{encoding}'. Supported: {', '.join(sorted(SUPPORTED_ENCODINGS))}")
+        decode_frame = _make_decoder(encoding, sample_rate)
+    except Exception as e: # Bad parameters, missing opuslib or unsupported Opus rate
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    session = StreamSession(language)
+    frames = AudioQueue(STREAM_MAX_QUEUED_SECONDS)
+    connected = True
+    receive_error: Optional[Exception] = None
+    active_streams += 1
+    log.job_id_var.set(job_id) # Correlates every record from this connection (and its finalization task)
+    logger.info("Stream connection opened (%s, %d Hz).", encoding, sample_rate)
+
+    async def receive_frames():
+        nonlocal connected, receive_error
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    connected = False
+                    break
+                if message.get("bytes"):
+                    if len(message["bytes"]) > STREAM_MAX_FRAME_BYTES:
+                        await send({"type": "error", "detail": f"Audio frames are limited to {STREAM_MAX_FRAME_BYTES} bytes."})
+                        await websocket.close(code=1009)
+                        connected = False
+                        receive_error = ValueError("Audio frame too large.")
+                        break
+                    samples = decode_frame(message["bytes"])
+                    if len(samples) / STREAM_SAMPLE_RATE > STREAM_MAX_QUEUED_SECONDS:
+                        raise ValueError(f"Audio frames are limited to {STREAM_MAX_QUEUED_SECONDS:.0f}s of audio.")
+                    # Blocks when the queue is full, which stops reading and applies TCP backpressure
+                    await frames.put((samples, time.time()))
+                elif message.get("text") and _is_end_event(message["text"]):
+                    break
+        except WebSocketDisconnect:
+            connected = False
+        except Exception as e: # Undecodable frame
+            receive_error = e
+        finally:
+            await frames.put(None)
+
+    async def send(payload: Dict[str, Any]):
+        if connected:
+            try:
+                await websocket.send_json(payload)
+            except Exception:
+                pass
+
+    receiver = asyncio.create_task(receive_frames())
+    error = None
+    try:
+        await send({"type": "ready", "job_id": job_id})
+        await storage.update_job_status(job_id, "transcribing", 0)
+        finished = False
+        while not finished:
+            item = await frames.get()
+            # Drain what arrived while the previous decode was running, up to a full buffer;
+            # the rest stays queued (and bounded) for the next step
+            while item is not None:
+                session.append(item[0], item[1])
+                if frames.empty() or session.buffer_end - session.buffer_start >= STREAM_MAX_BUFFER_SECONDS:
+                    break
+                item = await frames.get()
+            finished = item is None
+            if finished and receive_error is not None:
+                raise receive_error
+
+            if finished or session.pending_seconds >= STREAM_STEP_SECONDS:
+                update = await session.step(final=finished)
+                for segment in update["finals"]:
+                    await send({"type": "final", "job_id": job_id, "segment": segment})
+                if update["partial"]:
+                    await send({"type": "partial", "job_id": job_id, **update["partial"]})
+    except Exception as e:
+        logger.exception("Error during streaming transcription: %s", e)
+        error = str(e)
+        await send({"type": "error", "detail": error})
+    finally:
+        receiver.cancel()
+        active_streams -= 1
+
+    await send({"type": "done", "job_id": job_id, "transcript": session.transcript})
+    if connected:
+        await websocket.close()
+
+    # Every exit leaves the job in a final stage (or on its way to one)
+    if error is not None:
+        await _fail_stream(job_id, filename, session, error)
+    elif session.committed:
+        task = asyncio.create_task(_finalize_stream(job_id, filename, session))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    else:
+        await storage.update_job_status(job_id, "failed", 100, error="No speech was transcribed.")
+    logger.info("Stream closed after %.1fs of audio.", session.received_seconds)
+
+
+@router.get("/transcribe/stats")
+async def stream_stats():
+    """Speech-to-text delay over recently committed live segments."""
+    return JSONResponse(content={"active_streams": active_streams, "speech_to_text_delay": speech_to_text_delay.snapshot()})
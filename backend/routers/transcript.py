@@ -1,8 +1,17 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse # Added PlainTextResponse
-from ..services import storage, pdf_generator # Import the updated storage and pdf_generator services
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse # Added PlainTextResponse
+from ..services import storage, pdf_generator, export # Import the updated storage and pdf_generator services
 # from ..models import schemas # Keep if using Pydantic response models
+import datetime
 import json # For potential pretty printing in JSON export
+import os
+from typing import List, Optional
+
+# Seconds between database checks while a summary stream waits for changes. Writes made
+# by this process wake the stream immediately; this bounds the delay for other workers.
+SUMMARY_STREAM_POLL_S = float(os.getenv("SUMMARY_STREAM_POLL_S", "1.0"))
+# Comment line sent when nothing changed for this long, so proxies keep the stream open
+SUMMARY_STREAM_KEEPALIVE_S = float(os.getenv("SUMMARY_STREAM_KEEPALIVE_S", "15"))
 
 router = APIRouter(
     # Prefix can remain /transcript or be changed, e.g., /meetings
@@ -39,6 +48,87 @@ async def get_summary_details(job_id: str):
     })
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/summary/{job_id}/stream")
+async def stream_summary(job_id: str, request: Request):
+    """
+    Streams the summary of a job as Server-Sent Events while it is being generated.
+
+    Events:
+    - token: {"delta": ...} text appended to the summary since the previous event.
+    - reset: {"summary": ...} the summary was replaced (e.g. partial chunk summaries
+      giving way to the merged one); clients should discard what they have.
+    - status: {"stage": ..., "progress": ...} whenever the job's stage or progress changes.
+    - done: the final summary, action items and decisions (or the error), then the stream closes.
+    """
+    status = await storage.get_job_status(job_id)
+    if not status and await storage.get_summary(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"No job found for job ID: {job_id}")
+
+    async def events():
+        sent = ""
+        last_status = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            summary = await storage.get_summary(job_id) or ""
+            status = await storage.get_job_status(job_id)
+            changed = False
+
+            if summary != sent:
+                if summary.startswith(sent):
+                    yield _sse("token", {"delta": summary[len(sent):]})
+                else:
+                    yield _sse("reset", {"summary": summary})
+                sent = summary
+                changed = True
+
+            current = (status["stage"], status["progress"]) if status else None
+            if current and current != last_status:
+                yield _sse("status", {"stage": current[0], "progress": current[1]})
+                last_status = current
+                changed = True
+
+            # Meetings stored before status tracking existed are treated as finished
+            if not status or status["stage"] in ("done", "failed"):
+                meeting_data = await storage.get_meeting_data(job_id) or {}
+                yield _sse("done", {
+                    "job_id": job_id,
+                    "stage": status["stage"] if status else "done",
+                    "error": status.get("error") if status else None,
+                    "summary": meeting_data.get("summary"),
+                    "action_items": meeting_data.get("action_items", []),
+                    "decisions": meeting_data.get("decisions", []),
+                })
+                return
+
+            idle = 0.0 if changed else idle + SUMMARY_STREAM_POLL_S
+            if idle >= SUMMARY_STREAM_KEEPALIVE_S:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await storage.wait_for_change(job_id, SUMMARY_STREAM_POLL_S)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no", # Stop nginx from buffering the event stream
+    })
+
+
+@router.get("/status/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Retrieves the processing stage, percent progress and per-stage timestamps for a job.
+    Reads only the small status row, so it is cheap to poll.
+    """
+    status = await storage.get_job_status(job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail=f"No job found for job ID: {job_id}")
+
+    return JSONResponse(content=status)
+
+
 @router.get("/transcript/{job_id}")
 async def get_full_transcript(job_id: str):
     """
@@ -55,7 +145,10 @@ async def get_full_transcript(job_id: str):
 
 # Note: Implemented as a global search, not per-ID search.
 @router.get("/search/")
-async def search_meeting_transcripts(query: str = Query(..., min_length=1)):
+async def search_meeting_transcripts(
+    query: str = Query(..., min_length=1),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of meetings returned (best matches first)"),
+):
     """
     Searches across all transcripts using the provided query.
     Returns a list of matching meeting records.
@@ -63,7 +156,10 @@ async def search_meeting_transcripts(query: str = Query(..., min_length=1)):
     if not query:
         raise HTTPException(status_code=400, detail="Search query cannot be empty.")
 
-    search_results = await storage.search_transcripts(query)
+    try:
+        search_results = await storage.search_transcripts(query, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if not search_results:
         return JSONResponse(content={"message": "No matching transcripts found.", "results": []})
@@ -73,6 +169,41 @@ async def search_meeting_transcripts(query: str = Query(..., min_length=1)):
     return JSONResponse(content={"query": query, "results": search_results})
 
 
+@router.get("/export")
+async def export_meetings(
+    ids: Optional[List[str]] = Query(None, description="Meeting job IDs (repeat the parameter for several)"),
+    q: Optional[str] = Query(None, min_length=1, description="Full-text search over transcripts (FTS5 syntax)"),
+    since: Optional[datetime.date] = Query(None, description="Meetings on or after this date"),
+    until: Optional[datetime.date] = Query(None, description="Meetings on or before this date"),
+    formats: List[str] = Query(["pdf", "json", "txt"], description="Any of pdf, json, txt (repeated or comma-separated)"),
+    include_transcript: bool = Query(True, description="Include full transcript in PDFs"),
+):
+    """
+    Downloads many meetings as one ZIP archive, e.g.
+    /meetings/export?since=2024-05-01&until=2024-05-31&formats=pdf,txt
+    All given filters must match; with none, every meeting is exported. The archive is
+    streamed while it is built, reusing PDFs that are already rendered and up to date.
+    """
+    selected = tuple(dict.fromkeys(f.strip().lower() for value in formats for f in value.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in export.EXPORT_FORMATS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format(s): {', '.join(unknown) or 'none given'}. Use pdf, json or txt.")
+
+    try:
+        meetings = await storage.find_meetings(job_ids=ids, q=q, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not meetings:
+        raise HTTPException(status_code=404, detail="No meetings match the export filters.")
+
+    filename = f"meetings_export_{datetime.date.today().isoformat()}.zip"
+    return StreamingResponse(
+        export.stream_zip([meeting["job_id"] for meeting in meetings], selected, include_transcript=include_transcript),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/pdf/{job_id}", response_class=FileResponse)
 async def get_pdf_report(job_id: str, include_transcript: bool = Query(True, description="Include full transcript in PDF")):
     """
@@ -121,30 +252,7 @@ async def get_txt_export(job_id: str):
     if not meeting_data:
         raise HTTPException(status_code=404, detail=f"Meeting data not found for job ID: {job_id}")
 
-    # Format the data into a simple text string
-    output_lines = []
-    output_lines.append(f"Meeting Report - Job ID: {job_id}")
-    output_lines.append(f"Original File: {meeting_data.get('filename', 'N/A')}")
-    output_lines.append(f"Timestamp: {meeting_data.get('timestamp', 'N/A')}")
-    output_lines.append("\n" + "="*20 + " SUMMARY " + "="*20 + "\n")
-    output_lines.append(meeting_data.get('summary', 'No summary available.'))
-
-    action_items = meeting_data.get('action_items', [])
-    if action_items:
-        output_lines.append("\n" + "="*20 + " ACTION ITEMS " + "="*20 + "\n")
-        for item in action_items:
-            output_lines.append(f"- {item}")
-
-    decisions = meeting_data.get('decisions', [])
-    if decisions:
-        output_lines.append("\n" + "="*20 + " DECISIONS " + "="*20 + "\n")
-        for item in decisions:
-            output_lines.append(f"- {item}")
-
-    output_lines.append("\n" + "="*20 + " TRANSCRIPT " + "="*20 + "\n")
-    output_lines.append(meeting_data.get('transcript', 'No transcript available.'))
-
-    output_text = "\n".join(output_lines)
+    output_text = export.format_text_report(job_id, meeting_data)
 
     # Return as plain text, potentially suggest filename for download
     headers = {'Content-Disposition': f'attachment; filename="meeting_{job_id}_report.txt"'}
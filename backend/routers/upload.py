@@ -1,10 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Header, Query, Request, Response
 from fastapi.responses import JSONResponse
+from starlette.requests import ClientDisconnect
+import asyncio
+import base64
+import binascii
+import collections
+import hashlib
 import shutil
 import os
 import uuid
 import datetime
-from ..services import asr, summarizer, storage # Import necessary services
+from typing import Any, Dict, List, Optional, Tuple
+from ..services import asr, diarization, summarizer, storage, metrics, retention # Import necessary services
+from ..utils import log
+
+logger = log.get_logger(__name__)
 # from ..utils.file_operations import save_upload_file # Optional: Use utility
 
 # Define the directory to save uploads
@@ -12,64 +22,189 @@ UPLOAD_DIRECTORY = "uploads"
 ALLOWED_EXTENSIONS = {".wav", ".mp3", ".m4a"}
 os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
 
+# Share of overall progress assigned to transcription; summarization fills the rest up to SAVE_PROGRESS
+ASR_PROGRESS_SHARE = 60
+SAVE_PROGRESS = 95
+PROGRESS_STEP = 5 # Only write a new status row once progress has moved this many percent
+
+# Queue jobs for remote ASR workers (routers/workers.py, backend/worker.py) instead of
+# transcribing in this process; summarization and saving still happen here
+ASR_REMOTE_WORKERS = os.getenv("ASR_REMOTE_WORKERS", "false").lower() in ("1", "true", "yes")
+
+# Resumable uploads (see "Resumable uploads" below)
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "4096")) * 1024 * 1024) # Largest file a session accepts
+UPLOAD_CHUNK_HINT_BYTES = 8 * 1024 * 1024 # PATCH size suggested to clients
+UPLOAD_WRITE_BYTES = 1024 * 1024 # Request bodies are written to disk in pieces of this size
+CHECKSUM_MISMATCH = 460 # Status the tus protocol uses for a failed Upload-Checksum
+
 router = APIRouter(
     prefix="/upload", # Keep prefix, change endpoint below
     tags=["upload"],
 )
 
+def _observe_stage_timings(timings: dict):
+    """Feeds a job's pipeline timings into the per-stage histogram."""
+    if timings.get("asr_end_s") is not None:
+        metrics.STAGE_SECONDS.observe(timings["asr_end_s"], stage="asr")
+    for chunk in timings.get("chunks", []):
+        if chunk.get("llm_end_s") is not None:
+            metrics.STAGE_SECONDS.observe(chunk["llm_end_s"] - chunk["llm_start_s"], stage="llm_chunk")
+    if timings.get("merge_end_s") is not None:
+        metrics.STAGE_SECONDS.observe(timings["merge_end_s"] - timings["merge_start_s"], stage="merge")
+    if timings.get("done_s") is not None:
+        metrics.STAGE_SECONDS.observe(timings["done_s"], stage="total")
+
+
 # --- Background Task Function ---
-async def process_audio_task(file_path: str, job_id: str, filename: str):
+async def process_audio_task(
+    file_path: str,
+    job_id: str,
+    filename: str,
+    segments: Optional[List[Dict[str, Any]]] = None,
+    asr_info: Optional[Dict[str, Any]] = None,
+) -> bool:
     """
     Background task to process audio: transcribe, summarize, and save.
+    With `segments` (and `asr_info`) already produced by a remote ASR worker,
+    transcription (and diarization) is skipped. Returns True once the meeting is
+    saved, False if the job failed (and its failure was recorded).
     """
-    print(f"[Task {job_id}] Starting background processing for: {file_path}")
+    job_token = log.job_id_var.set(job_id) # Every record below (and in the services) carries the job ID
+    logger.info("Starting background processing for: %s", file_path)
+    metrics.JOBS_IN_FLIGHT.inc()
+    diarization_task = None
+    succeeded = False
     try:
-        # 1. Transcribe Audio (using service from asr.py)
+        # 1 + 2. Transcribe and process as a pipeline: Whisper yields segments window by
+        # window and the summarizer starts on completed chunks while ASR is still running.
         # Language detection can be added here or passed from the request if needed
-        asr_result = await asr.transcribe_audio(file_path)
-        transcript = asr_result.get("transcript", "Transcription failed.")
-        # Diarization/timestamps are in asr_result if needed later
+        asr_info = asr_info if asr_info is not None else {}
+        if segments is None:
+            await storage.update_job_status(job_id, "transcribing", 0)
+
+        def on_audio(audio):
+            # Speaker diarization runs on the decoded audio alongside Whisper
+            nonlocal diarization_task
+            diarization_task = diarization.start(audio)
+
+        async def tracked_segments():
+            if segments is not None:
+                for segment in segments:
+                    yield segment
+                return
+            # Passes segments through while reporting transcription progress
+            reported = 0
+            async for segment in asr.stream_segments(file_path, info=asr_info, on_audio=on_audio):
+                duration = asr_info.get("duration")
+                if duration:
+                    progress = int(ASR_PROGRESS_SHARE * min(segment["end"] / duration, 1.0))
+                    if progress - reported >= PROGRESS_STEP:
+                        reported = progress
+                        await storage.update_job_status(job_id, "transcribing", progress)
+                yield segment
+
+        async def on_transcript(transcript: str):
+            # Transcript is readable while the LLM stages are still running
+            await storage.save_partial_data(job_id, filename, {"transcript": transcript})
+            await storage.update_job_status(job_id, "summarizing", ASR_PROGRESS_SHARE)
+
+        async def on_partial(partial: dict, done: int, total: Optional[int]):
+            # Chunks finished while ASR is still running (total None) are saved without
+            # touching the transcription progress
+            await storage.save_partial_data(job_id, filename, partial)
+            if total:
+                progress = ASR_PROGRESS_SHARE + (SAVE_PROGRESS - ASR_PROGRESS_SHARE) * done // total
+                await storage.update_job_status(job_id, "summarizing", progress)
+
+        async def on_summary_text(summary: str):
+            # Streamed summary tokens, throttled by the summarizer; followed via /meetings/summary/{job_id}/stream
+            await storage.save_partial_data(job_id, filename, {"summary": summary})
+
+        processed_data = await summarizer.process_segments(
+            tracked_segments(), on_partial=on_partial, on_transcript=on_transcript, on_summary_text=on_summary_text
+        )
 
-        # 2. Process Transcript (Summarize, Extract Actions/Decisions)
-        processed_data = await summarizer.process_transcript(transcript)
+        timings = processed_data.get("timings", {})
+        logger.info(
+            "Stage timings (s): first segment %s, ASR done %s, merge %s-%s, done %s for %ss of audio",
+            timings.get('asr_first_segment_s'), timings.get('asr_end_s'), timings.get('merge_start_s'),
+            timings.get('merge_end_s'), timings.get('done_s'), asr_info.get('duration'),
+        )
+        _observe_stage_timings(timings)
 
         # --- Log the processed data ---
-        print(f"[Task {job_id}] --- Processed Data ---")
-        print(f"[Task {job_id}] Summary: {processed_data.get('summary', 'N/A')}")
-        print(f"[Task {job_id}] Action Items: {processed_data.get('action_items', [])}")
-        print(f"[Task {job_id}] Decisions: {processed_data.get('decisions', [])}")
-        print(f"[Task {job_id}] --- End Processed Data ---")
+        # Payloads can be large: rendered lazily, truncated, and subject to LOG_SAMPLE_RATE
+        logger.debug(
+            "Processed data - Summary: %s | Action Items: %s | Decisions: %s",
+            log.Truncated(processed_data.get('summary', 'N/A')),
+            log.Truncated(processed_data.get('action_items', [])),
+            log.Truncated(processed_data.get('decisions', [])),
+            extra={"sample": True},
+        )
         # --- End Log ---
 
-        # Add the raw transcript to the data to be saved
-        processed_data['transcript'] = transcript
-        # Potentially add diarization/timestamps here too if needed in DB/output
-        # processed_data['diarization'] = asr_result.get("diarization", [])
-        # processed_data['timestamps'] = asr_result.get("timestamps", [])
+        # Speakers are stored as turns over the segments (see storage._speaker_turns);
+        # usually diarization finished while the LLM ran
+        await diarization.finish(diarization_task, processed_data.get("segments") or [])
 
         # 3. Save results to Database (using service from storage.py)
-        await storage.save_processed_data(job_id=job_id, filename=filename, processed_data=processed_data)
+        await storage.update_job_status(job_id, "saving", SAVE_PROGRESS)
+        if not await storage.save_processed_data(job_id=job_id, filename=filename, processed_data=processed_data):
+            raise RuntimeError("Could not save the meeting to the database.")
+        await storage.update_job_status(job_id, "done", 100)
+        metrics.JOBS_TOTAL.inc(status="done")
 
-        print(f"[Task {job_id}] Background processing completed successfully.")
+        logger.info("Background processing completed successfully.")
+        succeeded = True
 
     except Exception as e:
-        print(f"[Task {job_id}] Error during background processing for {file_path}: {e}")
-        # Optionally update DB record to indicate failure status
-        error_data = {
-            "transcript": f"Processing Error: {e}",
-            "summary": "Error",
-            "action_items": [],
-            "decisions": []
-        }
-        await storage.save_processed_data(job_id=job_id, filename=filename, processed_data=error_data)
+        logger.exception("Error during background processing for %s: %s", file_path, e)
+        await record_failure(file_path, job_id, filename, str(e))
     finally:
-        # Optional: Clean up the uploaded file after processing
-        try:
-            # os.remove(file_path)
-            # print(f"[Task {job_id}] Cleaned up temporary file: {file_path}")
-            pass # Keep file for now
-        except OSError as e:
-            print(f"[Task {job_id}] Error cleaning up file {file_path}: {e}")
+        if diarization_task is not None and not diarization_task.done():
+            diarization_task.cancel()
+        metrics.JOBS_IN_FLIGHT.dec()
+        if succeeded:
+            await _finalize_audio(job_id, file_path)
+        log.job_id_var.reset(job_token)
+    return succeeded
+
+
+async def _finalize_audio(job_id: str, file_path: str):
+    """
+    Records where the audio lives and transcodes it if configured (see services/retention.py).
+    The meeting is already saved, so a failure here is only logged and never touches its data.
+    """
+    try:
+        await retention.finalize_audio(job_id, file_path)
+    except Exception as e:
+        logger.exception("Could not finalize the audio of %s: %s", file_path, e)
+
+
+async def record_failure(file_path: str, job_id: str, filename: str, error: str):
+    """Stores the error as the meeting's content and marks the job failed."""
+    error_data = {
+        "transcript": f"Processing Error: {error}",
+        "summary": "Error",
+        "action_items": [],
+        "decisions": []
+    }
+    await storage.save_processed_data(job_id=job_id, filename=filename, processed_data=error_data)
+    await storage.update_job_status(job_id, "failed", 100, error=error)
+    metrics.JOBS_TOTAL.inc(status="failed")
+    # Keep the original for a retry; the retention sweeper applies the age/size policy
+    await storage.set_audio_location(job_id, file_path, "original")
+
+
+async def start_processing(background_tasks: BackgroundTasks, file_path: str, job_id: str, filename: str):
+    """Runs the job in this process, or queues it for remote ASR workers (ASR_REMOTE_WORKERS)."""
+    if ASR_REMOTE_WORKERS:
+        if not await storage.enqueue_job(job_id, file_path, filename):
+            raise HTTPException(status_code=500, detail="Could not queue the job for transcription.")
+        logger.info("Queued job_id %s for remote ASR workers", job_id)
+    else:
+        background_tasks.add_task(process_audio_task, file_path, job_id, filename)
+        logger.info("Added background task for job_id: %s", job_id)
 
 
 @router.post("/upload-audio")
@@ -95,19 +230,311 @@ async def upload_audio(background_tasks: BackgroundTasks, file: UploadFile = Fil
         # Save the uploaded file
         with open(file_location, "wb+") as file_object:
              shutil.copyfileobj(file.file, file_object)
-        print(f"File saved to: {file_location}")
+        logger.info("File saved to: %s", file_location)
+        await storage.update_job_status(job_id, "queued", 0)
 
-        # Add the processing job to background tasks
-        background_tasks.add_task(process_audio_task, file_location, job_id, new_filename)
-        print(f"Added background task for job_id: {job_id}")
+        # Add the processing job to background tasks (or the remote worker queue)
+        await start_processing(background_tasks, file_location, job_id, new_filename)
 
         # Return immediately with 202 Accepted and the job_id
         return JSONResponse(status_code=202, content={"job_id": job_id, "filename": new_filename, "message": "File upload accepted. Processing started in background."})
 
     except IOError as e:
-        print(f"IOError saving file {new_filename}: {e}")
+        logger.error("IOError saving file %s: %s", new_filename, e)
         raise HTTPException(status_code=500, detail=f"Could not save the file: {e}") # Corrected indentation
     except Exception as e:
         # Log the exception in a real app
-        print(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred: %s", e)
         raise HTTPException(status_code=500, detail="An internal server error occurred during file upload.")
+
+
+# --- Resumable uploads ---
+# For large recordings: create a session, PATCH the file in chunks at explicit offsets
+# (after a dropped connection, ask for the offset and continue from there), then
+# finalize to queue processing. Chunks are written straight into the final upload file
+# and the whole file is hashed as it arrives, so finalizing does not re-read it.
+#
+#   POST   /upload/sessions?filename=talk.m4a&size=524288000  -> 201 {"job_id", "offset": 0, ...}
+#   PATCH  /upload/sessions/{job_id}  Upload-Offset: <n>, optional Upload-Checksum: sha256 <base64 digest>
+#   HEAD   /upload/sessions/{job_id}  -> Upload-Offset / Upload-Length headers (GET: the same as JSON)
+#   POST   /upload/sessions/{job_id}/finalize[?sha256=<hex>]  -> 202 {"job_id", "sha256", ...}
+#   DELETE /upload/sessions/{job_id}  abandons the upload
+#
+# Sessions left untouched for UPLOAD_SESSION_TTL_HOURS are removed, with their partial
+# file, by the retention sweeper (services/retention.py).
+
+# job_id -> (offset, SHA-256 of the first `offset` bytes). Per process and bounded; on a
+# miss (restart, another worker, eviction) the hash is rebuilt from the file.
+_upload_hashers: "collections.OrderedDict[str, Tuple[int, Any]]" = collections.OrderedDict()
+_UPLOAD_HASHER_CACHE_SIZE = 64
+
+
+def _hash_prefix(path: str, length: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while length > 0:
+            data = f.read(min(UPLOAD_WRITE_BYTES, length))
+            if not data:
+                break
+            hasher.update(data)
+            length -= len(data)
+    return hasher
+
+
+async def _file_hasher(session: dict):
+    """SHA-256 state over the bytes received so far, from the cache or rebuilt from disk."""
+    cached = _upload_hashers.get(session["job_id"])
+    if cached and cached[0] == session["received"]:
+        return cached[1].copy()
+    return await asyncio.to_thread(_hash_prefix, session["file_path"], session["received"])
+
+
+def _remember_hasher(job_id: str, offset: int, hasher):
+    _upload_hashers[job_id] = (offset, hasher)
+    _upload_hashers.move_to_end(job_id)
+    while len(_upload_hashers) > _UPLOAD_HASHER_CACHE_SIZE:
+        _upload_hashers.popitem(last=False)
+
+
+def _parse_checksum(header: str) -> Tuple[str, bytes]:
+    """Parses 'Upload-Checksum: <algorithm> <base64 digest>' (tus checksum extension)."""
+    try:
+        algorithm, encoded = header.split()
+        algorithm = algorithm.lower()
+        if algorithm not in hashlib.algorithms_guaranteed or algorithm.startswith("shake"):
+            raise ValueError(algorithm)
+        return algorithm, base64.b64decode(encoded, validate=True)
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Upload-Checksum must be '<algorithm> <base64 digest>', e.g. 'sha256 ...'")
+
+
+def _lock_file(f) -> bool:
+    """Non-blocking exclusive lock on the upload file, so one PATCH writes at a time across workers."""
+    try:
+        import fcntl
+    except ImportError:
+        return True # No flock (Windows): the offset check in storage still rejects the loser
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _write_piece(f, data: bytes, hashers: list):
+    f.write(data)
+    for hasher in hashers:
+        hasher.update(data) # hashlib releases the GIL, so this runs alongside the event loop
+
+
+def _sync(f):
+    f.flush()
+    os.fsync(f.fileno()) # The offset is only advanced for bytes that are on disk
+
+
+def _session_headers(session: dict) -> dict:
+    return {
+        "Upload-Offset": str(session["received"]),
+        "Upload-Length": str(session["total_size"]),
+        "Cache-Control": "no-store",
+    }
+
+
+async def _get_session(job_id: str) -> dict:
+    session = await storage.get_upload_session(job_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"No upload session for job ID: {job_id}")
+    return session
+
+
+def _check_offset(session: dict, upload_offset: int):
+    if session["finalized_at"]:
+        raise HTTPException(status_code=409, detail="Upload already finalized.")
+    if upload_offset != session["received"]:
+        raise HTTPException(
+            status_code=409, headers=_session_headers(session),
+            detail=f"Offset mismatch: the upload is at byte {session['received']}",
+        )
+
+
+@router.post("/sessions", status_code=201)
+async def create_upload_session(
+    filename: str = Query(..., min_length=1, description="Original file name (.wav, .mp3, .m4a)"),
+    size: int = Query(..., gt=0, description="Total file size in bytes"),
+):
+    """
+    Starts a resumable upload and returns its job ID. Send the file with PATCH requests,
+    then POST .../finalize to start processing.
+    """
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        )
+    if size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File too large: at most {UPLOAD_MAX_BYTES} bytes")
+
+    job_id = str(uuid.uuid4())
+    new_filename = f"{job_id}{file_ext}"
+    file_location = os.path.join(UPLOAD_DIRECTORY, new_filename)
+    try:
+        open(file_location, "wb").close()
+    except OSError as e:
+        logger.error("Could not create upload file %s: %s", file_location, e)
+        raise HTTPException(status_code=500, detail=f"Could not create the upload file: {e}")
+    if not await storage.create_upload_session(job_id, new_filename, filename, file_location, size):
+        os.remove(file_location)
+        raise HTTPException(status_code=500, detail="Could not create the upload session.")
+
+    logger.info("Upload session %s created for %s (%d bytes)", job_id, filename, size)
+    return JSONResponse(status_code=201, headers={"Location": f"/upload/sessions/{job_id}"}, content={
+        "job_id": job_id,
+        "filename": new_filename,
+        "offset": 0,
+        "size": size,
+        "chunk_size": UPLOAD_CHUNK_HINT_BYTES,
+        "expires_after_idle_s": retention.UPLOAD_SESSION_TTL_HOURS * 3600,
+    })
+
+
+@router.head("/sessions/{job_id}")
+async def head_upload_session(job_id: str):
+    """Current offset (Upload-Offset) and total size (Upload-Length) of an upload, as headers."""
+    session = await _get_session(job_id)
+    return Response(status_code=200, headers=_session_headers(session))
+
+
+@router.get("/sessions/{job_id}")
+async def get_upload_session(job_id: str):
+    """Current offset and total size of an upload."""
+    session = await _get_session(job_id)
+    return JSONResponse(headers={"Cache-Control": "no-store"}, content={
+        "job_id": job_id,
+        "filename": session["filename"],
+        "offset": session["received"],
+        "size": session["total_size"],
+        "finalized": session["finalized_at"] is not None,
+    })
+
+
+@router.patch("/sessions/{job_id}")
+async def upload_chunk(
+    job_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
+):
+    """
+    Writes the request body at Upload-Offset, which must equal the current offset
+    (409 otherwise, with the current offset in the Upload-Offset header).
+    With Upload-Checksum the chunk is only kept if its digest matches (460 otherwise);
+    without it, the bytes received before a dropped connection are kept.
+    Returns 204 with the new Upload-Offset.
+    """
+    session = await _get_session(job_id)
+    _check_offset(session, upload_offset)
+    checksum = _parse_checksum(upload_checksum) if upload_checksum else None
+
+    written = 0
+    disconnected = False
+    with open(session["file_path"], "r+b") as f:
+        if not _lock_file(f):
+            raise HTTPException(status_code=409, detail="Another chunk of this upload is being written.")
+        # Re-read under the lock: a PATCH that held it before us may have moved the offset
+        session = await _get_session(job_id)
+        _check_offset(session, upload_offset)
+
+        file_hasher = await _file_hasher(session)
+        chunk_hasher = hashlib.new(checksum[0]) if checksum else None
+        hashers = [file_hasher] + ([chunk_hasher] if chunk_hasher else [])
+        remaining = session["total_size"] - upload_offset
+        f.seek(upload_offset)
+        pending = bytearray()
+        try:
+            async for piece in request.stream():
+                if written + len(pending) + len(piece) > remaining:
+                    await asyncio.to_thread(f.truncate, upload_offset)
+                    raise HTTPException(status_code=413, detail="Chunk runs past the declared upload size.")
+                pending += piece
+                if len(pending) >= UPLOAD_WRITE_BYTES:
+                    await asyncio.to_thread(_write_piece, f, bytes(pending), hashers)
+                    written += len(pending)
+                    pending.clear()
+        except ClientDisconnect:
+            disconnected = True
+        if pending:
+            await asyncio.to_thread(_write_piece, f, bytes(pending), hashers)
+            written += len(pending)
+
+        if checksum and (disconnected or chunk_hasher.digest() != checksum[1]):
+            await asyncio.to_thread(f.truncate, upload_offset)
+            logger.warning("Discarded chunk at offset %d of upload %s (%s)", upload_offset, job_id,
+                           "connection dropped" if disconnected else "checksum mismatch")
+            raise HTTPException(status_code=CHECKSUM_MISMATCH, headers=_session_headers(session),
+                                detail="Upload-Checksum does not match the chunk; resend it.")
+        await asyncio.to_thread(_sync, f)
+
+        # Advanced while the lock is still held, so the next PATCH sees the new offset
+        new_offset = upload_offset + written
+        if written and not await storage.advance_upload_session(job_id, upload_offset, new_offset):
+            raise HTTPException(status_code=409, detail="The upload offset changed concurrently; query it and resume.")
+    _remember_hasher(job_id, new_offset, file_hasher)
+    session["received"] = new_offset
+    return Response(status_code=204, headers=_session_headers(session))
+
+
+@router.post("/sessions/{job_id}/finalize")
+async def finalize_upload(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    sha256: Optional[str] = Query(None, description="Expected SHA-256 (hex) of the whole file"),
+):
+    """Completes an upload once every byte has arrived and starts processing it."""
+    session = await _get_session(job_id)
+    if session["finalized_at"]:
+        return JSONResponse(content={"job_id": job_id, "filename": session["filename"], "message": "Upload already finalized."})
+    if session["received"] != session["total_size"]:
+        raise HTTPException(
+            status_code=409, headers=_session_headers(session),
+            detail=f"Upload incomplete: {session['received']} of {session['total_size']} bytes received",
+        )
+
+    digest = (await _file_hasher(session)).hexdigest()
+    if sha256 and sha256.lower() != digest:
+        raise HTTPException(status_code=CHECKSUM_MISMATCH, detail=f"File SHA-256 is {digest}, expected {sha256}")
+    if not await storage.finalize_upload_session(job_id, digest):
+        raise HTTPException(status_code=409, detail="Upload was finalized or changed concurrently.")
+    _upload_hashers.pop(job_id, None)
+
+    # Finalizing first keeps concurrent finalize calls from starting the job twice; if it
+    # cannot start, the job is recorded as failed so the consumed upload is not silently lost
+    try:
+        await start_processing(background_tasks, session["file_path"], job_id, session["filename"])
+    except Exception as e:
+        error = str(getattr(e, "detail", e))
+        logger.error("Could not start processing finalized upload %s: %s", job_id, error)
+        await record_failure(session["file_path"], job_id, session["filename"], error)
+        raise
+    logger.info("Upload session %s finalized", job_id)
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "filename": session["filename"],
+        "sha256": digest,
+        "message": "File upload complete. Processing started in background.",
+    })
+
+
+@router.delete("/sessions/{job_id}", status_code=204)
+async def abort_upload(job_id: str):
+    """Abandons an upload that has not been finalized and deletes what was received."""
+    session = await _get_session(job_id)
+    if session["finalized_at"]:
+        raise HTTPException(status_code=409, detail="Upload already finalized.")
+    await storage.delete_upload_session(job_id)
+    _upload_hashers.pop(job_id, None)
+    try:
+        os.remove(session["file_path"])
+    except FileNotFoundError:
+        pass
+    return Response(status_code=204)
@@ -0,0 +1,219 @@
+# HTTP protocol for remote ASR workers (backend/worker.py), used when ASR_REMOTE_WORKERS
+# is set: uploads are queued in storage's job_queue table instead of being transcribed
+# by the API process that received them. A worker loops over:
+#
+#   POST /workers/claim?worker_id=<id>&wait_s=20  -> 200 {"job_id", "lease_token", "lease_s", ...}, 204 if idle
+#   GET  /workers/jobs/{job_id}/audio              (X-Lease-Token header) -> the uploaded file
+#   POST /workers/jobs/{job_id}/heartbeat          {"lease_token", "progress"}, well within lease_s
+#   POST /workers/jobs/{job_id}/result             {"lease_token", "segments", "language", "duration"}
+#     or /workers/jobs/{job_id}/fail               {"lease_token", "error", "retry"}
+#
+# The API stores the segments with the job, then summarizes and saves the meeting exactly as for a
+# local job, under a lease of its own: if the API process stops before the meeting is
+# saved, another one (or the same one after a restart) resumes from the stored segments.
+# A worker lease that is not renewed expires and the job is claimable again (up to
+# ASR_WORKER_MAX_ATTEMPTS claims, and as many summarization attempts); every claim issues
+# a new lease token, so late reports from a worker that lost its lease get 409 and are
+# dropped. Jobs out of attempts fail like a reported failure (upload.record_failure).
+
+import asyncio
+import hmac
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
+from ..models import schemas
+from ..services import metrics, storage
+from ..utils.log import get_logger
+from . import upload
+
+logger = get_logger(__name__)
+
+# Seconds a claim stays valid without a heartbeat
+ASR_WORKER_LEASE_S = float(os.getenv("ASR_WORKER_LEASE_S", "60"))
+# Claims per job before it is marked failed (expired leases and retried failures count);
+# the same limit applies again to resuming its summarization
+ASR_WORKER_MAX_ATTEMPTS = int(os.getenv("ASR_WORKER_MAX_ATTEMPTS", "3"))
+# Shared secret workers send as 'Authorization: Bearer <token>' (empty = no check)
+ASR_WORKER_TOKEN = os.getenv("ASR_WORKER_TOKEN", "")
+CLAIM_POLL_S = 1.0 # Database re-check while a claim long-polls (jobs queued by other API processes)
+CLAIM_MAX_WAIT_S = 30
+
+
+def _check_token(authorization: Optional[str] = Header(None)):
+    if ASR_WORKER_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {ASR_WORKER_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid worker token.")
+
+
+router = APIRouter(
+    prefix="/workers",
+    tags=["workers"],
+    dependencies=[Depends(_check_token)],
+)
+
+
+async def _fail_exhausted():
+    """Records the failure of every job whose lease expired on its last attempt."""
+    for job in await storage.fail_exhausted_jobs(ASR_WORKER_MAX_ATTEMPTS):
+        logger.warning("Job %s failed: %s", job["job_id"], job["error"])
+        await upload.record_failure(job["file_path"], job["job_id"], job["filename"], job["error"])
+
+
+async def _leased(job_id: str, lease_token: str) -> dict:
+    job = await storage.get_leased_job(job_id, lease_token)
+    if not job:
+        raise HTTPException(status_code=409, detail="Lease expired or not held by this worker; drop the job.")
+    return job
+
+
+@router.post("/claim")
+async def claim_job(
+    request: Request,
+    worker_id: str = Query(..., min_length=1),
+    wait_s: float = Query(0, ge=0, le=CLAIM_MAX_WAIT_S, description="Long-poll this long for a job"),
+):
+    """Leases the oldest queued job to the worker; 204 if none arrives within wait_s."""
+    deadline = time.monotonic() + wait_s
+    while True:
+        if await request.is_disconnected():
+            return Response(status_code=204) # Don't lease a job nobody will receive
+        await _fail_exhausted()
+        job = await storage.claim_job(worker_id, ASR_WORKER_LEASE_S, ASR_WORKER_MAX_ATTEMPTS)
+        if job:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return Response(status_code=204)
+        await storage.wait_for_change(storage.JOB_QUEUE_CHANNEL, min(CLAIM_POLL_S, remaining))
+
+    logger.info("Job %s leased to worker %s (attempt %d)", job["job_id"], worker_id, job["attempts"])
+    return JSONResponse(content={
+        "job_id": job["job_id"],
+        "lease_token": job["lease_token"],
+        "lease_s": ASR_WORKER_LEASE_S,
+        "filename": job["filename"],
+        "language": job["language"],
+        "audio_url": f"/workers/jobs/{job['job_id']}/audio",
+    })
+
+
+@router.get("/jobs/{job_id}/audio", response_class=FileResponse)
+async def get_job_audio(job_id: str, x_lease_token: str = Header(...)):
+    """The uploaded audio of a leased job (workers decode it themselves)."""
+    job = await _leased(job_id, x_lease_token)
+    if not os.path.isfile(job["file_path"]):
+        raise HTTPException(status_code=404, detail=f"Audio for job ID {job_id} is missing.")
+    return FileResponse(path=job["file_path"], media_type="application/octet-stream", filename=job["filename"])
+
+
+@router.post("/jobs/{job_id}/heartbeat")
+async def heartbeat(job_id: str, body: schemas.WorkerHeartbeat):
+    """Renews the lease and records transcription progress; 409 means the lease was lost."""
+    if not await storage.extend_lease(job_id, body.lease_token, ASR_WORKER_LEASE_S):
+        raise HTTPException(status_code=409, detail="Lease expired or not held by this worker; drop the job.")
+    if body.progress is not None:
+        progress = int(upload.ASR_PROGRESS_SHARE * min(max(body.progress, 0.0), 1.0))
+        await storage.update_job_status(job_id, "transcribing", progress)
+    return JSONResponse(content={"lease_s": ASR_WORKER_LEASE_S})
+
+
+async def _summarize(job: Dict[str, Any], lease_token: str, segments: List[dict], asr_info: Dict[str, Any]):
+    """
+    Summarizes and saves a transcribed job, renewing this process's lease on it meanwhile.
+    The queue row is only released once the meeting is saved (or its failure recorded).
+    If the lease cannot be renewed, the job may already be resumed elsewhere, so the
+    summarization is cancelled and the job left to the lease holder.
+    """
+    job_id = job["job_id"]
+    work = asyncio.create_task(upload.process_audio_task(
+        job["file_path"], job_id, job["filename"], segments=segments, asr_info=asr_info,
+    ))
+    lease_lost = False
+
+    async def renew():
+        nonlocal lease_lost
+        while True:
+            await asyncio.sleep(ASR_WORKER_LEASE_S / 3)
+            if not await storage.extend_lease(job_id, lease_token, ASR_WORKER_LEASE_S):
+                logger.warning("Lost the summarization lease on job %s; cancelling it", job_id)
+                lease_lost = True
+                work.cancel()
+                return
+
+    renewal = asyncio.create_task(renew())
+    try:
+        saved = await work
+    except asyncio.CancelledError:
+        if not lease_lost:
+            raise # This task itself was cancelled (e.g. shutdown)
+        return
+    finally:
+        renewal.cancel()
+        work.cancel() # No-op once finished; stops the summarization if this task is cancelled
+    await storage.release_job(job_id, lease_token, "done" if saved else "failed")
+
+
+_resumed: set = set() # Strong references to resumed summarization tasks
+
+
+async def resume_stalled_summaries():
+    """
+    Every ASR_WORKER_LEASE_S, resumes transcribed jobs whose summarizing API process
+    stopped renewing its lease (e.g. it was restarted), from the stored segments.
+    """
+    while True:
+        await _fail_exhausted()
+        while job := await storage.claim_stalled_summary(ASR_WORKER_LEASE_S, ASR_WORKER_MAX_ATTEMPTS):
+            logger.info("Resuming summarization of job %s", job["job_id"])
+            task = asyncio.create_task(_summarize(job, job["lease_token"], job["segments"], {"language": job["language"]}))
+            _resumed.add(task)
+            task.add_done_callback(_resumed.discard)
+        await asyncio.sleep(ASR_WORKER_LEASE_S)
+
+
+def start_recovery() -> Optional[asyncio.Task]:
+    """Starts resuming stalled summaries on the running loop (None unless ASR_REMOTE_WORKERS)."""
+    if not upload.ASR_REMOTE_WORKERS:
+        return None
+    return asyncio.create_task(resume_stalled_summaries())
+
+
+@router.post("/jobs/{job_id}/result", status_code=202)
+async def post_result(job_id: str, body: schemas.WorkerResult, background_tasks: BackgroundTasks):
+    """Stores the worker's segments and starts summarization and saving in the background."""
+    job = await _leased(job_id, body.lease_token)
+    # The transcript is readable right away, and the segments are kept with the job until
+    # the meeting is saved, so a restart of this process cannot lose the transcription.
+    # Both are written only if the lease is still held, in the same transaction.
+    transcript = "\n".join(segment.get("text", "") for segment in body.segments)
+    lease_token = await storage.hand_off_job(
+        job_id, body.lease_token, ASR_WORKER_LEASE_S, body.segments, body.language, transcript=transcript,
+    )
+    if not lease_token:
+        raise HTTPException(status_code=409, detail="Lease expired or not held by this worker; drop the job.")
+    if body.duration and body.asr_seconds:
+        metrics.ASR_REAL_TIME_FACTOR.observe(body.asr_seconds / body.duration)
+
+    background_tasks.add_task(
+        _summarize, job, lease_token, body.segments, {"duration": body.duration, "language": body.language},
+    )
+    logger.info("Job %s transcribed by worker %s (%d segments)", job_id, job["worker_id"], len(body.segments))
+    return JSONResponse(status_code=202, content={"job_id": job_id, "message": "Result accepted. Summarization started in background."})
+
+
+@router.post("/jobs/{job_id}/fail")
+async def post_failure(job_id: str, body: schemas.WorkerFailure):
+    """Reports a failed transcription: the job is queued again, or marked failed once out of attempts."""
+    job = await _leased(job_id, body.lease_token)
+    retry = body.retry and job["attempts"] < ASR_WORKER_MAX_ATTEMPTS
+    if not await storage.release_job(job_id, body.lease_token, "queued" if retry else "failed", body.error):
+        raise HTTPException(status_code=409, detail="Lease expired or not held by this worker; drop the job.")
+
+    logger.warning("Worker %s failed job %s (attempt %d): %s", job["worker_id"], job_id, job["attempts"], body.error)
+    if retry:
+        await storage.update_job_status(job_id, "queued", 0)
+    else:
+        await upload.record_failure(job["file_path"], job_id, job["filename"], body.error)
+    return JSONResponse(content={"job_id": job_id, "requeued": retry})
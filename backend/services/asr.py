@@ -1,19 +1,322 @@
 import os
+import asyncio
 import whisper # Use the actual library
 import torch # Whisper uses PyTorch
-from typing import Dict, Any, Optional
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 import pathlib # Import pathlib for robust path handling
+from whisper.audio import N_FRAMES, N_SAMPLES, HOP_LENGTH, SAMPLE_RATE
+import time
+from . import diarization, metrics
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
 
 WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL_NAME", "base")
 ASR_DEVICE = os.getenv("ASR_DEVICE", "cuda" if torch.cuda.is_available() else "cpu")
+# Set to false to skip loading the model at import (e.g. benchmarks that use a fake model)
+WHISPER_LOAD_MODEL = os.getenv("WHISPER_LOAD_MODEL", "true").lower() in ("1", "true", "yes")
+# Cross-job batching: 30-second windows from concurrent jobs are decoded together
+ASR_BATCHING = os.getenv("ASR_BATCHING", "true").lower() in ("1", "true", "yes")
+ASR_BATCH_MAX_SIZE = int(os.getenv("ASR_BATCH_MAX_SIZE", "8"))
+ASR_BATCH_MAX_WAIT_MS = float(os.getenv("ASR_BATCH_MAX_WAIT_MS", "50"))
+
+WINDOW_SECONDS = N_SAMPLES / SAMPLE_RATE # 30 seconds per Whisper window
+TIME_PRECISION = HOP_LENGTH * 2 / SAMPLE_RATE # Seconds per timestamp token (0.02)
 
 _whisper_model = None
 try:
-    print(f"Loading Whisper model '{WHISPER_MODEL_NAME}' onto device '{ASR_DEVICE}'...")
-    _whisper_model = whisper.load_model(WHISPER_MODEL_NAME, device=ASR_DEVICE)
-    print("Whisper model loaded successfully.")
+    if WHISPER_LOAD_MODEL:
+        logger.info("Loading Whisper model '%s' onto device '%s'...", WHISPER_MODEL_NAME, ASR_DEVICE)
+        _whisper_model = whisper.load_model(WHISPER_MODEL_NAME, device=ASR_DEVICE)
+        logger.info("Whisper model loaded successfully.")
 except Exception as e:
-    print(f"Error loading Whisper model '{WHISPER_MODEL_NAME}': {e}")
+    logger.error("Error loading Whisper model '%s': %s", WHISPER_MODEL_NAME, e)
+
+
+# The model is not thread-safe, so every inference call goes through this one thread
+_model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+
+# --- Batch Scheduler ---
+class BatchScheduler:
+    """
+    Collects 30-second mel windows submitted by concurrent jobs and runs the
+    Whisper encoder/decoder over them as a single batch.
+
+    A batch is dispatched once `max_batch_size` windows are pending or
+    `max_wait_s` has elapsed since the first window arrived, whichever is first.
+    Decoding runs on a dedicated thread so the event loop stays responsive, and
+    while one batch is decoding the next one accumulates in the queue.
+    """
+
+    def __init__(self, max_batch_size: int = ASR_BATCH_MAX_SIZE, max_wait_s: float = ASR_BATCH_MAX_WAIT_MS / 1000):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        """Number of windows waiting to be decoded."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, mel: torch.Tensor, language: Optional[str] = None) -> "whisper.DecodingResult":
+        """Queues one (n_mels, N_FRAMES) window and waits for its decoding result."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((mel, language, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # DecodingOptions apply to the whole batch, so group windows by requested language.
+            # Windows whose job was cancelled while they were queued are not decoded.
+            groups: Dict[Optional[str], List] = {}
+            for item in batch:
+                if not item[2].done():
+                    groups.setdefault(item[1], []).append(item)
+
+            for language, items in groups.items():
+                mels = [mel for mel, _, _ in items]
+                metrics.ASR_BATCH_SIZE.observe(len(mels))
+                try:
+                    with metrics.ASR_BATCH_SECONDS.time():
+                        results = await loop.run_in_executor(_model_executor, _decode_batch, mels, language)
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+
+def _decode_batch(mels: List[torch.Tensor], language: Optional[str]) -> List["whisper.DecodingResult"]:
+    """Runs encoder + decoder over a stacked batch of mel windows (blocking)."""
+    options = whisper.DecodingOptions(
+        language=language,
+        fp16=(ASR_DEVICE == "cuda"),
+    )
+    batch = torch.stack(mels).to(_whisper_model.device)
+    return whisper.decode(_whisper_model, batch, options)
+
+
+_scheduler = BatchScheduler()
+metrics.ASR_QUEUE_DEPTH.set_function(lambda: _scheduler.pending)
+
+
+def _split_window(tokens: List[int], tokenizer, offset: float, window_end: float) -> tuple:
+    """
+    Splits a window's decoded tokens into segments at Whisper's timestamp tokens, the
+    way whisper.transcribe does. Returns (segments, seconds consumed): when the window
+    ends inside speech, consumption stops at the last complete segment so the next
+    window starts there, instead of cutting the unfinished words at the window edge.
+    """
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+    single_timestamp_ending = is_timestamp[-2:] == [False, True]
+    # Closing and opening timestamp pairs mark the boundaries between segments
+    boundaries = [i for i in range(1, len(tokens)) if is_timestamp[i - 1] and is_timestamp[i]]
+
+    def text(piece: List[int]) -> str:
+        return tokenizer.decode([token for token in piece if token < tokenizer.eot])
+
+    def seconds(token: int, default: float) -> float:
+        return (token - timestamp_begin) * TIME_PRECISION if token >= timestamp_begin else default
+
+    if not boundaries:
+        # One segment for the whole window, ending at its last timestamp if there is one
+        end = window_end
+        timestamps = [token for token in tokens if token >= timestamp_begin]
+        if timestamps and timestamps[-1] != timestamp_begin:
+            end = min(offset + seconds(timestamps[-1], window_end - offset), window_end)
+        segments = [{"start": offset, "end": end, "text": text(tokens)}] if text(tokens).strip() else []
+        return segments, window_end - offset
+
+    if single_timestamp_ending:
+        boundaries.append(len(tokens))
+    segments = []
+    previous = 0
+    for boundary in boundaries:
+        piece = tokens[previous:boundary]
+        segments.append({
+            "start": offset + seconds(piece[0], 0.0),
+            "end": min(offset + seconds(piece[-1], window_end - offset), window_end),
+            "text": text(piece),
+        })
+        previous = boundary
+    if single_timestamp_ending:
+        return segments, window_end - offset
+    # The words after the last complete segment are decoded again with the next window
+    consumed = seconds(tokens[previous - 1], window_end - offset)
+    return segments, consumed if consumed > 0 else window_end - offset
+
+
+def _load_mel(file_path: str) -> tuple:
+    """
+    Decodes audio and computes its log-mel spectrogram, padded by one window as
+    whisper.transcribe does (blocking). Returns (mel, duration, audio).
+    """
+    audio = whisper.load_audio(file_path)
+    duration = len(audio) / SAMPLE_RATE
+    mel = whisper.log_mel_spectrogram(audio, _whisper_model.dims.n_mels, padding=N_SAMPLES)
+    return mel, duration, audio
+
+
+async def stream_segments(
+    file_path: str,
+    language: Optional[str] = None,
+    info: Optional[Dict[str, Any]] = None,
+    on_audio: Optional[Callable[[np.ndarray], Any]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Transcribes a file window by window, yielding segments in order as soon as each
+    30-second window is decoded, so downstream stages can start before ASR ends.
+
+    Windows go through the shared batch scheduler and are decoded without conditioning
+    on the previous window's text, which is what allows windows from different jobs to
+    share a batch. As in whisper.transcribe, each window starts at the end of the
+    previous window's last complete segment, so words that cross a window boundary are
+    decoded once, whole; a job therefore has one window in flight at a time, and
+    batches are formed across jobs.
+    With ASR_BATCHING disabled the whole file is transcribed first, then yielded.
+
+    Args:
+        file_path: The path to the audio file.
+        language: The language code, auto-detected if None.
+        info: Optional dict that receives 'duration' and 'language' for the caller, and
+            with batching 'window_starts' (seconds at which each decoded window began).
+        on_audio: Called with the decoded 16 kHz samples before decoding starts, so other
+            stages (diarization) can work on the same audio while Whisper runs.
+
+    Yields:
+        Segment dicts with id, start, end, text, avg_logprob and no_speech_prob.
+    """
+    info = info if info is not None else {}
+    if not _whisper_model:
+        raise RuntimeError("ASR model not available.")
+    started = time.perf_counter()
+
+    absolute_file_path = str(pathlib.Path(file_path).resolve())
+    if not ASR_BATCHING:
+        audio = await asyncio.to_thread(whisper.load_audio, absolute_file_path)
+        if on_audio is not None:
+            on_audio(audio)
+        result = await asyncio.get_running_loop().run_in_executor(
+            _model_executor,
+            lambda: _whisper_model.transcribe(audio, language=language, fp16=(ASR_DEVICE == "cuda")),
+        )
+        info["language"] = result.get("language", language)
+        segments = result.get("segments", [])
+        info["duration"] = segments[-1]["end"] if segments else 0.0
+        _observe_rtf(started, info["duration"])
+        for segment in segments:
+            yield segment
+        return
+
+    mel, duration, audio = await asyncio.to_thread(_load_mel, absolute_file_path)
+    if on_audio is not None:
+        on_audio(audio)
+    del audio # Only the callback keeps the samples
+    info["duration"] = duration
+    info["language"] = language
+    info["window_starts"] = []
+
+    content_frames = mel.shape[-1] - N_FRAMES # Without the padding
+    seek = 0
+    segment_id = 0
+    while seek < content_frames:
+        window_frames = min(N_FRAMES, content_frames - seek)
+        window = whisper.pad_or_trim(mel[:, seek:seek + window_frames], N_FRAMES)
+        # Cancelling this generator cancels the submit, and the scheduler skips the window
+        result = await _scheduler.submit(window, language)
+        offset = seek * HOP_LENGTH / SAMPLE_RATE
+        window_end = offset + window_frames * HOP_LENGTH / SAMPLE_RATE
+        info["window_starts"].append(offset)
+
+        # Same silence heuristic as whisper.transcribe
+        if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+            seek += window_frames
+            continue
+        info["language"] = info["language"] or result.language
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            _whisper_model.is_multilingual,
+            num_languages=_whisper_model.num_languages,
+            language=result.language,
+            task="transcribe",
+        )
+        segments, consumed = _split_window(list(result.tokens), tokenizer, offset, window_end)
+        seek += min(max(round(consumed * SAMPLE_RATE / HOP_LENGTH), 1), window_frames)
+        for segment in segments:
+            segment.update({
+                "id": segment_id,
+                "avg_logprob": result.avg_logprob,
+                "no_speech_prob": result.no_speech_prob,
+            })
+            segment_id += 1
+            yield segment
+    _observe_rtf(started, duration)
+
+
+def _observe_rtf(started: float, duration: Optional[float]):
+    if duration:
+        metrics.ASR_REAL_TIME_FACTOR.observe((time.perf_counter() - started) / duration)
+
+
+async def _transcribe_batched(file_path: str, language: Optional[str], on_audio: Optional[Callable[[np.ndarray], Any]] = None) -> Dict[str, Any]:
+    """Transcribes a whole file through the batch scheduler (see stream_segments)."""
+    info: Dict[str, Any] = {}
+    segments = [segment async for segment in stream_segments(file_path, language, info=info, on_audio=on_audio)]
+    return {"language": info.get("language"), "segments": segments, "duration": info.get("duration")}
+
+
+async def transcribe_pcm(audio: np.ndarray, language: Optional[str] = None, prompt: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Transcribes an in-memory 16 kHz mono float32 buffer (used by live streaming).
+
+    Args:
+        audio: Samples in [-1, 1] at 16 kHz. Should not exceed one 30-second window.
+        language: The language code, auto-detected if None.
+        prompt: Previously committed text, passed as Whisper's initial prompt for continuity.
+
+    Returns:
+        A dictionary with 'language' and 'segments' (start/end relative to the buffer).
+    """
+    if not _whisper_model:
+        return {"language": None, "segments": []}
+
+    def run():
+        return _whisper_model.transcribe(
+            audio,
+            language=language,
+            initial_prompt=prompt,
+            condition_on_previous_text=False,
+            fp16=(ASR_DEVICE == "cuda"),
+        )
+
+    result = await asyncio.get_running_loop().run_in_executor(_model_executor, run)
+    return {"language": result.get("language"), "segments": result.get("segments", [])}
+
 
 async def transcribe_audio(file_path: str, language: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -28,11 +331,13 @@ async def transcribe_audio(file_path: str, language: Optional[str] = None) -> Di
         - transcript: The full transcribed text.
         - language: Detected language.
         - segments: List of segments with timestamps (if available).
-        - diarization: Placeholder (Whisper doesn't do diarization out-of-the-box).
+        - duration: Audio length in seconds (None when not known).
+        - diarization: Speaker turns (start, end, speaker); each segment also gets the
+          'speaker' it overlaps most. Empty when DIARIZATION is off.
         - timestamps: Placeholder (word-level timestamps require specific model options).
     """
     if not _whisper_model:
-        print("Error: Whisper model is not loaded.")
+        logger.error("Whisper model is not loaded.")
         return {
             "transcript": "Error: ASR model not available.",
             "language": None,
@@ -41,29 +346,44 @@ async def transcribe_audio(file_path: str, language: Optional[str] = None) -> Di
             "timestamps": []
         }
 
-    print(f"Starting Whisper transcription for: {file_path}")
+    logger.info("Starting Whisper transcription for: %s", file_path)
     transcript = "Transcription failed."
     detected_language = language
     segments = []
-    # Placeholders - base Whisper doesn't provide these easily
-    diarization = []
+    duration = None
+    turns = []
+    # Placeholder - base Whisper doesn't provide word timestamps easily
     timestamps = []
+    diarization_task = None
+
+    def on_audio(audio: np.ndarray):
+        # Speaker diarization runs on the decoded audio while Whisper transcribes it
+        nonlocal diarization_task
+        diarization_task = diarization.start(audio)
 
     try:
         absolute_file_path = str(pathlib.Path(file_path).resolve())
-        print(f"Attempting transcription with absolute path: {absolute_file_path}")
+        logger.debug("Attempting transcription with absolute path: %s", absolute_file_path)
 
         # Perform transcription
         # verbose=True provides progress in logs, verbose=None is quieter
         # word_timestamps=True can provide word-level data but increases computation
         # fp16=False might be needed on CPU or if GPU has issues with float16
-        options = whisper.DecodingOptions(
-            language=language,
-            fp16=(ASR_DEVICE == "cuda"), # Use fp16 only on CUDA
-            # word_timestamps=True # Enable if word-level timestamps are needed
-        )
-        # Use the absolute path for transcription
-        result = _whisper_model.transcribe(absolute_file_path, **options.__dict__) # Pass options as dict
+        if ASR_BATCHING:
+            # Windows are batched with those of other in-flight jobs
+            result = await _transcribe_batched(absolute_file_path, language, on_audio)
+        else:
+            options = whisper.DecodingOptions(
+                language=language,
+                fp16=(ASR_DEVICE == "cuda"), # Use fp16 only on CUDA
+                # word_timestamps=True # Enable if word-level timestamps are needed
+            )
+            audio = await asyncio.to_thread(whisper.load_audio, absolute_file_path)
+            on_audio(audio)
+            # On the model thread, so the event loop (and diarization) keep running meanwhile
+            result = await asyncio.get_running_loop().run_in_executor(
+                _model_executor, lambda: _whisper_model.transcribe(audio, **options.__dict__) # Pass options as dict
+            )
 
         # changed by me to get segments
 
@@ -72,32 +392,33 @@ async def transcribe_audio(file_path: str, language: Optional[str] = None) -> Di
         
         detected_language = result.get("language", detected_language)
         segments = result.get("segments", []) # Contains start, end, text per segment
+        duration = result.get("duration")
 
         # --- Diarization & Word Timestamps ---
-        # Base Whisper doesn't perform speaker diarization.
-        # You would need additional libraries/models like:
-        # - pyannote.audio (requires accepting user agreements)
-        # - NeMo Speaker Diarization
-        # These would typically run after or alongside Whisper and results merged.
-        # For word timestamps, ensure word_timestamps=True in DecodingOptions
-        # and parse result["segments"] which will contain 'words' list if enabled.
-        # For now, diarization and word timestamps remain placeholders.
+        # Speaker turns come from services/diarization.py and are attached to the
+        # segments they overlap ('speaker'). For word timestamps, ensure
+        # word_timestamps=True in DecodingOptions and parse result["segments"], which
+        # will contain a 'words' list if enabled. Word timestamps remain a placeholder.
+        turns = await diarization.finish(diarization_task, segments)
 
-        print(f"Whisper transcription complete. Detected language: {detected_language}")
+        logger.info("Whisper transcription complete. Detected language: %s", detected_language)
 
     except Exception as e:
-        print(f"Error during Whisper transcription for {file_path}: {e}")
+        logger.error("Error during Whisper transcription for %s: %s", file_path, e)
         transcript = f"Error during transcription: {e}"
         # Reset other fields on error
         detected_language = None
         segments = []
-        diarization = []
+        turns = []
         timestamps = []
+        if diarization_task is not None:
+            diarization_task.cancel()
 
     return {
         "transcript": transcript,
         "language": detected_language,
-        "segments": segments, # Return segment-level timestamps
-        "diarization": diarization, # Placeholder
+        "segments": segments, # Return segment-level timestamps (and speakers)
+        "duration": duration, # Audio length in seconds (batched path only)
+        "diarization": turns, # Speaker turns: start, end, speaker
         "timestamps": timestamps    # Placeholder (word-level)
     }
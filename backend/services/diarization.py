@@ -0,0 +1,323 @@
+# Speaker diarization on the CPU, run alongside Whisper on the same decoded audio.
+# Pure NumPy, nothing to download: MFCC frames are pooled into short-window embeddings
+# (mean and spread of each coefficient), quiet windows are dropped, and the rest are
+# whitened against the variation seen within one speaker, over-clustered with k-means,
+# and the clusters merged until the remaining ones are clearly apart, so the number of
+# speakers need not be known.
+# Speaker turns are then matched to Whisper segments by time overlap.
+#
+# An optional .npz (DIARIZATION_MODEL_PATH) can supply a projection trained offline
+# (e.g. LDA on labelled speech) that maps the embeddings into a more speaker-discriminative
+# space, used instead of the per-recording whitening.
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import metrics
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+# Label segments with speakers (false skips the stage)
+DIARIZATION = os.getenv("DIARIZATION", "true").lower() in ("1", "true", "yes")
+# Optional .npz with 'mean' (D,) and 'projection' (D, K) arrays, and optionally 'threshold'
+DIARIZATION_MODEL_PATH = os.getenv("DIARIZATION_MODEL_PATH", "")
+DIARIZATION_MAX_SPEAKERS = int(os.getenv("DIARIZATION_MAX_SPEAKERS", "8"))
+# Clusters closer than this (mean squared distance per dimension, in units of the
+# within-speaker spread) are one speaker; lower finds more speakers
+DIARIZATION_THRESHOLD = float(os.getenv("DIARIZATION_THRESHOLD", "0.35"))
+# Embedding window length and hop, in seconds
+DIARIZATION_WINDOW_S = float(os.getenv("DIARIZATION_WINDOW_S", "1.5"))
+DIARIZATION_HOP_S = float(os.getenv("DIARIZATION_HOP_S", "0.75"))
+# Windows less than this many dB above the recording's noise floor are not speech
+DIARIZATION_VAD_DB = float(os.getenv("DIARIZATION_VAD_DB", "12"))
+
+SAMPLE_RATE = 16000 # Whisper's decoding rate (whisper.audio is not imported: it pulls in torch)
+FRAME_LENGTH = 400 # 25 ms analysis frames
+FRAME_HOP = 160 # 10 ms
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20 # c0 (loudness) is dropped from the embeddings
+BLOCK_FRAMES = 6000 # Frames per FFT block (one minute), bounding peak memory on long recordings
+INIT_CLUSTERS = 16 # Over-segmentation before centroids are merged
+KMEANS_ITERATIONS = 20
+SMOOTH_WINDOWS = 5 # Majority vote over this many neighbouring windows
+NOISE_FLOOR_PERCENTILE = 10
+EIGENVALUE_FLOOR = 1e-4 # Relative to the largest, when whitening
+MIN_PAIRS_PER_DIMENSION = 4 # Adjacent window pairs needed to estimate the within-speaker covariance
+MIN_SPEAKER_SHARE = 0.03 # Of the speech; smaller clusters are attributed to the nearest speaker
+
+
+def _mel_filterbank() -> np.ndarray:
+    """Triangular mel filters, shape (N_MELS, N_FFT // 2 + 1)."""
+    mels = np.linspace(0, 2595 * np.log10(1 + SAMPLE_RATE / 2 / 700), N_MELS + 2)
+    hz = 700 * (10 ** (mels / 2595) - 1)
+    freqs = np.linspace(0, SAMPLE_RATE / 2, N_FFT // 2 + 1)
+    lower, center, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def _dct_matrix() -> np.ndarray:
+    """DCT-II basis for cepstral coefficients 1..N_MFCC-1, shape (N_MFCC - 1, N_MELS)."""
+    k = np.arange(1, N_MFCC)[:, None]
+    n = np.arange(N_MELS)[None, :]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * N_MELS)).astype(np.float32)
+
+
+_FILTERBANK = _mel_filterbank()
+_DCT = _dct_matrix()
+_WINDOW = np.hamming(FRAME_LENGTH).astype(np.float32)
+
+_projection = None # (mean, projection) from DIARIZATION_MODEL_PATH
+try:
+    if DIARIZATION and DIARIZATION_MODEL_PATH:
+        with np.load(DIARIZATION_MODEL_PATH) as model:
+            _projection = (model["mean"].astype(np.float32), model["projection"].astype(np.float32))
+            if "threshold" in model:
+                DIARIZATION_THRESHOLD = float(model["threshold"])
+        if _projection[0].shape != (2 * (N_MFCC - 1),) or _projection[1].shape[0] != 2 * (N_MFCC - 1):
+            raise ValueError(f"expected {2 * (N_MFCC - 1)}-dimensional inputs, got mean {_projection[0].shape} and projection {_projection[1].shape}")
+        logger.info("Loaded diarization projection from %s", DIARIZATION_MODEL_PATH)
+except Exception as e:
+    _projection = None
+    logger.error("Error loading diarization model '%s': %s; using standardized embeddings", DIARIZATION_MODEL_PATH, e)
+
+
+# --- Embeddings ---
+def _frame_features(audio: np.ndarray) -> tuple:
+    """MFCCs (without c0) and log energy per 10 ms frame."""
+    if len(audio) < FRAME_LENGTH:
+        return np.zeros((0, N_MFCC - 1), np.float32), np.zeros(0, np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(audio, FRAME_LENGTH)[::FRAME_HOP] # A view: no copy
+    mfcc = np.empty((len(frames), N_MFCC - 1), np.float32)
+    energy = np.empty(len(frames), np.float32)
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        power = np.abs(np.fft.rfft(frames[start:start + BLOCK_FRAMES] * _WINDOW, N_FFT)).astype(np.float32) ** 2
+        energy[start:start + len(power)] = 10 * np.log10(power.sum(axis=1) + 1e-10)
+        mfcc[start:start + len(power)] = np.log(power @ _FILTERBANK.T + 1e-10) @ _DCT.T
+    return mfcc, energy
+
+
+def _window_sums(values: np.ndarray, starts: np.ndarray, length: int) -> np.ndarray:
+    """Sums of `values` over [start, start + length) for every start, via a cumulative sum."""
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0, dtype=np.float64)])
+    return cumulative[starts + length] - cumulative[starts]
+
+
+def _embeddings(mfcc: np.ndarray, energy: np.ndarray) -> tuple:
+    """
+    Pools frames into overlapping windows. Returns the (projected or standardized)
+    embeddings of the speech windows and their window indices.
+    """
+    length = max(1, round(DIARIZATION_WINDOW_S * SAMPLE_RATE / FRAME_HOP))
+    hop = max(1, round(DIARIZATION_HOP_S * SAMPLE_RATE / FRAME_HOP))
+    if len(mfcc) < length:
+        return np.zeros((0, 2 * (N_MFCC - 1)), np.float32), np.zeros(0, int)
+    starts = np.arange(0, len(mfcc) - length + 1, hop)
+
+    mfcc = mfcc - mfcc.mean(axis=0) # Cepstral mean normalization removes the channel
+    mean = _window_sums(mfcc, starts, length) / length
+    spread = np.sqrt(np.maximum(_window_sums(mfcc.astype(np.float64) ** 2, starts, length) / length - mean ** 2, 0))
+    loudness = _window_sums(energy, starts, length) / length
+    speech = np.flatnonzero(loudness > np.percentile(energy, NOISE_FLOOR_PERCENTILE) + DIARIZATION_VAD_DB)
+
+    embeddings = np.hstack([mean, spread])[speech].astype(np.float32)
+    if len(embeddings) == 0:
+        return embeddings, speech
+    if _projection is not None:
+        embeddings = (embeddings - _projection[0]) @ _projection[1]
+    else:
+        embeddings = (embeddings - embeddings.mean(axis=0)) / (embeddings.std(axis=0) + 1e-6)
+    return embeddings, speech
+
+
+# --- Clustering ---
+def _whiten(embeddings: np.ndarray, windows: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Rescales the embeddings so that the variation within one speaker is the same in every
+    direction, estimated from pairs of adjacent non-overlapping windows (nearly all of
+    which have the same speaker). What remains large is mostly the difference between
+    speakers, which is what an LDA projection would learn from labelled data. None when
+    there is too little speech (about two minutes) to estimate the covariance.
+    """
+    step = max(1, int(np.ceil(DIARIZATION_WINDOW_S / DIARIZATION_HOP_S)))
+    later = np.searchsorted(windows, windows + step)
+    paired = np.flatnonzero((later < len(windows)) & (windows[np.minimum(later, len(windows) - 1)] == windows + step))
+    if len(paired) < MIN_PAIRS_PER_DIMENSION * embeddings.shape[1]:
+        return None
+    differences = embeddings[later[paired]] - embeddings[paired]
+    values, vectors = np.linalg.eigh(differences.T @ differences / (2 * len(differences)))
+    return (embeddings - embeddings.mean(axis=0)) @ (vectors / np.sqrt(np.maximum(values, values.max() * EIGENVALUE_FLOOR)))
+
+
+def _kmeans(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Lloyd's k-means from `centroids` (empty clusters are dropped); returns the labels."""
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        distances = (centroids ** 2).sum(axis=1) - 2 * embeddings @ centroids.T # Up to a per-row constant
+        new_labels = np.argmin(distances, axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        onehot = np.zeros((len(embeddings), len(centroids)), embeddings.dtype)
+        onehot[np.arange(len(embeddings)), labels] = 1
+        counts = onehot.sum(axis=0)
+        centroids = (onehot.T @ embeddings)[counts > 0] / counts[counts > 0, None]
+    return labels
+
+
+def _cluster(embeddings: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """Assigns a speaker label to each embedding (`windows`: their window indices)."""
+    if _projection is None:
+        embeddings = _whiten(embeddings, windows)
+        if embeddings is None:
+            return np.zeros(len(windows), int) # Too short to tell voices apart: one speaker
+    dimensions = embeddings.shape[1]
+
+    # Over-cluster, seeding each centroid at the window farthest from the seeds so far
+    seeds = [0]
+    nearest = ((embeddings - embeddings[0]) ** 2).sum(axis=1)
+    for _ in range(min(INIT_CLUSTERS, len(embeddings)) - 1):
+        seeds.append(int(np.argmax(nearest)))
+        nearest = np.minimum(nearest, ((embeddings - embeddings[seeds[-1]]) ** 2).sum(axis=1))
+    labels = _kmeans(embeddings, embeddings[seeds])
+
+    # Merge clusters until every pair is further apart than DIARIZATION_THRESHOLD (and at
+    # most DIARIZATION_MAX_SPEAKERS remain). Distances are per dimension and net of the noise
+    # expected in the means of small clusters, so the threshold does not depend on the
+    # recording's length. Among the pairs close enough, the one with the lowest Ward cost
+    # goes first, so small fragments join their nearest cluster before clusters combine.
+    onehot = np.zeros((len(embeddings), labels.max() + 1))
+    onehot[np.arange(len(embeddings)), labels] = 1
+    onehot = onehot[:, onehot.any(axis=0)]
+    counts = onehot.sum(axis=0) * min(1.0, DIARIZATION_HOP_S / DIARIZATION_WINDOW_S) # Overlapping windows are not independent
+    means = onehot.T @ embeddings / onehot.sum(axis=0)[:, None]
+    while len(counts) > 1:
+        squared = ((means[:, None] - means[None, :]) ** 2).sum(axis=-1) / dimensions
+        distance = squared - (1 / counts[:, None] + 1 / counts[None, :])
+        np.fill_diagonal(distance, np.inf)
+        if distance.min() > DIARIZATION_THRESHOLD and len(counts) <= DIARIZATION_MAX_SPEAKERS:
+            break
+        cost = counts[:, None] * counts[None, :] / (counts[:, None] + counts[None, :]) * squared
+        eligible = distance <= max(DIARIZATION_THRESHOLD, distance.min())
+        i, j = np.unravel_index(np.argmin(np.where(eligible, cost, np.inf)), cost.shape)
+        means[i] = (counts[i] * means[i] + counts[j] * means[j]) / (counts[i] + counts[j])
+        counts[i] += counts[j]
+        counts, means = np.delete(counts, j), np.delete(means, j, axis=0)
+
+    # Clusters with too little speech to be a participant are folded into the others
+    keep = counts >= MIN_SPEAKER_SHARE * counts.sum()
+    means = means[keep] if keep.any() else means[[np.argmax(counts)]]
+    return np.argmin(((embeddings[:, None] - means[None]) ** 2).sum(axis=-1), axis=1)
+
+
+def _smooth(labels: np.ndarray) -> np.ndarray:
+    """Majority vote over SMOOTH_WINDOWS neighbours, removing single-window flips."""
+    onehot = np.eye(labels.max() + 1)[labels]
+    positions = np.arange(len(labels))
+    half = SMOOTH_WINDOWS // 2
+    cumulative = np.concatenate([np.zeros((1, onehot.shape[1])), np.cumsum(onehot, axis=0)])
+    counts = cumulative[np.minimum(positions + half + 1, len(labels))] - cumulative[np.maximum(positions - half, 0)]
+    return np.argmax(counts, axis=1)
+
+
+def _turns(windows: np.ndarray, labels: np.ndarray) -> List[Dict[str, Any]]:
+    """Joins consecutive windows of one speaker into turns; each window covers the hop around its centre."""
+    centres = windows * DIARIZATION_HOP_S + DIARIZATION_WINDOW_S / 2
+    breaks = np.flatnonzero((np.diff(labels) != 0) | (np.diff(windows) != 1)) + 1
+    firsts = np.concatenate([[0], breaks])
+    lasts = np.concatenate([breaks, [len(labels)]]) - 1
+    _, first_seen = np.unique(labels, return_index=True)
+    names = {labels[index]: f"SPEAKER_{number + 1}" for number, index in enumerate(np.sort(first_seen))}
+    return [
+        {
+            "start": round(float(max(centres[first] - DIARIZATION_HOP_S / 2, 0)), 2),
+            "end": round(float(centres[last] + DIARIZATION_HOP_S / 2), 2),
+            "speaker": names[labels[first]],
+        }
+        for first, last in zip(firsts, lasts)
+    ]
+
+
+def diarize(audio: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    Finds who spoke when (blocking).
+
+    Args:
+        audio: 16 kHz mono float32 samples, as decoded for Whisper.
+
+    Returns:
+        Speaker turns in time order, each with 'start', 'end' (seconds) and 'speaker'
+        ('SPEAKER_1', 'SPEAKER_2', ... in order of first appearance).
+    """
+    started = time.perf_counter()
+    mfcc, energy = _frame_features(np.asarray(audio, dtype=np.float32))
+    embeddings, windows = _embeddings(mfcc, energy)
+    if len(embeddings) == 0:
+        return []
+    labels = _smooth(_cluster(embeddings, windows)) if len(embeddings) > 1 else np.zeros(1, int)
+    turns = _turns(windows, labels)
+    logger.info(
+        "Diarized %.0fs of audio into %d speaker(s) and %d turns in %.2fs",
+        len(audio) / SAMPLE_RATE, len({turn["speaker"] for turn in turns}), len(turns), time.perf_counter() - started,
+    )
+    return turns
+
+
+def assign_speakers(segments: List[Dict[str, Any]], turns: List[Dict[str, Any]]):
+    """
+    Sets each segment's 'speaker' to the speaker with the most overlapping time. Segments
+    that overlap no turn (e.g. speech the energy detector missed) are left without one.
+    """
+    if not segments or not turns:
+        return
+    starts = np.array([turn["start"] for turn in turns])
+    ends = np.array([turn["end"] for turn in turns]) # Turns do not overlap, so ends are sorted too
+    names = sorted({turn["speaker"] for turn in turns})
+    codes = np.array([names.index(turn["speaker"]) for turn in turns])
+    for segment in segments:
+        first = np.searchsorted(ends, segment["start"], side="right")
+        last = np.searchsorted(starts, segment["end"], side="left")
+        if first >= last:
+            continue
+        overlap = np.minimum(ends[first:last], segment["end"]) - np.maximum(starts[first:last], segment["start"])
+        segment["speaker"] = names[int(np.argmax(np.bincount(codes[first:last], weights=overlap)))]
+
+
+# --- Pipeline ---
+async def _run(audio: np.ndarray) -> List[Dict[str, Any]]:
+    with metrics.STAGE_SECONDS.time(stage="diarization"):
+        return await asyncio.to_thread(diarize, audio)
+
+
+def start(audio: np.ndarray) -> Optional[asyncio.Task]:
+    """
+    Starts diarizing on a worker thread, to run while Whisper decodes the same audio.
+    Returns the task to pass to `finish` (None when DIARIZATION is off).
+    """
+    if not DIARIZATION:
+        return None
+    return asyncio.create_task(_run(audio))
+
+
+async def finish(task: Optional[asyncio.Task], segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Waits for a `start` task and labels `segments` in place. Returns the speaker turns.
+    A diarization failure is logged and leaves the segments unlabelled.
+    """
+    if task is None:
+        return []
+    try:
+        turns = await task
+    except Exception as e:
+        logger.error("Diarization failed: %s", e)
+        return []
+    assign_speakers(segments, turns)
+    return turns
@@ -0,0 +1,197 @@
+# Bulk export of many meetings as one ZIP archive, streamed while it is being built.
+#
+# zipfile writes into a write-only buffer with no tell/seek, so it puts each member's
+# sizes in a data descriptor after the data instead of seeking back to patch the
+# header. The buffer is drained after every member (and every PDF chunk), so memory
+# stays flat however many meetings are exported. Up-to-date PDFs in generated_pdfs/
+# are reused; missing or stale ones are rendered a few meetings ahead of the writer in
+# a small process pool (fpdf2 is pure Python, so threads would serialize on the GIL).
+# The pool runs pdf_report, which does not import storage, so the worker processes
+# never open or migrate the database.
+
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import time
+import zipfile
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from . import metrics, pdf_generator, pdf_report, storage
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ("pdf", "json", "txt")
+# Processes rendering missing PDFs during an export (0 renders in threads instead)
+EXPORT_PDF_WORKERS = int(os.getenv("EXPORT_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXPORT_CHUNK_BYTES = 256 * 1024 # PDF bytes copied into the archive per chunk
+
+
+def format_text_report(job_id: str, meeting_data: Dict[str, Any]) -> str:
+    """Plain-text report (summary, actions, decisions, transcript) as served by /meetings/txt/."""
+    output_lines = []
+    output_lines.append(f"Meeting Report - Job ID: {job_id}")
+    output_lines.append(f"Original File: {meeting_data.get('filename', 'N/A')}")
+    output_lines.append(f"Timestamp: {meeting_data.get('timestamp', 'N/A')}")
+    output_lines.append("\n" + "="*20 + " SUMMARY " + "="*20 + "\n")
+    output_lines.append(meeting_data.get('summary', 'No summary available.'))
+
+    action_items = meeting_data.get('action_items', [])
+    if action_items:
+        output_lines.append("\n" + "="*20 + " ACTION ITEMS " + "="*20 + "\n")
+        for item in action_items:
+            output_lines.append(f"- {item}")
+
+    decisions = meeting_data.get('decisions', [])
+    if decisions:
+        output_lines.append("\n" + "="*20 + " DECISIONS " + "="*20 + "\n")
+        for item in decisions:
+            output_lines.append(f"- {item}")
+
+    output_lines.append("\n" + "="*20 + " TRANSCRIPT " + "="*20 + "\n")
+    output_lines.append(meeting_data.get('transcript', 'No transcript available.'))
+
+    return "\n".join(output_lines)
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; drain() hands back what was written so far."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# --- PDF rendering ---
+_render_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+
+def _get_render_pool() -> Optional[concurrent.futures.ProcessPoolExecutor]:
+    global _render_pool
+    if _render_pool is None and EXPORT_PDF_WORKERS > 0:
+        _render_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=EXPORT_PDF_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"), # Don't fork the server's threads and sockets
+        )
+    return _render_pool
+
+
+def shutdown():
+    """Stops the PDF render processes (called on app shutdown)."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+        _render_pool = None
+
+
+async def _get_pdf(job_id: str, meeting_data: Dict[str, Any], include_transcript: bool) -> Optional[str]:
+    cached = pdf_generator.cached_report(job_id, meeting_data, include_transcript)
+    if cached:
+        return cached
+    pdf_filepath = pdf_generator.report_path(job_id, include_transcript)
+    start = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            _get_render_pool(), pdf_report.write_report, job_id, meeting_data, pdf_filepath, include_transcript,
+        )
+    except Exception as e:
+        logger.error("Error rendering PDF for job %s during export: %s", job_id, e)
+        return None
+    metrics.PDF_RENDER_SECONDS.observe(time.perf_counter() - start)
+    return pdf_filepath
+
+
+async def _prepare(job_id: str, formats: Tuple[str, ...], include_transcript: bool) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Loads one meeting and, if PDFs are wanted, makes sure its report exists."""
+    meeting_data = await storage.get_meeting_data(job_id)
+    if not meeting_data or "pdf" not in formats:
+        return meeting_data, None
+    return meeting_data, await _get_pdf(job_id, meeting_data, include_transcript)
+
+
+# --- Archive ---
+def _zip_info(name: str, timestamp: Any, compress_type: int) -> zipfile.ZipInfo:
+    try:
+        date_time = datetime.datetime.fromisoformat(str(timestamp)).timetuple()[:6]
+    except ValueError:
+        date_time = time.localtime()[:6]
+    info = zipfile.ZipInfo(name, date_time=max(date_time, (1980, 1, 1, 0, 0, 0)))
+    info.compress_type = compress_type
+    return info
+
+
+async def stream_zip(job_ids: List[str], formats: Tuple[str, ...], include_transcript: bool = True) -> AsyncIterator[bytes]:
+    """
+    Yields a ZIP archive with the requested formats for each meeting, in `job_ids` order.
+    Members are named like the single-meeting downloads (meeting_<id>_report.pdf,
+    meeting_<id>_data.json, meeting_<id>_report.txt). Meetings or PDFs that could not be
+    produced are listed in export_errors.txt instead of failing the whole download.
+    """
+    sink = _ZipSink()
+    remaining = iter(job_ids)
+    pending: collections.deque = collections.deque()
+    # Meetings loaded (and PDFs rendered) ahead of the one being written
+    lookahead = max(1, EXPORT_PDF_WORKERS) * 2 if "pdf" in formats else 2
+    errors: List[str] = []
+
+    def fill():
+        for job_id in itertools.islice(remaining, lookahead - len(pending)):
+            pending.append((job_id, asyncio.create_task(_prepare(job_id, formats, include_transcript))))
+
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            fill()
+            while pending:
+                job_id, task = pending.popleft()
+                meeting_data, pdf_filepath = await task
+                fill()
+                if not meeting_data:
+                    errors.append(f"{job_id}: meeting not found")
+                    continue
+                timestamp = meeting_data.get("timestamp")
+
+                if "json" in formats:
+                    data = json.dumps(meeting_data, indent=2).encode("utf-8")
+                    archive.writestr(_zip_info(f"meeting_{job_id}_data.json", timestamp, zipfile.ZIP_DEFLATED), data)
+                    yield sink.drain()
+                if "txt" in formats:
+                    data = format_text_report(job_id, meeting_data).encode("utf-8")
+                    archive.writestr(_zip_info(f"meeting_{job_id}_report.txt", timestamp, zipfile.ZIP_DEFLATED), data)
+                    yield sink.drain()
+                if "pdf" in formats:
+                    try:
+                        source = open(pdf_filepath, "rb") if pdf_filepath else None
+                    except OSError: # Removed by the retention sweeper in the meantime
+                        source = None
+                    if source is None:
+                        errors.append(f"{job_id}: PDF report could not be generated")
+                        continue
+                    # PDFs are already compressed; store them as they are
+                    with source, archive.open(_zip_info(f"meeting_{job_id}_report.pdf", timestamp, zipfile.ZIP_STORED), "w") as member:
+                        while chunk := await asyncio.to_thread(source.read, EXPORT_CHUNK_BYTES):
+                            member.write(chunk)
+                            yield sink.drain()
+                    yield sink.drain()
+
+            if errors:
+                archive.writestr("export_errors.txt", "\n".join(errors) + "\n")
+        yield sink.drain() # Central directory
+    finally:
+        for _, task in pending:
+            task.cancel()
@@ -0,0 +1,144 @@
+# Background SQLite maintenance, run while the server is idle:
+#  - bounded FTS5 'merge' steps on the full-text indexes, so the number of index
+#    segments (which every search has to visit) does not creep up as meetings are saved
+#  - ANALYZE on first run, then PRAGMA optimize, which re-analyzes only tables whose
+#    statistics have gone stale, so the planner keeps picking the indexes
+#  - incremental vacuum, handing free pages back to the filesystem (needs
+#    auto_vacuum=INCREMENTAL, the default for databases created by storage.init_db)
+# Every step is short and runs in its own transaction, and a pass stops as soon as a job
+# starts or data is written, so maintenance never holds the write lock for long.
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from . import metrics, storage
+from ..utils.file_operations import try_lock
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+# Seconds between maintenance attempts (0 = no background maintenance)
+DB_MAINTENANCE_INTERVAL_S = float(os.getenv("DB_MAINTENANCE_INTERVAL_S", "600"))
+# Only run when no job is in flight and nothing was written for this long
+DB_MAINTENANCE_IDLE_S = float(os.getenv("DB_MAINTENANCE_IDLE_S", "60"))
+# Index pages merged per FTS 'merge' step, and steps per index per pass
+FTS_MERGE_PAGES = int(os.getenv("FTS_MERGE_PAGES", "256"))
+FTS_MERGE_MAX_STEPS = int(os.getenv("FTS_MERGE_MAX_STEPS", "50"))
+# Free pages released per pass (0 = no incremental vacuum)
+DB_VACUUM_PAGES = int(os.getenv("DB_VACUUM_PAGES", "2000"))
+# Rewrite a database created before auto_vacuum=INCREMENTAL with one full VACUUM (at an
+# idle time). Takes about as long as copying the file and blocks writers meanwhile.
+DB_CONVERT_AUTO_VACUUM = os.getenv("DB_CONVERT_AUTO_VACUUM", "false").lower() in ("1", "true", "yes")
+
+FTS_TABLES = ("meetings_fts", *(f"{table}_fts" for table in storage.ITEM_TABLES.values()))
+LOCK_PATH = os.path.join(storage.DATABASE_DIR, "maintenance.lock")
+AUTO_VACUUM_INCREMENTAL = 2 # PRAGMA auto_vacuum value
+
+
+def is_idle() -> bool:
+    return metrics.JOBS_IN_FLIGHT.get() <= 0 and storage.seconds_since_change() >= DB_MAINTENANCE_IDLE_S
+
+
+def _merge_step(table: str, first: bool) -> bool:
+    """
+    Runs one bounded merge on an FTS5 index; False once there is nothing left to merge.
+    The first step of a pass uses a negative page count, which makes FTS5 merge segments
+    across all levels into one (automerge alone only merges within a level).
+    """
+    conn = storage.get_db_connection()
+    try:
+        before = conn.total_changes
+        pages = -FTS_MERGE_PAGES if first else FTS_MERGE_PAGES
+        conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (pages,))
+        conn.commit()
+        return conn.total_changes - before >= 2 # Per the FTS5 docs, a smaller delta means the merge was a no-op
+    finally:
+        conn.close()
+
+
+def _analyze():
+    conn = storage.get_db_connection()
+    try:
+        analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+        conn.execute("PRAGMA optimize" if analyzed else "ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _vacuum() -> int:
+    """Releases up to DB_VACUUM_PAGES free pages; returns how many were released."""
+    conn = storage.get_db_connection()
+    try:
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if mode != AUTO_VACUUM_INCREMENTAL:
+            if not DB_CONVERT_AUTO_VACUUM:
+                return 0
+            logger.info("Converting the database to auto_vacuum=INCREMENTAL (full VACUUM)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return 0
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion; execute() would free a single page
+        conn.executescript(f"PRAGMA incremental_vacuum({DB_VACUUM_PAGES})")
+        return free - conn.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+
+async def run_once(force: bool = False) -> Dict[str, int]:
+    """
+    One maintenance pass. Between steps it checks that the server is still idle and
+    stops otherwise (unless `force`). Returns counts of what was done.
+    """
+    stats = {"merge_steps": 0, "analyzed": 0, "pages_vacuumed": 0, "interrupted": 0}
+
+    def busy() -> bool:
+        if not force and not is_idle():
+            stats["interrupted"] = 1
+        return bool(stats["interrupted"])
+
+    for table in FTS_TABLES:
+        for step in range(FTS_MERGE_MAX_STEPS):
+            if busy():
+                return stats
+            if not await asyncio.to_thread(_merge_step, table, step == 0):
+                break
+            stats["merge_steps"] += 1
+    if busy():
+        return stats
+    await asyncio.to_thread(_analyze)
+    stats["analyzed"] = 1
+    if DB_VACUUM_PAGES > 0 and not busy():
+        stats["pages_vacuumed"] = await asyncio.to_thread(_vacuum)
+    return stats
+
+
+async def run_maintenance():
+    """Runs `run_once` every DB_MAINTENANCE_INTERVAL_S while idle, until cancelled."""
+    while True:
+        await asyncio.sleep(DB_MAINTENANCE_INTERVAL_S)
+        if not is_idle():
+            continue
+        lock = try_lock(LOCK_PATH) # Only one worker process maintains the database
+        if lock is None:
+            continue
+        try:
+            started = time.perf_counter()
+            stats = await run_once()
+            logger.info("Database maintenance finished in %.2fs: %s", time.perf_counter() - started, stats)
+        except Exception as e:
+            logger.exception("Database maintenance failed: %s", e)
+        finally:
+            lock.close()
+
+
+def start_maintenance() -> Optional[asyncio.Task]:
+    """Starts background maintenance on the running loop (None when disabled)."""
+    if DB_MAINTENANCE_INTERVAL_S <= 0:
+        return None
+    logger.info("Database maintenance every %gs when idle for %gs", DB_MAINTENANCE_INTERVAL_S, DB_MAINTENANCE_IDLE_S)
+    return asyncio.create_task(run_maintenance())
@@ -0,0 +1,254 @@
+# In-process metrics registry with Prometheus text exposition
+# Counters, gauges and histograms for the processing pipeline, storage and HTTP routes.
+# Kept dependency-free; each observation is a dict lookup and a bisect under a lock.
+
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Default latency buckets in seconds (1 ms .. 10 min)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, optionally split by labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def set_function(self, function: Callable[[], float]):
+        """Reads the (unlabelled) value from `function` whenever metrics are rendered."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, with sum and count."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator recording the duration of an async function in `histogram`."""
+    def decorator(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+
+# --- Registry ---
+_registry: Dict[str, _Metric] = {}
+
+
+def _register(metric: _Metric) -> _Metric:
+    _registry.setdefault(metric.name, metric)
+    return _registry[metric.name]
+
+
+def render() -> str:
+    """Renders every registered metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in list(_registry.values())) + "\n"
+
+
+# --- Pipeline metrics ---
+HTTP_REQUESTS = _register(Counter("http_requests_total", "HTTP requests by method, route and status."))
+HTTP_LATENCY = _register(Histogram("http_request_duration_seconds", "HTTP request latency by method and route."))
+
+JOBS_IN_FLIGHT = _register(Gauge("pipeline_jobs_in_flight", "Audio processing jobs currently running."))
+JOBS_TOTAL = _register(Counter("pipeline_jobs_total", "Finished audio processing jobs by outcome."))
+STAGE_SECONDS = _register(Histogram("pipeline_stage_seconds", "Wall time per pipeline stage (asr, diarization, llm_chunk, merge, total)."))
+
+ASR_QUEUE_DEPTH = _register(Gauge("asr_queue_depth", "Whisper windows waiting for the batch scheduler."))
+ASR_BATCH_SIZE = _register(Histogram("asr_batch_size", "Windows decoded per Whisper batch.", buckets=(1, 2, 4, 8, 16, 32, 64)))
+ASR_BATCH_SECONDS = _register(Histogram("asr_batch_decode_seconds", "Wall time to decode one Whisper batch."))
+ASR_REAL_TIME_FACTOR = _register(Histogram(
+    "asr_real_time_factor", "Transcription wall time divided by audio duration, per job.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+))
+
+LLM_SECONDS = _register(Histogram("llm_request_seconds", "LLM chain call latency by chain."))
+LLM_FIRST_TOKEN_SECONDS = _register(Histogram("llm_time_to_first_token_seconds", "Time from a streamed LLM call to its first token, by chain."))
+LLM_ERRORS = _register(Counter("llm_errors_total", "Failed LLM chain calls by chain."))
+LLM_RETRIES = _register(Counter("llm_retries_total", "LLM attempts retried after a failure, by chain."))
+LLM_HEDGES = _register(Counter("llm_hedged_requests_total", "Duplicate (hedged) LLM requests sent, by chain."))
+LLM_IN_FLIGHT = _register(Gauge("llm_requests_in_flight", "LLM HTTP requests currently running."))
+LLM_CIRCUIT_OPEN = _register(Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open."))
+
+STORAGE_SECONDS = _register(Histogram("storage_call_seconds", "SQLite storage call latency by operation."))
+PDF_RENDER_SECONDS = _register(Histogram("pdf_render_seconds", "PDF report render time."))
+
+STREAM_DELAY_SECONDS = _register(Histogram("stream_speech_to_text_delay_seconds", "Live streaming delay between audio arrival and committed text."))
+
+
+# --- HTTP middleware ---
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count and latency per route template
+    (e.g. /meetings/pdf/{job_id}), so raw IDs never become label values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=path)
+            HTTP_REQUESTS.inc(method=method, route=path, status=status[0])
@@ -3,38 +3,35 @@
 
 import os
 import asyncio
-from fpdf import FPDF # Requires: pip install fpdf2
+import datetime
 from . import storage # Import storage to fetch data
+from . import metrics
+from .pdf_report import write_report
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
 from typing import Optional
 
 PDF_OUTPUT_DIR = "generated_pdfs"
 os.makedirs(PDF_OUTPUT_DIR, exist_ok=True)
 
-class PDFReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, 'Meeting Report', 0, 1, 'C')
-        self.ln(10)
-
-    def chapter_title(self, title):
-        self.set_font('Arial', 'B', 12)
-        self.cell(0, 10, title, 0, 1, 'L')
-        self.ln(4)
+def report_path(job_id: str, include_transcript: bool = True) -> str:
+    suffix = "" if include_transcript else "_no_transcript"
+    return os.path.join(PDF_OUTPUT_DIR, f"meeting_{job_id}_report{suffix}.pdf")
 
-    def chapter_body(self, body):
-        self.set_font('Arial', '', 10)
-        # Use multi_cell for potentially long text that needs wrapping
-        self.multi_cell(0, 5, body)
-        self.ln()
-
-    def list_items(self, items: list, title: str):
-        if items:
-            self.chapter_title(title)
-            self.set_font('Arial', '', 10)
-            for item in items:
-                # Use multi_cell for potentially long list items
-                self.multi_cell(0, 5, f"- {item}")
-            self.ln()
+def cached_report(job_id: str, meeting_data: dict, include_transcript: bool = True) -> Optional[str]:
+    """
+    Returns the path of an already-rendered report if it is newer than the meeting's
+    last full save (meetings.timestamp), else None. The retention sweeper removes old
+    PDFs, so this is only a cache.
+    """
+    pdf_filepath = report_path(job_id, include_transcript)
+    try:
+        rendered_at = os.path.getmtime(pdf_filepath)
+        saved_at = datetime.datetime.fromisoformat(str(meeting_data.get("timestamp"))).timestamp()
+    except (OSError, ValueError):
+        return None
+    return pdf_filepath if rendered_at >= saved_at else None
 
 async def create_report(job_id: str, include_transcript: bool = True) -> Optional[str]:
     """
@@ -47,55 +44,27 @@ async def create_report(job_id: str, include_transcript: bool = True) -> Optiona
     Returns:
         The path to the generated PDF file, or None if generation failed.
     """
-    print(f"Starting PDF report generation for job ID: {job_id}")
+    logger.info("Starting PDF report generation for job ID: %s", job_id)
 
     # 1. Fetch meeting data using storage service
     meeting_data = await storage.get_meeting_data(job_id)
     if not meeting_data:
-        print(f"Error: Meeting data not found for job ID {job_id}")
+        logger.error("Meeting data not found for job ID %s", job_id)
         return None
 
-    summary = meeting_data.get("summary", "No summary available.")
-    action_items = meeting_data.get("action_items", [])
-    decisions = meeting_data.get("decisions", [])
-    transcript = meeting_data.get("transcript", "No transcript available.")
-    filename = meeting_data.get("filename", job_id) # Use original filename or job_id
-
-    pdf_filename = f"meeting_{job_id}_report.pdf"
-    pdf_filepath = os.path.join(PDF_OUTPUT_DIR, pdf_filename)
+    cached = cached_report(job_id, meeting_data, include_transcript)
+    if cached:
+        logger.info("Reusing up-to-date PDF report: %s", cached)
+        return cached
+    pdf_filepath = report_path(job_id, include_transcript)
 
     try:
-        pdf = PDFReport()
-        pdf.add_page()
-
-        # Add basic info
-        pdf.set_font('Arial', '', 10)
-        pdf.cell(0, 5, f"Job ID: {job_id}", 0, 1)
-        pdf.cell(0, 5, f"Original File: {filename}", 0, 1)
-        pdf.ln(5)
-
-        # Summary Section
-        pdf.chapter_title("Summary")
-        pdf.chapter_body(summary)
-
-        # Action Items Section
-        pdf.list_items(action_items, "Action Items")
-
-        # Decisions Section
-        pdf.list_items(decisions, "Decisions Made")
-
-        # Transcript Section (Optional)
-        if include_transcript:
-            pdf.chapter_title("Full Transcript")
-            pdf.chapter_body(transcript)
-
-        # Save the PDF
-        pdf.output(pdf_filepath, "F")
+        with metrics.PDF_RENDER_SECONDS.time():
+            await asyncio.to_thread(write_report, job_id, meeting_data, pdf_filepath, include_transcript)
 
-        print(f"PDF report successfully generated: {pdf_filepath}")
+        logger.info("PDF report successfully generated: %s", pdf_filepath)
         return pdf_filepath
 
     except Exception as e:
-        print(f"Error generating PDF report for job {job_id}: {e}")
-        # Consider logging the full traceback in a real application
+        logger.exception("Error generating PDF report for job %s: %s", job_id, e)
         return None
@@ -0,0 +1,88 @@
+# PDF rendering with fpdf2, kept apart from pdf_generator so it can run in worker
+# processes without importing storage (which opens and migrates the database).
+
+import os
+from fpdf import FPDF # Requires: pip install fpdf2
+
+class PDFReport(FPDF):
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, 'Meeting Report', 0, 1, 'C')
+        self.ln(10)
+
+    def chapter_title(self, title):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, title, 0, 1, 'L')
+        self.ln(4)
+
+    def chapter_body(self, body):
+        self.set_font('Arial', '', 10)
+        # Use multi_cell for potentially long text that needs wrapping
+        self.multi_cell(0, 5, body)
+        self.ln()
+
+    def list_items(self, items: list, title: str):
+        if items:
+            self.chapter_title(title)
+            self.set_font('Arial', '', 10)
+            for item in items:
+                # Use multi_cell for potentially long list items
+                self.multi_cell(0, 5, f"- {item}")
+            self.ln()
+
+def render_report(job_id: str, meeting_data: dict, pdf_filepath: str, include_transcript: bool = True):
+    """
+    Renders meeting data to a PDF file at `pdf_filepath` (blocking).
+
+    Args:
+        job_id: The ID of the meeting/job.
+        meeting_data: The meeting record as returned by storage.get_meeting_data.
+        pdf_filepath: Where to write the PDF.
+        include_transcript: Whether to include the full transcript in the PDF.
+    """
+    summary = meeting_data.get("summary", "No summary available.")
+    action_items = meeting_data.get("action_items", [])
+    decisions = meeting_data.get("decisions", [])
+    transcript = meeting_data.get("transcript", "No transcript available.")
+    filename = meeting_data.get("filename", job_id) # Use original filename or job_id
+
+    pdf = PDFReport()
+    pdf.add_page()
+
+    # Add basic info
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(0, 5, f"Job ID: {job_id}", 0, 1)
+    pdf.cell(0, 5, f"Original File: {filename}", 0, 1)
+    pdf.ln(5)
+
+    # Summary Section
+    pdf.chapter_title("Summary")
+    pdf.chapter_body(summary)
+
+    # Action Items Section
+    pdf.list_items(action_items, "Action Items")
+
+    # Decisions Section
+    pdf.list_items(decisions, "Decisions Made")
+
+    # Transcript Section (Optional)
+    if include_transcript:
+        pdf.chapter_title("Full Transcript")
+        pdf.chapter_body(transcript)
+
+    # Save the PDF
+    pdf.output(pdf_filepath, "F")
+
+def write_report(job_id: str, meeting_data: dict, pdf_filepath: str, include_transcript: bool = True):
+    """
+    Like render_report, but renders to a temporary file and moves it into place, so
+    concurrent requests for the same report never see a half-written PDF.
+    Module-level (picklable) so it can also run in a worker process.
+    """
+    tmp_path = f"{pdf_filepath}.{os.getpid()}.{id(meeting_data)}.tmp"
+    try:
+        render_report(job_id, meeting_data, tmp_path, include_transcript=include_transcript)
+        os.replace(tmp_path, pdf_filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
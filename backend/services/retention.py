@@ -0,0 +1,307 @@
+# Upload retention: optional Opus transcoding and an age / disk-budget policy
+# Requires ffmpeg on PATH for transcoding (the same binary Whisper uses to decode audio).
+#
+# After a job finishes its audio can be transcoded to low-bitrate Opus (AUDIO_TRANSCODE),
+# which is still readable by Whisper for reprocessing. A periodic sweeper then deletes
+# or archives audio older than RETENTION_MAX_AGE_DAYS, and the oldest audio beyond
+# RETENTION_MAX_TOTAL_MB, and removes stale generated PDFs and abandoned resumable
+# uploads. All file I/O goes through one rate limiter so sweeps do not compete with
+# foreground requests for the disk. ffmpeg reads and writes on its own, so a transcode
+# is charged to the limiter up front: its *average* rate is bounded, but it runs at
+# disk speed while it lasts (in the idle I/O class where `ionice` is available).
+
+import asyncio
+import datetime
+import errno
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from . import storage
+from ..utils.file_operations import try_lock
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+# --- Configuration ---
+UPLOAD_DIRECTORY = "uploads" # Should match routers/upload.py
+PDF_OUTPUT_DIR = "generated_pdfs" # Should match pdf_generator.py
+# 'opus' transcodes each finished upload (and untranscoded older ones); 'none' keeps originals
+AUDIO_TRANSCODE = os.getenv("AUDIO_TRANSCODE", "none").lower()
+AUDIO_OPUS_BITRATE = os.getenv("AUDIO_OPUS_BITRATE", "24k") # Plenty for mono speech
+# Audio of meetings older than this is deleted or archived (0 = keep forever)
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+# Oldest audio beyond this total size is deleted or archived (0 = no budget)
+RETENTION_MAX_TOTAL_MB = float(os.getenv("RETENTION_MAX_TOTAL_MB", "0"))
+# 'delete' or 'archive' (move to RETENTION_ARCHIVE_DIR, e.g. a cheaper mounted volume)
+RETENTION_ACTION = os.getenv("RETENTION_ACTION", "delete").lower()
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", "archive")
+# Generated PDFs older than this are removed; they are re-rendered on request (0 = keep)
+PDF_RETENTION_DAYS = float(os.getenv("PDF_RETENTION_DAYS", "0"))
+# Resumable upload sessions untouched for this long are removed with their partial file
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+# Seconds between sweeps (0 = no background sweeper)
+RETENTION_SWEEP_INTERVAL_S = float(os.getenv("RETENTION_SWEEP_INTERVAL_S", "3600"))
+# Disk bandwidth the sweeper and transcoder may use (bytes read + written; averaged
+# over each transcode, since ffmpeg does its own I/O)
+RETENTION_IO_MB_PER_S = float(os.getenv("RETENTION_IO_MB_PER_S", "20"))
+
+LOCK_PATH = os.path.join(storage.DATABASE_DIR, "retention.lock")
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class RateLimiter:
+    """Token bucket over bytes; `consume` sleeps as needed to stay under `bytes_per_s`."""
+
+    def __init__(self, bytes_per_s: float):
+        self.bytes_per_s = bytes_per_s
+        self._available = bytes_per_s
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: int):
+        if self.bytes_per_s <= 0:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            self._available = min(self.bytes_per_s, self._available + (now - self._updated) * self.bytes_per_s)
+            self._updated = now
+            self._available -= amount
+            if self._available < 0:
+                await asyncio.sleep(-self._available / self.bytes_per_s)
+
+
+_limiter = RateLimiter(RETENTION_IO_MB_PER_S * 1024 * 1024)
+_transcode_lock = asyncio.Semaphore(1) # One ffmpeg at a time
+_ffmpeg_missing = False # Set on the first failed launch, so sweeps stop retrying
+# Linux: run ffmpeg in the idle I/O class, so its bursts yield to foreground requests
+IONICE = shutil.which("ionice")
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+async def transcode_to_opus(job_id: str, path: str) -> Optional[str]:
+    """
+    Transcodes `path` to mono Opus next to it and removes the original.
+    Returns the new path, or None (original kept) if ffmpeg is missing or fails.
+    """
+    global _ffmpeg_missing
+    if _ffmpeg_missing:
+        return None
+    target = os.path.splitext(path)[0] + ".opus"
+    command = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-threads", "1",
+        "-i", path, "-vn", "-ac", "1", "-c:a", "libopus", "-b:a", AUDIO_OPUS_BITRATE, "-application", "voip",
+        target,
+    ]
+    async with _transcode_lock:
+        # Pre-charge the input: ffmpeg then reads it unthrottled, but the next transcode
+        # or sweep step waits until the average is back under RETENTION_IO_MB_PER_S
+        await _limiter.consume(_size(path))
+        try:
+            if IONICE:
+                if shutil.which("ffmpeg") is None:
+                    raise FileNotFoundError("ffmpeg") # ionice would only report it as a failed run
+                command = [IONICE, "-c", "3"] + command
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await process.communicate()
+        except FileNotFoundError:
+            logger.error("Cannot transcode %s: ffmpeg not found on PATH. Transcoding disabled.", path)
+            _ffmpeg_missing = True
+            return None
+        if process.returncode != 0 or _size(target) == 0:
+            logger.error("ffmpeg failed to transcode %s: %s", path, stderr.decode(errors="replace").strip()[-500:])
+            await asyncio.to_thread(lambda: os.path.exists(target) and os.remove(target))
+            return None
+        await _limiter.consume(_size(target))
+
+    saved = _size(path) - _size(target)
+    await storage.set_audio_location(job_id, target, "transcoded")
+    await asyncio.to_thread(os.remove, path)
+    logger.info("Transcoded %s to Opus (saved %.1f MB).", os.path.basename(path), saved / 1e6)
+    return target
+
+
+async def finalize_audio(job_id: str, path: str):
+    """Called when a job finishes: records where its audio lives and transcodes it if enabled."""
+    await storage.set_audio_location(job_id, path, "original")
+    if AUDIO_TRANSCODE == "opus" and not path.endswith(".opus"):
+        await transcode_to_opus(job_id, path)
+
+
+async def _archive(path: str) -> str:
+    """Moves `path` into RETENTION_ARCHIVE_DIR; a rate-limited copy when it is on another filesystem."""
+    os.makedirs(RETENTION_ARCHIVE_DIR, exist_ok=True)
+    destination = os.path.join(RETENTION_ARCHIVE_DIR, os.path.basename(path))
+    try:
+        await asyncio.to_thread(os.rename, path, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # Copy in chunks under the I/O budget, then drop the original
+        partial = destination + ".partial"
+        with open(path, "rb") as src, open(partial, "wb") as dst:
+            while True:
+                chunk = await asyncio.to_thread(src.read, COPY_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await _limiter.consume(2 * len(chunk))
+                await asyncio.to_thread(dst.write, chunk)
+        await asyncio.to_thread(os.replace, partial, destination)
+        await asyncio.to_thread(os.remove, path)
+    return destination
+
+
+async def _expire(entry: Dict[str, Any], reason: str) -> bool:
+    """Deletes or archives one meeting's audio according to RETENTION_ACTION."""
+    path = entry["audio_path"]
+    try:
+        if RETENTION_ACTION == "archive":
+            destination = await _archive(path)
+            await storage.set_audio_location(entry["job_id"], destination, "archived")
+            logger.info("Archived %s (%s).", os.path.basename(path), reason)
+        else:
+            await _limiter.consume(COPY_CHUNK_BYTES) # Deletes are cheap but not free (metadata, journal)
+            await asyncio.to_thread(os.remove, path)
+            await storage.set_audio_location(entry["job_id"], None, "deleted")
+            logger.info("Deleted %s (%s).", os.path.basename(path), reason)
+        return True
+    except OSError as e:
+        logger.error("Could not expire %s: %s", path, e)
+        return False
+
+
+def _meeting_time(entry: Dict[str, Any]) -> datetime.datetime:
+    try:
+        return datetime.datetime.fromisoformat(str(entry["timestamp"]))
+    except ValueError:
+        return datetime.datetime.now()
+
+
+async def _resolve_audio(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keeps finished meetings whose audio exists, filling in paths for meetings saved before tracking."""
+    stored = []
+    for entry in entries:
+        if entry["stage"] not in (None, "done", "failed"):
+            continue # Still being processed
+        if not entry["audio_path"]:
+            legacy = os.path.join(UPLOAD_DIRECTORY, entry["filename"] or "")
+            if not entry["filename"] or not os.path.isfile(legacy):
+                continue
+            entry["audio_path"], entry["audio_status"] = legacy, "original"
+            await storage.set_audio_location(entry["job_id"], legacy, "original")
+        if entry["audio_status"] in ("archived", "external") or not os.path.isfile(entry["audio_path"]):
+            continue # Archived audio is out of the uploads budget; external (bulk-ingested) files are not ours
+        entry["bytes"] = _size(entry["audio_path"])
+        stored.append(entry)
+    return stored
+
+
+async def _sweep_pdfs() -> int:
+    if PDF_RETENTION_DAYS <= 0 or not os.path.isdir(PDF_OUTPUT_DIR):
+        return 0
+    cutoff = time.time() - PDF_RETENTION_DAYS * 86400
+    removed = 0
+    for entry in await asyncio.to_thread(lambda: list(os.scandir(PDF_OUTPUT_DIR))):
+        if entry.is_file() and entry.name.endswith(".pdf") and entry.stat().st_mtime < cutoff:
+            await _limiter.consume(COPY_CHUNK_BYTES)
+            await asyncio.to_thread(os.remove, entry.path)
+            removed += 1
+    return removed
+
+
+async def _sweep_upload_sessions() -> int:
+    if UPLOAD_SESSION_TTL_HOURS <= 0:
+        return 0
+    cutoff = datetime.datetime.now() - datetime.timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+    removed = 0
+    for session in await storage.list_stale_upload_sessions(cutoff):
+        if not session["finalized_at"]: # A finalized file belongs to its job now; only the row goes
+            try:
+                await asyncio.to_thread(os.remove, session["file_path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error("Could not remove abandoned upload %s: %s", session["file_path"], e)
+                continue
+            removed += 1
+            logger.info("Removed upload session %s, idle since %s", session["job_id"], session["updated_at"])
+        await storage.delete_upload_session(session["job_id"])
+    return removed
+
+
+async def sweep() -> Dict[str, int]:
+    """
+    Runs one retention pass: transcode leftovers, expire by age, then by total size
+    (oldest first), then prune old PDFs and abandoned upload sessions. Returns counts
+    of what was done.
+    """
+    stats = {"transcoded": 0, "expired_age": 0, "expired_budget": 0, "pdfs_removed": 0, "uploads_abandoned": 0}
+    stored = await _resolve_audio(await storage.list_stored_audio())
+
+    if AUDIO_TRANSCODE == "opus":
+        for entry in stored:
+            if entry["audio_status"] == "original" and not entry["audio_path"].endswith(".opus"):
+                target = await transcode_to_opus(entry["job_id"], entry["audio_path"])
+                if target:
+                    entry["audio_path"], entry["audio_status"], entry["bytes"] = target, "transcoded", _size(target)
+                    stats["transcoded"] += 1
+
+    remaining = []
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=RETENTION_MAX_AGE_DAYS)
+    for entry in stored:
+        if RETENTION_MAX_AGE_DAYS > 0 and _meeting_time(entry) < cutoff:
+            if await _expire(entry, f"older than {RETENTION_MAX_AGE_DAYS:g} days"):
+                stats["expired_age"] += 1
+        else:
+            remaining.append(entry)
+
+    if RETENTION_MAX_TOTAL_MB > 0:
+        budget = RETENTION_MAX_TOTAL_MB * 1024 * 1024
+        total = sum(entry["bytes"] for entry in remaining)
+        for entry in remaining: # Oldest first
+            if total <= budget:
+                break
+            if await _expire(entry, f"uploads over {RETENTION_MAX_TOTAL_MB:g} MB budget"):
+                total -= entry["bytes"]
+                stats["expired_budget"] += 1
+
+    stats["pdfs_removed"] = await _sweep_pdfs()
+    stats["uploads_abandoned"] = await _sweep_upload_sessions()
+    return stats
+
+
+async def run_sweeper():
+    """Runs `sweep` every RETENTION_SWEEP_INTERVAL_S until cancelled."""
+    while True:
+        await asyncio.sleep(RETENTION_SWEEP_INTERVAL_S)
+        lock = try_lock(LOCK_PATH) # Only one worker process sweeps at a time
+        if lock is None:
+            continue # Another worker is sweeping
+        try:
+            started = time.perf_counter()
+            stats = await sweep()
+            logger.info("Retention sweep finished in %.1fs: %s", time.perf_counter() - started, stats)
+        except Exception as e:
+            logger.exception("Retention sweep failed: %s", e)
+        finally:
+            lock.close()
+
+
+def start_sweeper() -> Optional[asyncio.Task]:
+    """Starts the background sweeper on the running loop (None when disabled)."""
+    if RETENTION_SWEEP_INTERVAL_S <= 0:
+        return None
+    logger.info(
+        "Retention sweeper every %gs: transcode=%s, max age=%g days, budget=%g MB, action=%s",
+        RETENTION_SWEEP_INTERVAL_S, AUDIO_TRANSCODE, RETENTION_MAX_AGE_DAYS, RETENTION_MAX_TOTAL_MB, RETENTION_ACTION,
+    )
+    return asyncio.create_task(run_sweeper())
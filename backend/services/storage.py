@@ -1,15 +1,39 @@
 # SQLite database interaction logic using sqlite3
 # Handles saving, retrieving, and searching meeting transcripts and metadata.
 
+import asyncio
 import sqlite3
 import json
 import datetime
 import os
+import time
+import uuid
+import zlib
 from typing import Dict, Any, List, Optional
+from . import metrics
+from ..utils import log
+from ..utils.item_parsing import parse_action_item
+
+logger = log.get_logger(__name__)
 
 DATABASE_DIR = "db_data"
-DATABASE_PATH = os.path.join(DATABASE_DIR, "fluent_notes.db")
-os.makedirs(DATABASE_DIR, exist_ok=True)
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(DATABASE_DIR, "fluent_notes.db"))
+os.makedirs(os.path.dirname(DATABASE_PATH) or ".", exist_ok=True)
+# Store each job's per-stage timing breakdown (JSON) with its meeting record
+STORE_JOB_TIMINGS = os.getenv("STORE_JOB_TIMINGS", "true").lower() in ("1", "true", "yes")
+
+# Storage format for meetings.transcript and meetings.segments: 'none', 'zlib' or 'zstd'
+# (zstd needs the 'zstandard' package). Rows written under any setting stay readable.
+TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "none").lower()
+TRANSCRIPT_COMPRESSION_LEVEL = int(os.getenv("TRANSCRIPT_COMPRESSION_LEVEL", "6"))
+# Keep each meeting's timestamped ASR segments in meetings.segments. They repeat the
+# transcript text, so by default only when transcripts are compressed. Speaker turns
+# (meetings.speakers) are stored either way.
+STORE_SEGMENTS = os.getenv("STORE_SEGMENTS", "false" if TRANSCRIPT_COMPRESSION == "none" else "true").lower() in ("1", "true", "yes")
+
+# Compressed values are BLOBs starting with one of these; plain text is stored as TEXT
+_ZLIB_MAGIC = b"FNZ1"
+_ZSTD_MAGIC = b"FNS1"
 
 def get_db_connection():
     """Establishes a connection to the SQLite database."""
@@ -17,11 +41,117 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row # Return rows as dictionary-like objects
     return conn
 
+def _add_missing_columns(cursor: sqlite3.Cursor, table: str, columns: Dict[str, str]):
+    """Adds any of `columns` (name -> SQL type) that `table` does not have yet."""
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd transcript compression requested, but 'zstandard' is not installed. Run: pip install zstandard")
+    return zstandard
+
+def _encode_text(text: Optional[str]) -> Any:
+    """Returns `text` in the TRANSCRIPT_COMPRESSION storage format (str or magic-prefixed bytes)."""
+    if not text or TRANSCRIPT_COMPRESSION == "none":
+        return text
+    data = text.encode("utf-8")
+    if TRANSCRIPT_COMPRESSION == "zstd":
+        return _ZSTD_MAGIC + _zstd().ZstdCompressor(level=TRANSCRIPT_COMPRESSION_LEVEL).compress(data)
+    if TRANSCRIPT_COMPRESSION == "zlib":
+        return _ZLIB_MAGIC + zlib.compress(data, TRANSCRIPT_COMPRESSION_LEVEL)
+    raise ValueError(f"Unsupported TRANSCRIPT_COMPRESSION: {TRANSCRIPT_COMPRESSION}")
+
+def _decode_text(value: Any) -> Optional[str]:
+    """Inverse of _encode_text; plain TEXT values are returned unchanged."""
+    if not isinstance(value, bytes):
+        return value
+    if value.startswith(_ZSTD_MAGIC):
+        return _zstd().ZstdDecompressor().decompress(value[len(_ZSTD_MAGIC):]).decode("utf-8")
+    if value.startswith(_ZLIB_MAGIC):
+        return zlib.decompress(value[len(_ZLIB_MAGIC):]).decode("utf-8")
+    return value.decode("utf-8")
+
+def _index_transcript(cursor: sqlite3.Cursor, rowid: int, old: Optional[str], new: Optional[str]):
+    """
+    Replaces a meeting's entry in the contentless meetings_fts index. A contentless
+    FTS5 table can only remove a row given the exact text it was indexed with, so
+    callers pass the previous (decoded) transcript. No-op when the text is unchanged.
+    """
+    if old == new:
+        return
+    if old:
+        cursor.execute("INSERT INTO meetings_fts (meetings_fts, rowid, transcript) VALUES ('delete', ?, ?)", (rowid, old))
+    if new:
+        cursor.execute("INSERT INTO meetings_fts (rowid, transcript) VALUES (?, ?)", (rowid, new))
+
+def _upsert_meeting(cursor: sqlite3.Cursor, job_id: str, filename: str, values: Dict[str, Any], updates: str):
+    """
+    Inserts or updates one meetings row from already-encoded column `values`, with the
+    given ON CONFLICT SET clause, and keeps meetings_fts in step when the transcript
+    is among the written columns. Runs inside the caller's transaction.
+    """
+    previous = None
+    if "transcript" in values:
+        previous = cursor.execute("SELECT rowid, transcript FROM meetings WHERE job_id = ?", (job_id,)).fetchone()
+    columns = list(values)
+    cursor.execute(f"""
+        INSERT INTO meetings (job_id, filename, {", ".join(columns)})
+        VALUES (?, ?, {", ".join("?" for _ in columns)})
+        ON CONFLICT(job_id) DO UPDATE SET {updates}
+    """, (job_id, filename, *values.values()))
+    if "transcript" in values:
+        rowid = previous["rowid"] if previous else cursor.execute("SELECT rowid FROM meetings WHERE job_id = ?", (job_id,)).fetchone()[0]
+        old = _decode_text(previous["transcript"]) if previous else None
+        _index_transcript(cursor, rowid, old, _decode_text(values["transcript"]))
+
+# Normalized copies of meetings.action_items / meetings.decisions, one row per item
+ITEM_TABLES = {"action_items": "meeting_action_items", "decisions": "meeting_decisions"}
+
+def _replace_items(cursor: sqlite3.Cursor, job_id: str, kind: str, items: List[str], reference: datetime.date):
+    """
+    Rewrites the normalized rows for one meeting's action items or decisions. Action
+    items also get an assignee and due date parsed from their text (relative dates are
+    resolved against `reference`, the meeting date). Only positions whose row changed
+    are deleted and re-inserted, so the repeated partial saves of a job leave the item
+    FTS indexes alone. Runs inside the caller's transaction.
+    """
+    table = ITEM_TABLES[kind]
+    rows = {}
+    for position, text in enumerate(items):
+        if not isinstance(text, str) or text.startswith("Error:"): # Failed LLM calls are not items
+            continue
+        assignee, due_date = parse_action_item(text, reference) if kind == "action_items" else (None, None)
+        rows[position] = (text, assignee, due_date)
+    existing = {
+        row[0]: tuple(row[1:])
+        for row in cursor.execute(f"SELECT position, text, assignee, due_date FROM {table} WHERE job_id = ?", (job_id,))
+    }
+    stale = [(job_id, position) for position, row in existing.items() if rows.get(position) != row]
+    added = [(job_id, position, *row) for position, row in rows.items() if existing.get(position) != row]
+    cursor.executemany(f"DELETE FROM {table} WHERE job_id = ? AND position = ?", stale)
+    cursor.executemany(f"INSERT INTO {table} (job_id, position, text, assignee, due_date) VALUES (?, ?, ?, ?, ?)", added)
+
+def _meeting_date(timestamp: Any) -> datetime.date:
+    try:
+        return datetime.datetime.fromisoformat(str(timestamp)).date()
+    except ValueError:
+        return datetime.date.today()
+
 def init_db():
     """Initializes the database schema and FTS table if they don't exist."""
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    # Let services/maintenance.py return free pages with incremental vacuum. Only takes
+    # effect while the database is still empty; existing files need a full VACUUM
+    # (DB_CONVERT_AUTO_VACUUM) to switch.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
     # Create main table for meeting data
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS meetings (
@@ -35,43 +165,240 @@ def init_db():
         )
     """)
 
-    # Create FTS5 table for full-text search on transcripts
-    # Note: FTS table content is automatically synchronized with the meetings table
+    # Columns added after the original schema; existing databases are migrated in place
+    _add_missing_columns(cursor, "meetings", {
+        "timings": "TEXT", # JSON per-stage timing breakdown
+        "segments": "BLOB", # JSON list of timestamped ASR segments (compressed like the transcript)
+        "speakers": "TEXT", # JSON list of speaker turns over the transcript lines (see _speaker_turns)
+        "audio_path": "TEXT", # Where the audio currently lives (NULL once deleted)
+        "audio_status": "TEXT", # original, transcoded, archived, deleted or external (see services/retention.py)
+        "content_hash": "TEXT", # SHA-256 of the source audio (bulk ingest dedupe, resumable uploads)
+    })
+    cursor.execute("CREATE INDEX IF NOT EXISTS meetings_content_hash ON meetings (content_hash)")
+
+    # Full-text index over transcripts. Contentless (content=''), so it works whatever
+    # the storage format of meetings.transcript; rows are linked by meetings.rowid and
+    # kept in sync from Python (_index_transcript) rather than by triggers.
+    row = cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'meetings_fts'").fetchone()
+    if row and "content=''" not in row[0]:
+        # Migrate the original external-content table (content='meetings') and its triggers
+        logger.info("Migrating meetings_fts to a contentless index...")
+        for trigger in ("meetings_ai", "meetings_ad", "meetings_au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE meetings_fts")
+        row = None
     cursor.execute("""
         CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(
-            job_id UNINDEXED, -- Don't index job_id in FTS
             transcript,
-            content='meetings', -- Link to the main table
-            content_rowid='rowid' -- Use rowid for linking (implicit in meetings table)
-            -- Add other fields like summary if needed for search
+            content='' -- Index only; text is read from meetings
         )
     """)
+    if row is None:
+        # One batched insert streaming over the table, rather than a statement per row
+        rows = cursor.connection.execute("SELECT rowid, transcript FROM meetings")
+        cursor.executemany(
+            "INSERT INTO meetings_fts (rowid, transcript) VALUES (?, ?)",
+            ((rowid, text) for rowid, text in ((rowid, _decode_text(value)) for rowid, value in rows) if text),
+        )
+
+    # One row per action item / decision for cross-meeting queries, each with an FTS
+    # index over the item text. Rows are only ever inserted or deleted (never updated),
+    # so insert/delete triggers keep the external-content indexes in sync.
+    existing_tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table in ITEM_TABLES.values():
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL, -- Order within the meeting's list
+                text TEXT NOT NULL,
+                assignee TEXT, -- Parsed from the item text (action items only)
+                due_date TEXT, -- YYYY-MM-DD, parsed from the item text (action items only)
+                UNIQUE (job_id, position)
+            )
+        """)
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_assignee ON {table} (assignee COLLATE NOCASE)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_due_date ON {table} (due_date)")
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                text,
+                content='{table}',
+                content_rowid='id'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+        """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS meetings_timestamp ON meetings (timestamp)")
+
+    # Backfill the item tables from the JSON columns the first time they are created
+    for kind, table in ITEM_TABLES.items():
+        if table in existing_tables:
+            continue
+        rows = cursor.execute(f"SELECT job_id, {kind}, timestamp FROM meetings").fetchall()
+        for job_id, items, timestamp in rows:
+            _replace_items(cursor, job_id, kind, json.loads(items or '[]'), _meeting_date(timestamp))
+        if rows:
+            logger.info("Backfilled %s for %d meetings.", table, len(rows))
 
-    # Triggers to keep FTS table synchronized with the main table
+    # Small per-job status row, written as processing advances and polled by clients
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS meetings_ai AFTER INSERT ON meetings BEGIN
-            INSERT INTO meetings_fts (rowid, job_id, transcript) VALUES (new.rowid, new.job_id, new.transcript);
-        END;
+        CREATE TABLE IF NOT EXISTS job_status (
+            job_id TEXT PRIMARY KEY,
+            stage TEXT NOT NULL, -- queued, transcribing, summarizing, saving, done, failed
+            progress INTEGER DEFAULT 0, -- Percent complete (0-100)
+            stage_times TEXT, -- JSON object: stage -> time the stage was entered
+            error TEXT,
+            updated_at DATETIME
+        )
     """)
+
+    # Resumable uploads (routers/upload.py): one row per upload, keyed by the job ID it becomes
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS meetings_ad AFTER DELETE ON meetings BEGIN
-            DELETE FROM meetings_fts WHERE rowid=old.rowid;
-        END;
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            job_id TEXT PRIMARY KEY,
+            filename TEXT NOT NULL, -- Stored file name (<job_id><ext>)
+            original_filename TEXT,
+            file_path TEXT NOT NULL,
+            total_size INTEGER NOT NULL,
+            received INTEGER NOT NULL DEFAULT 0, -- Bytes written and verified so far (the upload offset)
+            created_at DATETIME,
+            updated_at DATETIME,
+            finalized_at DATETIME
+        )
     """)
+
+    # Jobs waiting for, or leased by, remote ASR workers (routers/workers.py)
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS meetings_au AFTER UPDATE ON meetings BEGIN
-            UPDATE meetings_fts SET transcript = new.transcript WHERE rowid=old.rowid;
-        END;
+        CREATE TABLE IF NOT EXISTS job_queue (
+            job_id TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            language TEXT,
+            state TEXT NOT NULL, -- queued, leased, summarizing (ASR result stored, leased by an API process), done, failed
+            worker_id TEXT,
+            lease_token TEXT, -- Changes on every claim, so a worker whose lease expired cannot report back
+            lease_expires_at REAL, -- Unix time
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at DATETIME,
+            updated_at DATETIME
+        )
     """)
+    _add_missing_columns(cursor, "job_queue", {
+        "segments": "BLOB", # The worker's ASR segments (JSON, compressed like transcripts) until the meeting is saved
+    })
+    cursor.execute("CREATE INDEX IF NOT EXISTS job_queue_state ON job_queue (state, created_at)")
 
     conn.commit()
     conn.close()
-    print("Database initialized successfully.")
+    logger.info("Database initialized successfully.")
 
 # Initialize DB on module load
 init_db()
 
-async def save_processed_data(job_id: str, filename: str, processed_data: Dict[str, Any]):
+# --- Change notification ---
+# Readers that follow a job (e.g. the summary SSE stream) wait here instead of polling
+# tightly. Only writes made by this process wake them; readers served by another
+# worker process still see those writes on their next poll.
+_change_waiters: Dict[str, set] = {}
+_last_change = time.monotonic()
+
+def _notify_change(job_id: str):
+    global _last_change
+    _last_change = time.monotonic()
+    for event in _change_waiters.get(job_id, ()):
+        event.set()
+
+def seconds_since_change() -> float:
+    """Seconds since this process last wrote meeting data, job status or queue state."""
+    return time.monotonic() - _last_change
+
+async def wait_for_change(job_id: str, timeout: float):
+    """Returns when this process next writes data or status for `job_id`, or after `timeout` seconds."""
+    event = asyncio.Event()
+    _change_waiters.setdefault(job_id, set()).add(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        waiters = _change_waiters.get(job_id)
+        if waiters is not None:
+            waiters.discard(event)
+            if not waiters:
+                del _change_waiters[job_id]
+
+def _decode_row(row: sqlite3.Row) -> Dict[str, Any]:
+    """Converts a meetings row to a dict, decoding the JSON list columns."""
+    meeting_data = dict(row)
+    if 'transcript' in meeting_data:
+        meeting_data['transcript'] = _decode_text(meeting_data['transcript'])
+    if 'segments' in meeting_data:
+        segments = _decode_text(meeting_data['segments'])
+        meeting_data['segments'] = json.loads(segments) if segments else None
+    # Columns may still be NULL while a job is being processed
+    meeting_data['action_items'] = json.loads(meeting_data.get('action_items') or '[]')
+    meeting_data['decisions'] = json.loads(meeting_data.get('decisions') or '[]')
+    if 'timings' in meeting_data:
+        meeting_data['timings'] = json.loads(meeting_data['timings']) if meeting_data['timings'] else None
+    if 'speakers' in meeting_data:
+        meeting_data['speakers'] = json.loads(meeting_data['speakers']) if meeting_data['speakers'] else None
+    return meeting_data
+
+def _speaker_turns(segments: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Collapses diarized segments into speaker turns: {"speaker", "start", "end", "first",
+    "last"}, where first/last are the indexes of the turn's segments, i.e. of its lines
+    in the transcript. None when no segment has a speaker (diarization off or failed).
+    """
+    turns: List[Dict[str, Any]] = []
+    for index, segment in enumerate(segments or []):
+        speaker = segment.get("speaker")
+        if speaker is None:
+            continue
+        if turns and turns[-1]["speaker"] == speaker and turns[-1]["last"] == index - 1:
+            turns[-1].update(end=segment.get("end"), last=index)
+        else:
+            turns.append({"speaker": speaker, "start": segment.get("start"), "end": segment.get("end"), "first": index, "last": index})
+    return turns or None
+
+def _write_processed(cursor: sqlite3.Cursor, job_id: str, filename: str, processed_data: Dict[str, Any], timestamp: datetime.datetime):
+    """Writes one finished job's meetings row and item rows inside the caller's transaction."""
+    segments = processed_data.get('segments')
+    speakers = _speaker_turns(segments)
+    _upsert_meeting(cursor, job_id, filename, {
+        "transcript": _encode_text(processed_data.get('transcript', '')),
+        "summary": processed_data.get('summary', ''),
+        "action_items": json.dumps(processed_data.get('action_items', [])), # Store list as JSON string
+        "decisions": json.dumps(processed_data.get('decisions', [])),   # Store list as JSON string
+        "timestamp": timestamp,
+        "timings": json.dumps(processed_data['timings']) if STORE_JOB_TIMINGS and processed_data.get('timings') else None,
+        "segments": _encode_text(json.dumps(segments)) if segments and STORE_SEGMENTS else None,
+        "speakers": json.dumps(speakers) if speakers else None,
+    }, """
+        filename=excluded.filename,
+        transcript=excluded.transcript,
+        summary=excluded.summary,
+        action_items=excluded.action_items,
+        decisions=excluded.decisions,
+        timestamp=excluded.timestamp,
+        timings=COALESCE(excluded.timings, meetings.timings),
+        segments=COALESCE(excluded.segments, meetings.segments),
+        speakers=COALESCE(excluded.speakers, meetings.speakers)
+    """)
+    for kind in ITEM_TABLES:
+        _replace_items(cursor, job_id, kind, processed_data.get(kind, []), timestamp.date())
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="save_processed_data")
+async def save_processed_data(job_id: str, filename: str, processed_data: Dict[str, Any]) -> bool:
     """
     Saves the transcript, summary, action items, and decisions for a job.
     Inserts a new record or updates if job_id already exists.
@@ -80,40 +407,199 @@ async def save_processed_data(job_id: str, filename: str, processed_data: Dict[s
         job_id: The unique identifier for the upload job.
         filename: The original filename (or UUID filename) of the uploaded audio.
         processed_data: A dictionary containing 'transcript', 'summary',
-                          'action_items' (list), and 'decisions' (list).
+                          'action_items' (list), and 'decisions' (list), and
+                          optionally 'timings' (dict, kept if STORE_JOB_TIMINGS)
+                          and 'segments' (list of timestamped ASR segments, kept if
+                          STORE_SEGMENTS; their 'speaker' labels are always kept as turns).
+
+    Returns:
+        True if the data was saved, False if the write was rolled back.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
-    timestamp = datetime.datetime.now()
 
     try:
-        cursor.execute("""
-            INSERT INTO meetings (job_id, filename, transcript, summary, action_items, decisions, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(job_id) DO UPDATE SET
-                filename=excluded.filename,
-                transcript=excluded.transcript,
-                summary=excluded.summary,
-                action_items=excluded.action_items,
-                decisions=excluded.decisions,
-                timestamp=excluded.timestamp
-        """, (
-            job_id,
-            filename,
-            processed_data.get('transcript', ''),
-            processed_data.get('summary', ''),
-            json.dumps(processed_data.get('action_items', [])), # Store list as JSON string
-            json.dumps(processed_data.get('decisions', [])),   # Store list as JSON string
-            timestamp
-        ))
+        _write_processed(cursor, job_id, filename, processed_data, datetime.datetime.now())
         conn.commit()
-        print(f"Successfully saved/updated data for job_id: {job_id}")
+        _notify_change(job_id)
+        logger.info("Successfully saved/updated data for job_id: %s", job_id)
+        return True
     except sqlite3.Error as e:
-        print(f"Database error saving data for job_id {job_id}: {e}")
+        logger.error("Database error saving data for job_id %s: %s", job_id, e)
         conn.rollback() # Roll back changes on error
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="save_processed_batch")
+async def save_processed_batch(entries: List[Dict[str, Any]]) -> int:
+    """
+    Saves many finished jobs in a single transaction and marks each one done
+    (used by bulk ingest, where per-job commits would dominate).
+
+    Args:
+        entries: Dicts with 'job_id', 'filename' and 'processed_data' (as for
+                 save_processed_data), and optionally 'content_hash', 'audio_path'
+                 and 'audio_status'.
+
+    Returns:
+        The number of jobs saved: all of them, or 0 if the batch was rolled back.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    timestamp = datetime.datetime.now()
+    try:
+        for entry in entries:
+            job_id = entry["job_id"]
+            _write_processed(cursor, job_id, entry["filename"], entry["processed_data"], timestamp)
+            cursor.execute(
+                "UPDATE meetings SET content_hash = ?, audio_path = ?, audio_status = ? WHERE job_id = ?",
+                (entry.get("content_hash"), entry.get("audio_path"), entry.get("audio_status"), job_id),
+            )
+            _write_status(cursor, job_id, "done", 100, None, timestamp.isoformat(timespec="seconds"))
+        conn.commit()
+        for entry in entries:
+            _notify_change(entry["job_id"])
+        return len(entries)
+    except sqlite3.Error as e:
+        logger.error("Database error saving a batch of %d jobs: %s", len(entries), e)
+        conn.rollback()
+        return 0
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_content_hashes")
+async def get_content_hashes() -> set:
+    """Returns the content hashes of every stored meeting that has one (bulk-ingested audio)."""
+    conn = get_db_connection()
+    try:
+        return {row[0] for row in conn.execute("SELECT content_hash FROM meetings WHERE content_hash IS NOT NULL")}
+    except sqlite3.Error as e:
+        logger.error("Database error fetching content hashes: %s", e)
+        return set()
+    finally:
+        conn.close()
+
+# Columns returned by list and search results; per-segment data is only read per meeting
+LIST_COLUMNS = ("job_id", "filename", "transcript", "summary", "action_items", "decisions", "timestamp", "timings")
+
+# Columns that may be written before processing has finished
+PARTIAL_COLUMNS = ("transcript", "summary", "action_items", "decisions", "segments")
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="save_partial_data")
+async def save_partial_data(job_id: str, filename: str, partial_data: Dict[str, Any]) -> bool:
+    """
+    Writes the fields available so far (e.g. the transcript once ASR completes)
+    without touching the others. Creates the meeting record if needed.
+
+    Args:
+        job_id: The unique identifier for the upload job.
+        filename: The filename of the uploaded audio.
+        partial_data: Any subset of 'transcript', 'summary', 'action_items' (list),
+                      'decisions' (list) and 'segments' (list).
+
+    Returns:
+        True if the data was saved (or there was nothing to save), False on a database error.
+    """
+    values = {}
+    for column in PARTIAL_COLUMNS:
+        if column not in partial_data or (column == "segments" and not STORE_SEGMENTS):
+            continue
+        value = partial_data[column]
+        if column in ("action_items", "decisions"):
+            value = json.dumps(value)
+        elif column == "segments":
+            value = _encode_text(json.dumps(value)) if value else None
+        elif column == "transcript":
+            value = _encode_text(value)
+        values[column] = value
+    if not values:
+        return True
+    updates = ", ".join(f"{column}=excluded.{column}" for column in values)
+    values["timestamp"] = datetime.datetime.now()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        _upsert_meeting(cursor, job_id, filename, values, updates)
+        for kind in ITEM_TABLES:
+            if kind in partial_data:
+                timestamp = cursor.execute("SELECT timestamp FROM meetings WHERE job_id = ?", (job_id,)).fetchone()[0]
+                _replace_items(cursor, job_id, kind, partial_data[kind], _meeting_date(timestamp))
+        conn.commit()
+        _notify_change(job_id)
+        return True
+    except sqlite3.Error as e:
+        logger.error("Database error saving partial data for job_id %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+def _write_status(cursor: sqlite3.Cursor, job_id: str, stage: str, progress: int, error: Optional[str], now: str):
+    # SET expressions see the pre-update row, so stage_times compares against the old stage
+    cursor.execute("""
+        INSERT INTO job_status (job_id, stage, progress, stage_times, error, updated_at)
+        VALUES (?, ?, ?, json_object(?, ?), ?, ?)
+        ON CONFLICT(job_id) DO UPDATE SET
+            stage_times = CASE WHEN job_status.stage = excluded.stage THEN job_status.stage_times
+                ELSE json_set(COALESCE(job_status.stage_times, '{}'), '$.' || excluded.stage, excluded.updated_at) END,
+            stage=excluded.stage,
+            progress=excluded.progress,
+            error=excluded.error,
+            updated_at=excluded.updated_at
+    """, (job_id, stage, progress, stage, now, error, now))
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="update_job_status")
+async def update_job_status(job_id: str, stage: str, progress: int = 0, error: Optional[str] = None):
+    """
+    Records the current processing stage and percent progress for a job.
+    The time each stage is first entered is kept in stage_times.
+
+    Args:
+        job_id: The unique identifier for the upload job.
+        stage: One of queued, transcribing, summarizing, saving, done, failed.
+        progress: Percent complete (0-100).
+        error: Error message when stage is 'failed'.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    try:
+        _write_status(cursor, job_id, stage, progress, error, now)
+        conn.commit()
+        _notify_change(job_id)
+    except sqlite3.Error as e:
+        logger.error("Database error updating status for job_id %s: %s", job_id, e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_job_status")
+async def get_job_status(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves only the status row for a job (cheap enough for frequent polling).
+
+    Returns:
+        A dictionary with stage, progress, stage_times, error and updated_at, or None if unknown.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT * FROM job_status WHERE job_id = ?", (job_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        status = dict(row)
+        status['stage_times'] = json.loads(status.get('stage_times') or '{}')
+        return status
+    except sqlite3.Error as e:
+        logger.error("Database error fetching status for job_id %s: %s", job_id, e)
+        return None
     finally:
         conn.close()
 
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_meeting_data")
 async def get_meeting_data(job_id: str) -> Optional[Dict[str, Any]]:
     """
     Retrieves all stored data for a given job_id.
@@ -130,57 +616,202 @@ async def get_meeting_data(job_id: str) -> Optional[Dict[str, Any]]:
         cursor.execute("SELECT * FROM meetings WHERE job_id = ?", (job_id,))
         row = cursor.fetchone()
         if row:
-            meeting_data = dict(row)
-            # Decode JSON strings back into lists
-            meeting_data['action_items'] = json.loads(meeting_data.get('action_items', '[]'))
-            meeting_data['decisions'] = json.loads(meeting_data.get('decisions', '[]'))
-            return meeting_data
+            return _decode_row(row)
         else:
             return None
     except sqlite3.Error as e:
-        print(f"Database error fetching data for job_id {job_id}: {e}")
+        logger.error("Database error fetching data for job_id %s: %s", job_id, e)
         return None
     finally:
         conn.close()
 
-async def search_transcripts(query: str) -> List[Dict[str, Any]]:
+def _raise_invalid_query(e: sqlite3.OperationalError):
+    """Raises ValueError if FTS5 rejected the query (e.g. 'fts5: syntax error near "AND"') rather than the database failing."""
+    if "locked" not in str(e):
+        raise ValueError(f"Invalid search query: {e}") from e
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="search_transcripts")
+async def search_transcripts(query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     Performs a full-text search on the transcripts.
 
     Args:
         query: The search term(s). Supports FTS5 query syntax.
+        limit: Maximum number of meetings returned (best matches first); None for all.
 
     Returns:
         A list of matching meeting records (dictionaries).
+
+    Raises:
+        ValueError: If `query` is not a valid FTS5 query.
     """
     conn = get_db_connection()
     cursor = conn.cursor()
     results = []
     try:
-        # Search the FTS table and join back to the main table to get all columns
-        # The rank function provides relevance scoring (lower is better)
-        cursor.execute("""
-            SELECT m.*, rank
-            FROM meetings_fts fts
-            JOIN meetings m ON fts.rowid = m.rowid
-            WHERE fts.transcript MATCH ?
-            ORDER BY rank -- Order by relevance
-        """, (query,))
+        # Rank in the FTS table first, so only the returned meetings are read (and their
+        # transcripts decompressed). The rank function provides relevance scoring (lower is better)
+        cursor.execute(f"""
+            SELECT {", ".join(f"m.{column}" for column in LIST_COLUMNS)}, hits.rank
+            FROM (
+                SELECT rowid, rank FROM meetings_fts WHERE meetings_fts MATCH ? ORDER BY rank LIMIT ?
+            ) hits
+            JOIN meetings m ON hits.rowid = m.rowid
+            ORDER BY hits.rank -- Order by relevance
+        """, (query, -1 if limit is None else limit)) # LIMIT -1 is no limit
 
         rows = cursor.fetchall()
         for row in rows:
-            meeting_data = dict(row)
-            # Decode JSON strings
-            meeting_data['action_items'] = json.loads(meeting_data.get('action_items', '[]'))
-            meeting_data['decisions'] = json.loads(meeting_data.get('decisions', '[]'))
-            results.append(meeting_data)
+            results.append(_decode_row(row))
         return results
+    except sqlite3.OperationalError as e:
+        _raise_invalid_query(e)
+        logger.error("Database error during search for query '%s': %s", log.Truncated(query, 200), e)
+        return []
     except sqlite3.Error as e:
-        print(f"Database error during search for query '{query}': {e}")
+        logger.error("Database error during search for query '%s': %s", log.Truncated(query, 200), e)
         return [] # Return empty list on error
     finally:
         conn.close()
 
+@metrics.timed(metrics.STORAGE_SECONDS, op="query_items")
+async def query_items(
+    kind: str,
+    q: Optional[str] = None,
+    assignee: Optional[str] = None,
+    job_id: Optional[str] = None,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+    due_from: Optional[datetime.date] = None,
+    due_to: Optional[datetime.date] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Queries action items or decisions across meetings, in SQL.
+
+    Args:
+        kind: 'action_items' or 'decisions'.
+        q: Full-text query over the item text (FTS5 syntax).
+        assignee: Parsed assignee (case-insensitive exact match).
+        job_id: Restrict to one meeting.
+        since, until: Meeting date range (inclusive).
+        due_from, due_to: Due date range (inclusive); items without a due date are excluded.
+        limit, offset: Page size and start.
+
+    Returns:
+        {"total": number of matching items, "items": [...]}, newest meetings first.
+        Each item has job_id, filename, timestamp, position, text, assignee and due_date.
+
+    Raises:
+        ValueError: If `q` is not a valid FTS5 query.
+    """
+    table = ITEM_TABLES[kind]
+    joins = ["JOIN meetings m ON m.job_id = i.job_id"]
+    conditions, params = [], []
+    if q:
+        joins.append(f"JOIN {table}_fts fts ON fts.rowid = i.id")
+        conditions.append(f"{table}_fts MATCH ?")
+        params.append(q)
+    if assignee:
+        conditions.append("i.assignee = ? COLLATE NOCASE")
+        params.append(assignee)
+    if job_id:
+        conditions.append("i.job_id = ?")
+        params.append(job_id)
+    if since:
+        conditions.append("m.timestamp >= ?")
+        params.append(since.isoformat())
+    if until:
+        conditions.append("m.timestamp < ?")
+        params.append((until + datetime.timedelta(days=1)).isoformat())
+    if due_from:
+        conditions.append("i.due_date >= ?")
+        params.append(due_from.isoformat())
+    if due_to:
+        conditions.append("i.due_date <= ?")
+        params.append(due_to.isoformat())
+    query = f"FROM {table} i {' '.join(joins)}" + (f" WHERE {' AND '.join(conditions)}" if conditions else "")
+
+    conn = get_db_connection()
+    try:
+        total = conn.execute(f"SELECT COUNT(*) {query}", params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT i.job_id, m.filename, m.timestamp, i.position, i.text, i.assignee, i.due_date
+            {query}
+            ORDER BY m.timestamp DESC, i.job_id, i.position
+            LIMIT ? OFFSET ?
+        """, (*params, limit, offset)).fetchall()
+        return {"total": total, "items": [dict(row) for row in rows]}
+    except sqlite3.OperationalError as e:
+        if q:
+            _raise_invalid_query(e)
+        logger.error("Database error querying %s: %s", table, e)
+        return {"total": 0, "items": []}
+    except sqlite3.Error as e:
+        logger.error("Database error querying %s: %s", table, e)
+        return {"total": 0, "items": []}
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="find_meetings")
+async def find_meetings(
+    job_ids: Optional[List[str]] = None,
+    q: Optional[str] = None,
+    since: Optional[datetime.date] = None,
+    until: Optional[datetime.date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lists the meetings matching every given filter, oldest first, without reading
+    transcripts (so it stays small for large selections).
+
+    Args:
+        job_ids: Only these meetings.
+        q: Full-text query over transcripts (FTS5 syntax).
+        since, until: Meeting date range (inclusive).
+
+    Returns:
+        A list of {"job_id", "filename", "timestamp"} dictionaries.
+
+    Raises:
+        ValueError: If `q` is not a valid FTS5 query.
+    """
+    joins, conditions, params = [], [], []
+    if job_ids:
+        conditions.append(f"m.job_id IN ({', '.join('?' * len(job_ids))})")
+        params.extend(job_ids)
+    if q:
+        joins.append("JOIN meetings_fts fts ON fts.rowid = m.rowid")
+        conditions.append("meetings_fts MATCH ?")
+        params.append(q)
+    if since:
+        conditions.append("m.timestamp >= ?")
+        params.append(since.isoformat())
+    if until:
+        conditions.append("m.timestamp < ?")
+        params.append((until + datetime.timedelta(days=1)).isoformat())
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f"""
+            SELECT m.job_id, m.filename, m.timestamp FROM meetings m {' '.join(joins)}
+            {where}
+            ORDER BY m.timestamp, m.job_id
+        """, params).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.OperationalError as e:
+        if q:
+            _raise_invalid_query(e)
+        logger.error("Database error finding meetings: %s", e)
+        return []
+    except sqlite3.Error as e:
+        logger.error("Database error finding meetings: %s", e)
+        return []
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_all_meeting_data")
 async def get_all_meeting_data() -> List[Dict[str, Any]]:
     """
     Retrieves all meeting records from the database.
@@ -190,29 +821,434 @@ async def get_all_meeting_data() -> List[Dict[str, Any]]:
     cursor = conn.cursor()
     results = []
     try:
-        cursor.execute("SELECT * FROM meetings ORDER BY timestamp DESC") # Order by most recent
+        cursor.execute(f"SELECT {', '.join(LIST_COLUMNS)} FROM meetings ORDER BY timestamp DESC") # Order by most recent
         rows = cursor.fetchall()
         for row in rows:
-            meeting_data = dict(row)
-            # Decode JSON strings
-            meeting_data['action_items'] = json.loads(meeting_data.get('action_items', '[]'))
-            meeting_data['decisions'] = json.loads(meeting_data.get('decisions', '[]'))
-            results.append(meeting_data)
+            results.append(_decode_row(row))
         return results
     except sqlite3.Error as e:
-        print(f"Database error fetching all meeting data: {e}")
+        logger.error("Database error fetching all meeting data: %s", e)
         return [] # Return empty list on error
     finally:
         conn.close()
 
 
+@metrics.timed(metrics.STORAGE_SECONDS, op="set_audio_location")
+async def set_audio_location(job_id: str, audio_path: Optional[str], audio_status: str):
+    """Records where a meeting's audio lives now (audio_path is None once deleted)."""
+    conn = get_db_connection()
+    try:
+        conn.execute("UPDATE meetings SET audio_path = ?, audio_status = ? WHERE job_id = ?", (audio_path, audio_status, job_id))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error("Database error recording audio location for job_id %s: %s", job_id, e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="list_stored_audio")
+async def list_stored_audio() -> List[Dict[str, Any]]:
+    """
+    Lists meetings whose audio has not been deleted, oldest first, with the job stage
+    (None for meetings recorded before status tracking). audio_path is NULL for
+    meetings saved before audio locations were tracked.
+    """
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("""
+            SELECT m.job_id, m.filename, m.timestamp, m.audio_path, m.audio_status, s.stage
+            FROM meetings m LEFT JOIN job_status s ON s.job_id = m.job_id
+            WHERE m.audio_status IS NULL OR m.audio_status != 'deleted'
+            ORDER BY m.timestamp
+        """).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.Error as e:
+        logger.error("Database error listing stored audio: %s", e)
+        return []
+    finally:
+        conn.close()
+
+
+# --- Upload sessions ---
+@metrics.timed(metrics.STORAGE_SECONDS, op="create_upload_session")
+async def create_upload_session(job_id: str, filename: str, original_filename: str, file_path: str, total_size: int) -> bool:
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = get_db_connection()
+    try:
+        conn.execute("""
+            INSERT INTO upload_sessions (job_id, filename, original_filename, file_path, total_size, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, filename, original_filename, file_path, total_size, now, now))
+        conn.commit()
+        return True
+    except sqlite3.Error as e:
+        logger.error("Database error creating upload session %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_upload_session")
+async def get_upload_session(job_id: str) -> Optional[Dict[str, Any]]:
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT * FROM upload_sessions WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error("Database error fetching upload session %s: %s", job_id, e)
+        return None
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="advance_upload_session")
+async def advance_upload_session(job_id: str, expected_offset: int, new_offset: int) -> bool:
+    """Moves the upload offset forward; False if it was not at `expected_offset` (or is finalized)."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute("""
+            UPDATE upload_sessions SET received = ?, updated_at = ?
+            WHERE job_id = ? AND received = ? AND finalized_at IS NULL
+        """, (new_offset, datetime.datetime.now().isoformat(timespec="seconds"), job_id, expected_offset))
+        conn.commit()
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logger.error("Database error advancing upload session %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="finalize_upload_session")
+async def finalize_upload_session(job_id: str, content_hash: str) -> bool:
+    """
+    Marks a complete upload finalized, records its content hash on the meeting and
+    queues the job, in one transaction. False if it was incomplete or already finalized.
+    """
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE upload_sessions SET finalized_at = ?, updated_at = ?
+            WHERE job_id = ? AND finalized_at IS NULL AND received = total_size
+        """, (now, now, job_id))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return False
+        filename = cursor.execute("SELECT filename FROM upload_sessions WHERE job_id = ?", (job_id,)).fetchone()[0]
+        _upsert_meeting(cursor, job_id, filename, {"content_hash": content_hash}, "content_hash=excluded.content_hash")
+        _write_status(cursor, job_id, "queued", 0, None, now)
+        conn.commit()
+        _notify_change(job_id)
+        return True
+    except sqlite3.Error as e:
+        logger.error("Database error finalizing upload session %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="delete_upload_session")
+async def delete_upload_session(job_id: str):
+    conn = get_db_connection()
+    try:
+        conn.execute("DELETE FROM upload_sessions WHERE job_id = ?", (job_id,))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error("Database error deleting upload session %s: %s", job_id, e)
+        conn.rollback()
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="list_stale_upload_sessions")
+async def list_stale_upload_sessions(cutoff: datetime.datetime) -> List[Dict[str, Any]]:
+    """Upload sessions not touched since `cutoff` (abandoned, or finalized long ago)."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            "SELECT * FROM upload_sessions WHERE updated_at < ? ORDER BY updated_at",
+            (cutoff.isoformat(timespec="seconds"),),
+        ).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.Error as e:
+        logger.error("Database error listing stale upload sessions: %s", e)
+        return []
+    finally:
+        conn.close()
+
+
+# --- Remote ASR job queue ---
+JOB_QUEUE_CHANNEL = "job_queue" # wait_for_change key woken when a job is queued in this process
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="enqueue_job")
+async def enqueue_job(job_id: str, file_path: str, filename: str, language: Optional[str] = None) -> bool:
+    """Queues a job for remote ASR workers and marks it queued."""
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO job_queue (job_id, file_path, filename, language, state, created_at, updated_at)
+            VALUES (?, ?, ?, ?, 'queued', ?, ?)
+        """, (job_id, file_path, filename, language, now, now))
+        _write_status(cursor, job_id, "queued", 0, None, now)
+        conn.commit()
+        _notify_change(job_id)
+        _notify_change(JOB_QUEUE_CHANNEL)
+        return True
+    except sqlite3.Error as e:
+        logger.error("Database error queueing job_id %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="claim_job")
+async def claim_job(worker_id: str, lease_s: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+    """
+    Leases the oldest queued job to `worker_id` for `lease_s` seconds. Jobs whose lease
+    has expired are claimable again, unless they have already been attempted
+    `max_attempts` times (those are left for fail_exhausted_jobs).
+
+    Returns:
+        The job_queue row (with a new lease_token), or None if nothing is waiting.
+    """
+    now = time.time()
+    stamp = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE") # Serializes claims across worker processes
+        row = cursor.execute("""
+            SELECT job_id FROM job_queue
+            WHERE state = 'queued' OR (state = 'leased' AND lease_expires_at < ? AND attempts < ?)
+            ORDER BY created_at LIMIT 1
+        """, (now, max_attempts)).fetchone()
+        if row:
+            cursor.execute("""
+                UPDATE job_queue SET state = 'leased', worker_id = ?, lease_token = ?, lease_expires_at = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE job_id = ?
+            """, (worker_id, uuid.uuid4().hex, now + lease_s, stamp, row["job_id"]))
+            _write_status(cursor, row["job_id"], "transcribing", 0, None, stamp)
+            row = cursor.execute("SELECT * FROM job_queue WHERE job_id = ?", (row["job_id"],)).fetchone()
+        conn.commit()
+        if row:
+            _notify_change(row["job_id"])
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error("Database error claiming a job for worker %s: %s", worker_id, e)
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="fail_exhausted_jobs")
+async def fail_exhausted_jobs(max_attempts: int) -> List[Dict[str, Any]]:
+    """
+    Marks failed the queue entries whose lease expired for the `max_attempts`th time:
+    worker leases ('leased') and stalled summarizations ('summarizing'). Only the
+    job_queue row is changed; the caller records the failure like any other
+    (routers/upload.py record_failure), which saves the meeting and the job status.
+
+    Returns:
+        The failed job_queue rows, each with its `error`.
+    """
+    now = time.time()
+    stamp = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    query = """
+        SELECT job_id, file_path, filename, state, attempts FROM job_queue
+        WHERE state IN ('leased', 'summarizing') AND lease_expires_at < ? AND attempts >= ?
+    """
+    try:
+        # Checked without the write lock first: this runs on every claim poll
+        if not cursor.execute(query, (now, max_attempts)).fetchone():
+            return []
+        cursor.execute("BEGIN IMMEDIATE") # Each exhausted job is returned to one caller only
+        rows = cursor.execute(query, (now, max_attempts)).fetchall()
+        failed = []
+        for row in rows:
+            if row["state"] == "leased":
+                error = f"ASR worker lease expired {row['attempts']} times"
+            else:
+                error = f"Summarization stopped {row['attempts']} times without saving the meeting"
+            cursor.execute(
+                "UPDATE job_queue SET state = 'failed', error = ?, segments = NULL, updated_at = ? WHERE job_id = ?",
+                (error, stamp, row["job_id"]),
+            )
+            failed.append({**dict(row), "error": error})
+        conn.commit()
+        return failed
+    except sqlite3.Error as e:
+        logger.error("Database error failing exhausted jobs: %s", e)
+        conn.rollback()
+        return []
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_leased_job")
+async def get_leased_job(job_id: str, lease_token: str) -> Optional[Dict[str, Any]]:
+    """The job_queue row if `lease_token` is its current lease, else None."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(
+            "SELECT * FROM job_queue WHERE job_id = ? AND lease_token = ? AND state = 'leased'", (job_id, lease_token),
+        ).fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        logger.error("Database error fetching leased job %s: %s", job_id, e)
+        return None
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="extend_lease")
+async def extend_lease(job_id: str, lease_token: str, lease_s: float) -> bool:
+    """Heartbeat: pushes the lease expiry forward; False if the lease is no longer held."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(
+            "UPDATE job_queue SET lease_expires_at = ? WHERE job_id = ? AND lease_token = ? AND state IN ('leased', 'summarizing')",
+            (time.time() + lease_s, job_id, lease_token),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logger.error("Database error extending lease for job_id %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="hand_off_job")
+async def hand_off_job(
+    job_id: str, lease_token: str, lease_s: float, segments: List[Dict[str, Any]], language: Optional[str] = None,
+    transcript: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Stores a worker's ASR segments with the job and moves it from the worker's lease to
+    a new lease held by the calling API process while it summarizes (state
+    'summarizing'). If that process stops renewing it, claim_stalled_summary hands the
+    job, segments included, to another one. `attempts` restarts at 1 and then counts
+    summarization attempts. `transcript`, if given, is saved to the meeting in the same
+    transaction, so nothing is written for a worker that lost its lease.
+
+    Returns:
+        The new lease token, or None if `lease_token` is not the current worker lease.
+    """
+    new_token = uuid.uuid4().hex
+    stamp = datetime.datetime.now()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("""
+            UPDATE job_queue SET state = 'summarizing', lease_token = ?, lease_expires_at = ?, segments = ?,
+                language = COALESCE(?, language), attempts = 1, updated_at = ?
+            WHERE job_id = ? AND lease_token = ? AND state = 'leased'
+        """, (
+            new_token, time.time() + lease_s, _encode_text(json.dumps(segments)), language,
+            stamp.isoformat(timespec="seconds"), job_id, lease_token,
+        ))
+        if cursor.rowcount != 1:
+            conn.rollback()
+            return None
+        if transcript is not None:
+            filename = cursor.execute("SELECT filename FROM job_queue WHERE job_id = ?", (job_id,)).fetchone()[0]
+            _upsert_meeting(
+                cursor, job_id, filename, {"transcript": _encode_text(transcript), "timestamp": stamp},
+                "transcript=excluded.transcript",
+            )
+        conn.commit()
+        if transcript is not None:
+            _notify_change(job_id)
+        return new_token
+    except sqlite3.Error as e:
+        logger.error("Database error handing off job_id %s: %s", job_id, e)
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="claim_stalled_summary")
+async def claim_stalled_summary(lease_s: float, max_attempts: int) -> Optional[Dict[str, Any]]:
+    """
+    Leases the oldest 'summarizing' job whose lease has expired (the API process that
+    was summarizing it stopped, e.g. on a restart) to the caller for `lease_s` seconds,
+    unless it has already been attempted `max_attempts` times.
+
+    Returns:
+        The job_queue row (with a new lease_token and the decoded segments), or None
+        if no job has stalled.
+    """
+    now = time.time()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE") # Only one API process resumes each job
+        row = cursor.execute("""
+            SELECT job_id FROM job_queue WHERE state = 'summarizing' AND lease_expires_at < ? AND attempts < ?
+            ORDER BY created_at LIMIT 1
+        """, (now, max_attempts)).fetchone()
+        if row:
+            cursor.execute(
+                "UPDATE job_queue SET lease_token = ?, lease_expires_at = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (uuid.uuid4().hex, now + lease_s, datetime.datetime.now().isoformat(timespec="seconds"), row["job_id"]),
+            )
+            row = cursor.execute("SELECT * FROM job_queue WHERE job_id = ?", (row["job_id"],)).fetchone()
+        conn.commit()
+        if not row:
+            return None
+        job = dict(row)
+        job["segments"] = json.loads(_decode_text(job["segments"]) or "[]")
+        return job
+    except sqlite3.Error as e:
+        logger.error("Database error claiming a stalled summary: %s", e)
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+@metrics.timed(metrics.STORAGE_SECONDS, op="release_job")
+async def release_job(job_id: str, lease_token: str, state: str, error: Optional[str] = None) -> bool:
+    """
+    Ends a lease: state 'done' (meeting saved), 'queued' (retry on another worker)
+    or 'failed'. False if `lease_token` is not the current lease.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute("""
+            UPDATE job_queue SET state = ?, error = ?, lease_token = NULL, lease_expires_at = NULL, segments = NULL, updated_at = ?
+            WHERE job_id = ? AND lease_token = ? AND state IN ('leased', 'summarizing')
+        """, (state, error, datetime.datetime.now().isoformat(timespec="seconds"), job_id, lease_token))
+        conn.commit()
+        if cursor.rowcount == 1 and state == "queued":
+            _notify_change(JOB_QUEUE_CHANNEL)
+        return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logger.error("Database error releasing job_id %s: %s", job_id, e)
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
 # --- Keep placeholder functions for compatibility if needed by other modules ---
 # --- Or update other modules to use the new function names/signatures ---
 
+@metrics.timed(metrics.STORAGE_SECONDS, op="get_summary")
 async def get_summary(job_id: str) -> str | None: # Updated type hint to str
-    """Retrieves the summary for a meeting (Compatibility)."""
-    data = await get_meeting_data(job_id)
-    return data.get('summary') if data else None
+    """Retrieves only the summary for a meeting (cheap enough for frequent polling)."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT summary FROM meetings WHERE job_id = ?", (job_id,)).fetchone()
+        return row['summary'] if row else None
+    except sqlite3.Error as e:
+        logger.error("Database error fetching summary for job_id %s: %s", job_id, e)
+        return None
+    finally:
+        conn.close()
 
 async def get_transcript(job_id: str) -> str | None: # Updated type hint to str
     """Retrieves the summary for a meeting (Compatibility)."""
@@ -4,13 +4,20 @@
 
 import asyncio
 import os
+import random
 import re
-from typing import Dict, Any, List
+import time
+import httpx
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Optional
 from langchain_core.prompts import PromptTemplate
 # LLMChain is deprecated, we'll use LCEL (prompt | llm)
 # from langchain.chains import LLMChain
-from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.output_parsers import BaseOutputParser, StrOutputParser
 from langchain_core.runnables import RunnableSequence
+from . import metrics
+from ..utils.log import Truncated, get_logger
+
+logger = get_logger(__name__)
 
 # --- Configuration ---
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "ollama").lower() # 'ollama', 'openai', etc.
@@ -23,16 +30,46 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # OpenAI Base URL (optional, for proxies like LiteLLM)
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE")
+# Pipelined mode: transcript text is summarized in chunks of roughly this many characters
+# while ASR is still running, then the partial results are merged
+SUMMARIZER_CHUNK_CHARS = int(os.getenv("SUMMARIZER_CHUNK_CHARS", "6000"))
+# Stream summary tokens (astream) to callers that ask for them, instead of waiting for the full completion
+SUMMARY_STREAMING = os.getenv("SUMMARY_STREAMING", "true").lower() in ("1", "true", "yes")
+# Minimum seconds between partial summary writes while tokens are streaming
+SUMMARY_STREAM_FLUSH_S = float(os.getenv("SUMMARY_STREAM_FLUSH_S", "0.5"))
+
+# --- Dispatcher Configuration (shared by every job in this process) ---
+# Max LLM requests in flight across all jobs (each job issues three per chunk)
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+# Per-attempt timeout in seconds
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "300"))
+# Retries after the first attempt, with full-jitter exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_S = float(os.getenv("LLM_RETRY_BASE_S", "1.0"))
+LLM_RETRY_MAX_S = float(os.getenv("LLM_RETRY_MAX_S", "30"))
+# Consecutive failures that open the circuit, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+# OpenAI-compatible endpoints only: send a duplicate request if no answer after this many seconds (0 = off)
+LLM_HEDGE_AFTER_S = float(os.getenv("LLM_HEDGE_AFTER_S", "0"))
 
 # --- LLM Loading ---
+def _http_client_kwargs() -> Dict[str, Any]:
+    """Connection pool sized for the dispatcher's in-flight limit (plus hedged duplicates)."""
+    return {
+        "timeout": httpx.Timeout(LLM_TIMEOUT_S, connect=10.0),
+        "limits": httpx.Limits(max_connections=LLM_MAX_IN_FLIGHT * 2, max_keepalive_connections=LLM_MAX_IN_FLIGHT),
+    }
+
 def load_llm():
     """Loads the configured LLM provider."""
-    print(f"Loading LLM provider: {LLM_PROVIDER}, model: {LLM_MODEL_NAME}")
+    logger.info("Loading LLM provider: %s, model: %s", LLM_PROVIDER, LLM_MODEL_NAME)
     if LLM_PROVIDER == "ollama":
         try:
             # Use the updated OllamaLLM class
             from langchain_ollama import OllamaLLM
-            return OllamaLLM(model=LLM_MODEL_NAME, base_url=OLLAMA_BASE_URL)
+            # Passed through to the ollama client's pooled httpx client
+            return OllamaLLM(model=LLM_MODEL_NAME, base_url=OLLAMA_BASE_URL, client_kwargs=_http_client_kwargs())
         except ImportError:
             raise ImportError("Ollama provider selected, but 'langchain-ollama' is not installed. Run: pip install -U langchain-ollama")
         except Exception as e:
@@ -45,7 +82,9 @@ def load_llm():
             return ChatOpenAI(
                 model=LLM_MODEL_NAME,
                 openai_api_key=OPENAI_API_KEY,
-                openai_api_base=OPENAI_API_BASE # Will be None if not set, which is fine                
+                openai_api_base=OPENAI_API_BASE, # Will be None if not set, which is fine
+                http_async_client=httpx.AsyncClient(**_http_client_kwargs()),
+                max_retries=0, # Retries are handled by the dispatcher
             )
         except ImportError:
             raise ImportError("OpenAI provider selected, but 'langchain-openai' is not installed. Run: pip install langchain-openai")
@@ -57,9 +96,9 @@ def load_llm():
 _llm = None
 try:
     _llm = load_llm()
-    print("LLM loaded successfully.")
+    logger.info("LLM loaded successfully.")
 except Exception as e:
-    print(f"Error loading LLM: {e}")
+    logger.error("Error loading LLM: %s", e)
     # Application might fail if LLM is essential
 
 # --- Output Parsing ---
@@ -106,44 +145,290 @@ DECISIONS MADE:
 """
 DECISIONS_PROMPT = PromptTemplate(template=DECISIONS_TEMPLATE, input_variables=["transcript"])
 
+MERGE_SUMMARIES_TEMPLATE = """
+The following are summaries of consecutive parts of one meeting, in order.
+Combine them into a single **concise** and **neutral** summary of the whole meeting.
+Focus on the major topics discussed, conclusions, and actionable takeaways. Do not repeat points.
+
+PARTIAL SUMMARIES:
+{summaries}
+
+CONCISE SUMMARY:"""
+MERGE_SUMMARIES_PROMPT = PromptTemplate(template=MERGE_SUMMARIES_TEMPLATE, input_variables=["summaries"])
+
 # --- Chains (using LCEL: prompt | llm | parser) ---
 summary_chain: RunnableSequence | None = None
 action_items_chain: RunnableSequence | None = None
 decisions_chain: RunnableSequence | None = None
+merge_summaries_chain: RunnableSequence | None = None
 
-if _llm:
+def build_chains(llm):
+    """(Re)builds all chains around `llm`, e.g. to swap in a fake model for benchmarks."""
+    global _llm, summary_chain, action_items_chain, decisions_chain, merge_summaries_chain
+    _llm = llm
     # Define chains using the LangChain Expression Language (LCEL)
-    summary_chain = SUMMARY_PROMPT | _llm
-    action_items_chain = ACTION_ITEMS_PROMPT | _llm | BulletPointOutputParser()
-    decisions_chain = DECISIONS_PROMPT | _llm | BulletPointOutputParser()
+    # StrOutputParser makes chat models (which return messages) yield plain strings too
+    summary_chain = SUMMARY_PROMPT | llm | StrOutputParser()
+    action_items_chain = ACTION_ITEMS_PROMPT | llm | BulletPointOutputParser()
+    decisions_chain = DECISIONS_PROMPT | llm | BulletPointOutputParser()
+    merge_summaries_chain = MERGE_SUMMARIES_PROMPT | llm | StrOutputParser()
+
+if _llm:
+    build_chains(_llm)
 else:
-    print("Warning: LLM not loaded. Summarization features will be disabled.")
+    logger.warning("LLM not loaded. Summarization features will be disabled.")
 
 
-async def process_transcript(transcript: str) -> Dict[str, Any]:
+# --- LLM Dispatcher ---
+class CircuitOpenError(RuntimeError):
+    """Raised without calling the LLM while the circuit breaker is open."""
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx responses are worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429 or (isinstance(status_code, int) and status_code >= 500)
+
+
+class LLMDispatcher:
+    """
+    Process-wide gate in front of every LLM call.
+
+    - At most `max_in_flight` requests run at once, whatever the number of jobs.
+    - Each attempt is bounded by `timeout_s`.
+    - Retryable failures are retried up to `max_retries` times with full-jitter
+      exponential backoff.
+    - After `breaker_failures` consecutive retryable failures the circuit opens and
+      calls fail fast with CircuitOpenError for `breaker_cooldown_s`; then a single
+      trial call is let through and its outcome closes or re-opens the circuit.
+      Non-retryable errors (e.g. a rejected prompt) and cancelled calls say nothing
+      about the backend's health and leave the breaker as it was.
+    - With `hedge_after_s` > 0, an attempt still unanswered after that delay gets a
+      duplicate request; the first success wins and the other is cancelled.
     """
-    Generates a summary, extracts action items, and decisions from the transcript
-    using the configured LangChain setup.
 
-    Args:
-        transcript: The full text transcript.
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        timeout_s: float = LLM_TIMEOUT_S,
+        max_retries: int = LLM_MAX_RETRIES,
+        retry_base_s: float = LLM_RETRY_BASE_S,
+        retry_max_s: float = LLM_RETRY_MAX_S,
+        breaker_failures: int = LLM_BREAKER_FAILURES,
+        breaker_cooldown_s: float = LLM_BREAKER_COOLDOWN_S,
+        hedge_after_s: float = 0.0,
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout_s = timeout_s
+        self.max_retries = max(0, max_retries)
+        self.retry_base_s = retry_base_s
+        self.retry_max_s = retry_max_s
+        self.breaker_failures = max(1, breaker_failures)
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self.hedge_after_s = hedge_after_s
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def circuit_open(self) -> bool:
+        return self._opened_at is not None
+
+    def _before_attempt(self):
+        if self._opened_at is None:
+            return
+        if time.monotonic() - self._opened_at < self.breaker_cooldown_s or self._trial_in_flight:
+            raise CircuitOpenError("LLM circuit breaker is open; skipping call.")
+        self._trial_in_flight = True # Half-open: this attempt decides
+
+    def _record(self, success: Optional[bool]):
+        # None: the attempt ended without telling us whether the backend is healthy
+        self._trial_in_flight = False
+        if success is None:
+            return
+        if success:
+            self._consecutive_failures = 0
+            if self._opened_at is not None:
+                logger.info("LLM circuit breaker closed.")
+            self._opened_at = None
+        else:
+            self._consecutive_failures += 1
+            if self._opened_at is not None or self._consecutive_failures >= self.breaker_failures:
+                if self._opened_at is None:
+                    logger.warning("LLM circuit breaker opened after %d consecutive failures.", self._consecutive_failures)
+                self._opened_at = time.monotonic()
+        metrics.LLM_CIRCUIT_OPEN.set(1 if self._opened_at is not None else 0)
+
+    async def _call(self, chain: RunnableSequence, inputs: Dict[str, Any]) -> Any:
+        async with self._semaphore:
+            metrics.LLM_IN_FLIGHT.inc()
+            try:
+                return await asyncio.wait_for(chain.ainvoke(inputs), self.timeout_s)
+            finally:
+                metrics.LLM_IN_FLIGHT.dec()
+
+    async def _attempt(self, chain: RunnableSequence, inputs: Dict[str, Any], name: str) -> Any:
+        if self.hedge_after_s <= 0:
+            return await self._call(chain, inputs)
+
+        primary = asyncio.create_task(self._call(chain, inputs))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after_s)
+        if done:
+            return primary.result()
+
+        metrics.LLM_HEDGES.inc(chain=name)
+        pending = {primary, asyncio.create_task(self._call(chain, inputs))}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _stream_call(self, chain: RunnableSequence, inputs: Dict[str, Any], on_delta: Callable[[str], Awaitable[None]]) -> str:
+        async def consume() -> str:
+            parts = []
+            async for delta in chain.astream(inputs):
+                if delta:
+                    parts.append(delta)
+                    await on_delta(delta)
+            return "".join(parts)
+
+        async with self._semaphore:
+            metrics.LLM_IN_FLIGHT.inc()
+            try:
+                return await asyncio.wait_for(consume(), self.timeout_s)
+            finally:
+                metrics.LLM_IN_FLIGHT.dec()
+
+    async def stream(self, chain: RunnableSequence, inputs: Dict[str, Any], on_delta: Callable[[str], Awaitable[None]], name: str = "llm") -> str:
+        """
+        Streams a string-output chain via `chain.astream(inputs)` under the same limit,
+        timeout and breaker policy as invoke, passing each text delta to `on_delta`
+        and returning the full text. Only attempts that failed before emitting any
+        text are retried (the caller has already seen the rest); there is no hedging.
+        """
+        emitted = False
+
+        async def forward(delta: str):
+            nonlocal emitted
+            emitted = True
+            await on_delta(delta)
+
+        for attempt in range(self.max_retries + 1):
+            self._before_attempt()
+            try:
+                result = await self._stream_call(chain, inputs, forward)
+            except Exception as e:
+                retryable = _is_retryable(e)
+                self._record(False if retryable else None)
+                if attempt == self.max_retries or emitted or not retryable:
+                    raise
+                delay = random.uniform(0, min(self.retry_max_s, self.retry_base_s * 2 ** attempt))
+                metrics.LLM_RETRIES.inc(chain=name)
+                logger.warning("LLM stream '%s' failed (%s: %s); retry %d in %.1fs.", name, type(e).__name__, e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._record(None) # Cancelled (e.g. the job was): a half-open trial must not stay in flight
+                raise
+            else:
+                self._record(True)
+                return result
+
+    async def invoke(self, chain: RunnableSequence, inputs: Dict[str, Any], name: str = "llm") -> Any:
+        """Runs `chain.ainvoke(inputs)` under the concurrency limit, timeout, retry and breaker policy."""
+        for attempt in range(self.max_retries + 1):
+            self._before_attempt()
+            try:
+                result = await self._attempt(chain, inputs, name)
+            except Exception as e:
+                retryable = _is_retryable(e)
+                self._record(False if retryable else None)
+                if attempt == self.max_retries or not retryable:
+                    raise
+                delay = random.uniform(0, min(self.retry_max_s, self.retry_base_s * 2 ** attempt))
+                metrics.LLM_RETRIES.inc(chain=name)
+                logger.warning("LLM call '%s' failed (%s: %s); retry %d in %.1fs.", name, type(e).__name__, e, attempt + 1, delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._record(None) # Cancelled (e.g. the job was): a half-open trial must not stay in flight
+                raise
+            else:
+                self._record(True)
+                return result
+
+
+# One dispatcher per process, shared by all jobs and chains
+dispatcher = LLMDispatcher(hedge_after_s=LLM_HEDGE_AFTER_S if LLM_PROVIDER == "openai" else 0.0)
+
+
+async def _invoke(chain: RunnableSequence, name: str, inputs: Dict[str, Any]) -> Any:
+    """Invokes one chain through the dispatcher, recording its latency and failures per chain name."""
+    start = time.perf_counter()
+    try:
+        return await dispatcher.invoke(chain, inputs, name)
+    except Exception:
+        metrics.LLM_ERRORS.inc(chain=name)
+        raise
+    finally:
+        metrics.LLM_SECONDS.observe(time.perf_counter() - start, chain=name)
 
-    Returns:
-        A dictionary containing:
-        - summary: A concise summary of the meeting.
-        - action_items: A list of extracted action items.
-        - decisions: A list of extracted decisions.
+
+async def _stream_text(chain: RunnableSequence, name: str, inputs: Dict[str, Any], on_text: Callable[[str], Awaitable[None]]) -> str:
     """
-    if not _llm or not summary_chain or not action_items_chain or not decisions_chain:
-        if not _llm:print("Warning: No LLM loaded. Ensure the LLM provider and model are correctly set in the environment variables.")
+    Streams one string-output chain through the dispatcher. The text accumulated so
+    far is passed to `on_text` on the first token, then at most every
+    SUMMARY_STREAM_FLUSH_S, and once more with the complete text.
+    """
+    start = time.perf_counter()
+    parts: List[str] = []
+    last_flush = float("-inf")
+
+    async def publish(text: str):
+        try:
+            await on_text(text)
+        except Exception as e:
+            # A failed progress write must not abort the generation itself
+            logger.warning("Error publishing partial '%s' output: %s", name, e)
+
+    async def on_delta(delta: str):
+        nonlocal last_flush
+        if not parts:
+            metrics.LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, chain=name)
+        parts.append(delta)
+        now = time.monotonic()
+        if now - last_flush >= SUMMARY_STREAM_FLUSH_S:
+            last_flush = now
+            await publish("".join(parts).strip())
+
+    try:
+        text = await dispatcher.stream(chain, inputs, on_delta, name)
+    except Exception:
+        metrics.LLM_ERRORS.inc(chain=name)
+        raise
+    finally:
+        metrics.LLM_SECONDS.observe(time.perf_counter() - start, chain=name)
+    await publish(text.strip())
+    return text
 
-        return {
-            "summary": "LLM processing disabled.",
-            "action_items": [],
-            "decisions": []
-        }
 
-    print(f"Starting transcript processing using LLM: {LLM_PROVIDER} ({LLM_MODEL_NAME})...")
+async def _run_chains(transcript: str, on_summary_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """
+    Runs the summary, action item and decision chains concurrently on one piece of text.
+    With `on_summary_text` (and SUMMARY_STREAMING on), the summary is streamed and the
+    text so far is passed to it as tokens arrive.
+    """
     summary = "Summary generation failed."
     action_items = []
     decisions = []
@@ -151,10 +436,14 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
     try:
         # Run chains concurrently using LCEL's ainvoke
         # Input is now just the dictionary for the prompt variables
+        if on_summary_text and SUMMARY_STREAMING:
+            summary_call = _stream_text(summary_chain, "summary", {"transcript": transcript}, on_summary_text)
+        else:
+            summary_call = _invoke(summary_chain, "summary", {"transcript": transcript})
         results = await asyncio.gather(
-            summary_chain.ainvoke({"transcript": transcript}),
-            action_items_chain.ainvoke({"transcript": transcript}),
-            decisions_chain.ainvoke({"transcript": transcript}),
+            summary_call,
+            _invoke(action_items_chain, "action_items", {"transcript": transcript}),
+            _invoke(decisions_chain, "decisions", {"transcript": transcript}),
             return_exceptions=True # Allow tasks to fail without stopping others
         )
 
@@ -162,12 +451,12 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
         summary_result, action_items_result, decisions_result = results
 
         # --- Log Raw LLM Outputs ---
-        print(f"Raw Action Items LLM Output: {action_items_result}")
-        print(f"Raw Decisions LLM Output: {decisions_result}")
+        logger.debug("Raw Action Items LLM Output: %s", Truncated(action_items_result), extra={"sample": True})
+        logger.debug("Raw Decisions LLM Output: %s", Truncated(decisions_result), extra={"sample": True})
         # --- End Log ---
 
         if isinstance(summary_result, Exception):
-            print(f"Error generating summary: {summary_result}")
+            logger.error("Error generating summary: %s", summary_result)
             summary = f"Error: {summary_result}"
         elif isinstance(summary_result, str):
              # LCEL chain directly returns the string output
@@ -177,7 +466,7 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
 
 
         if isinstance(action_items_result, Exception):
-            print(f"Error extracting action items: {action_items_result}")
+            logger.error("Error extracting action items: %s", action_items_result)
             action_items = [f"Error: {action_items_result}"]
         elif isinstance(action_items_result, list):
              # LCEL chain with parser returns the parsed list
@@ -187,7 +476,7 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
 
 
         if isinstance(decisions_result, Exception):
-            print(f"Error extracting decisions: {decisions_result}")
+            logger.error("Error extracting decisions: %s", decisions_result)
             decisions = [f"Error: {decisions_result}"]
         elif isinstance(decisions_result, list):
             # LCEL chain with parser returns the parsed list
@@ -195,10 +484,8 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
         else:
             decisions = ["Decisions extraction produced unexpected output type."]
 
-        print("Transcript processing complete.")
-
     except Exception as e:
-        print(f"Unexpected error during transcript processing: {e}")
+        logger.exception("Unexpected error during transcript processing: %s", e)
         # Update results to indicate a general failure
         summary = f"General processing error: {e}"
         action_items = []
@@ -209,3 +496,204 @@ async def process_transcript(transcript: str) -> Dict[str, Any]:
         "action_items": action_items,
         "decisions": decisions
     }
+
+
+def _llm_disabled() -> Optional[Dict[str, Any]]:
+    """Returns the placeholder result when no LLM/chains are available, else None."""
+    if not _llm or not summary_chain or not action_items_chain or not decisions_chain:
+        if not _llm:logger.warning("No LLM loaded. Ensure the LLM provider and model are correctly set in the environment variables.")
+
+        return {
+            "summary": "LLM processing disabled.",
+            "action_items": [],
+            "decisions": []
+        }
+    return None
+
+
+async def process_transcript(transcript: str, on_summary_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """
+    Generates a summary, extracts action items, and decisions from the transcript
+    using the configured LangChain setup.
+
+    Args:
+        transcript: The full text transcript.
+        on_summary_text: Optional coroutine called with the summary text generated so
+                         far while it streams (throttled to SUMMARY_STREAM_FLUSH_S).
+
+    Returns:
+        A dictionary containing:
+        - summary: A concise summary of the meeting.
+        - action_items: A list of extracted action items.
+        - decisions: A list of extracted decisions.
+    """
+    disabled = _llm_disabled()
+    if disabled:
+        return disabled
+
+    logger.info("Starting transcript processing using LLM: %s (%s)...", LLM_PROVIDER, LLM_MODEL_NAME)
+    result = await _run_chains(transcript, on_summary_text)
+    logger.info("Transcript processing complete.")
+    return result
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    """Drops repeated list items (case/punctuation-insensitive), keeping first occurrence order."""
+    seen = set()
+    unique = []
+    for item in items:
+        key = re.sub(r"\W+", " ", item).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def _combine_partials(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Concatenates per-chunk results into one provisional result (no LLM call)."""
+    return {
+        "summary": "\n\n".join(p["summary"] for p in partials),
+        "action_items": _dedupe([item for p in partials for item in p["action_items"]]),
+        "decisions": _dedupe([item for p in partials for item in p["decisions"]]),
+    }
+
+
+async def process_segments(
+    segments: AsyncIterator[Dict[str, Any]],
+    on_partial: Optional[Callable[[Dict[str, Any], int, Optional[int]], Awaitable[None]]] = None,
+    on_transcript: Optional[Callable[[str], Awaitable[None]]] = None,
+    on_summary_text: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    """
+    Pipelined counterpart of process_transcript that consumes ASR segments as they
+    are produced.
+
+    Segment text is accumulated into chunks of about SUMMARIZER_CHUNK_CHARS; each
+    completed chunk is sent through the summary/action item/decision chains while
+    transcription continues. When the stream ends the last chunk is processed and
+    the partial summaries are merged by a short reduce prompt; action items and
+    decisions are concatenated and de-duplicated. A transcript that fits in one
+    chunk is processed exactly like process_transcript.
+
+    Args:
+        segments: Async iterator of ASR segment dicts (each with a 'text' key).
+        on_partial: Optional coroutine called with the provisional combined result,
+                    the number of chunks done and the total each time a chunk
+                    finishes, also while ASR is still running (the total is then
+                    None). Chunks report in order; once the total is known the
+                    last one is not reported.
+        on_transcript: Optional coroutine called with the full transcript as soon as
+                       the segment stream ends, before the remaining LLM work.
+        on_summary_text: Optional coroutine called with the final summary text
+                         generated so far while it streams: the summary of a
+                         single-chunk transcript, or the merged summary otherwise.
+
+    Returns:
+        The same keys as process_transcript plus:
+        - transcript: The full transcript assembled from the segments.
+        - segments: The segments themselves, in order.
+        - timings: Per-stage timings in seconds relative to the first segment request.
+    """
+    started = time.perf_counter()
+    elapsed = lambda: round(time.perf_counter() - started, 3)
+    disabled = _llm_disabled()
+
+    texts: List[str] = []
+    collected: List[Dict[str, Any]] = []
+    chunk: List[str] = []
+    chunk_chars = 0
+    chunk_tasks: List[asyncio.Task] = []
+    chunk_added = asyncio.Event()
+    asr_done = False
+    partials: List[Dict[str, Any]] = []
+    chunk_timings: List[Dict[str, Any]] = []
+    timings: Dict[str, Any] = {"chunks": chunk_timings}
+
+    async def publish_summary(text: str):
+        timings.setdefault("summary_first_token_s", elapsed())
+        await on_summary_text(text)
+
+    stream_to = publish_summary if on_summary_text else None
+
+    async def run_chunk(index: int, text: str, on_text=None) -> Dict[str, Any]:
+        entry = {"chunk": index, "chars": len(text), "llm_start_s": elapsed()}
+        chunk_timings.append(entry)
+        result = await _run_chains(text, on_text)
+        entry["llm_end_s"] = elapsed()
+        return result
+
+    def flush(final: bool = False):
+        nonlocal chunk, chunk_chars
+        if chunk and not disabled:
+            # Only a transcript's one and only chunk produces the final summary directly
+            on_text = stream_to if final and not chunk_tasks else None
+            chunk_tasks.append(asyncio.create_task(run_chunk(len(chunk_tasks), "\n".join(chunk), on_text)))
+            chunk_added.set()
+        chunk, chunk_chars = [], 0
+
+    async def collect_partials():
+        # Awaits chunk results in order alongside ASR, reporting each one as it lands
+        while True:
+            if len(partials) < len(chunk_tasks):
+                partials.append(await chunk_tasks[len(partials)])
+                total = len(chunk_tasks) if asr_done else None
+                if on_partial and (total is None or len(partials) < total):
+                    await on_partial(_combine_partials(partials), len(partials), total)
+            elif asr_done:
+                return
+            else:
+                chunk_added.clear()
+                await chunk_added.wait()
+
+    collector = asyncio.create_task(collect_partials()) if not disabled else None
+    try:
+        async for segment in segments:
+            if "asr_first_segment_s" not in timings:
+                timings["asr_first_segment_s"] = elapsed()
+            text = segment.get("text", "")
+            collected.append(segment)
+            texts.append(text)
+            chunk.append(text)
+            chunk_chars += len(text)
+            if chunk_chars >= SUMMARIZER_CHUNK_CHARS:
+                flush()
+        timings["asr_end_s"] = elapsed()
+        flush(final=True)
+        asr_done = True
+        chunk_added.set()
+
+        transcript = "\n".join(texts)
+        if on_transcript:
+            await on_transcript(transcript)
+        if disabled:
+            return dict(disabled, transcript=transcript, segments=collected, timings=timings)
+
+        logger.info("Transcript streamed in %d chunk(s) using LLM: %s (%s).", len(chunk_tasks), LLM_PROVIDER, LLM_MODEL_NAME)
+        await collector
+
+        if not partials:
+            result = {"summary": "", "action_items": [], "decisions": []}
+        elif len(partials) == 1:
+            result = partials[0]
+        else:
+            result = _combine_partials(partials)
+            timings["merge_start_s"] = elapsed()
+            try:
+                inputs = {"summaries": result["summary"]}
+                if stream_to and SUMMARY_STREAMING:
+                    merged = await _stream_text(merge_summaries_chain, "merge", inputs, stream_to)
+                else:
+                    merged = await _invoke(merge_summaries_chain, "merge", inputs)
+                if isinstance(merged, str):
+                    result["summary"] = merged.strip()
+            except Exception as e:
+                # Keep the concatenated chunk summaries rather than failing the job
+                logger.error("Error merging partial summaries: %s", e)
+            timings["merge_end_s"] = elapsed()
+    finally:
+        for task in chunk_tasks + ([collector] if collector else []):
+            task.cancel()
+
+    timings["done_s"] = elapsed()
+    logger.info("Transcript processing complete.")
+    return dict(result, transcript=transcript, segments=collected, timings=timings)
@@ -1,6 +1,9 @@
 import os
 import shutil
 from fastapi import UploadFile
+from .log import get_logger
+
+logger = get_logger(__name__)
 
 async def save_upload_file(upload_file: UploadFile, destination_dir: str) -> str:
     """
@@ -24,5 +27,23 @@ async def save_upload_file(upload_file: UploadFile, destination_dir: str) -> str
         return file_location
     except Exception as e:
         # Log the error appropriately in a real application
-        print(f"Error saving file {upload_file.filename}: {e}")
+        logger.error("Error saving file %s: %s", upload_file.filename, e)
         raise IOError(f"Could not save file: {upload_file.filename}")
+
+def try_lock(path: str):
+    """
+    Takes a non-blocking exclusive lock on `path` (created if needed), e.g. so only one
+    server worker process runs a periodic task. Returns the open handle, which holds
+    the lock until closed, or None if another process holds it.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return open(path, "a") # No flock (Windows): single-process deployments only
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return handle
+    except OSError:
+        handle.close()
+        return None
@@ -0,0 +1,93 @@
+import datetime
+import re
+from typing import Optional, Tuple
+
+# Parses the assignee and due date out of one LLM-generated action item, e.g.
+#   "Alice to send the budget review by Friday"  -> ("Alice", <that Friday>)
+#   "Owner: Bob - fix the export bug (due 2024-05-03)" -> ("Bob", "2024-05-03")
+# Best effort only: anything not recognised is left as None.
+
+# Capitalised words that start sentences or name groups rather than people
+_NOT_NAMES = {
+    "a", "action", "all", "an", "assignee", "decision", "everyone", "it", "next", "note", "owner",
+    "someone", "task", "team", "the", "they", "this", "todo", "we", "you",
+}
+
+_NAME = r"[A-Z][\w.'-]*(?:\s+[A-Z][\w.'-]*)?"
+# Leading labels some models put before every item ("Action item: ...")
+_LABEL = re.compile(r"^\s*(?:action(?: item)?|todo|task)\s*[:\-]\s*", re.IGNORECASE)
+_ASSIGNEE_PATTERNS = (
+    re.compile(rf"(?i:\b(?:owner|assignee|assigned to|responsible)\b)\s*[:\-]?\s*@?(?P<name>{_NAME})"),
+    re.compile(rf"^\s*\[@?(?P<name>{_NAME})\]"),
+    re.compile(rf"^\s*@?(?P<name>{_NAME})\s*:\s+"),
+    re.compile(rf"^\s*@?(?P<name>{_NAME})\s+(?:to|will|should|must|needs? to|is to|has to|agreed to|volunteered to)\b"),
+    re.compile(r"@(?P<name>\w+)"),
+)
+
+_MONTHS = {name: index for index, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+_MONTH = r"(?P<month>jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_ISO_DATE = re.compile(r"\b(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})\b")
+_MONTH_DAY = re.compile(rf"\b{_MONTH}\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\b(?:,?\s+(?P<year>\d{{4}}))?", re.IGNORECASE)
+_DAY_MONTH = re.compile(rf"\b(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{_MONTH}(?:,?\s+(?P<year>\d{{4}}))?", re.IGNORECASE)
+_WEEKDAY = re.compile(rf"\b(?:by|before|on|due|until|this|next)\s+(?P<weekday>{'|'.join(_WEEKDAYS)})\b", re.IGNORECASE)
+_RELATIVE = re.compile(r"\b(?P<when>tomorrow|today|end of (?:the )?day|eod|end of (?:the )?week|next week|end of (?:the )?month)\b", re.IGNORECASE)
+
+
+def parse_assignee(text: str) -> Optional[str]:
+    text = _LABEL.sub("", text)
+    for pattern in _ASSIGNEE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            name = match.group("name").strip()
+            if name.split()[0].lower() not in _NOT_NAMES:
+                return name
+    return None
+
+
+def _future_date(year: Optional[str], month: int, day: int, reference: datetime.date) -> Optional[datetime.date]:
+    """Builds the date; without a year, the next occurrence on or after `reference`."""
+    try:
+        if year:
+            return datetime.date(int(year), month, day)
+        candidate = datetime.date(reference.year, month, day)
+        return candidate if candidate >= reference else datetime.date(reference.year + 1, month, day)
+    except ValueError:
+        return None
+
+
+def parse_due_date(text: str, reference: datetime.date) -> Optional[datetime.date]:
+    """Finds a deadline in `text`; relative ones ("by Friday") are resolved against `reference`."""
+    match = _ISO_DATE.search(text)
+    if match:
+        return _future_date(match.group("year"), int(match.group("month")), int(match.group("day")), reference)
+    for pattern in (_MONTH_DAY, _DAY_MONTH):
+        match = pattern.search(text)
+        if match:
+            month = _MONTHS[match.group("month")[:3].lower()]
+            return _future_date(match.group("year"), month, int(match.group("day")), reference)
+    match = _WEEKDAY.search(text)
+    if match:
+        days_ahead = (_WEEKDAYS.index(match.group("weekday").lower()) - reference.weekday()) % 7
+        return reference + datetime.timedelta(days=days_ahead or 7)
+    match = _RELATIVE.search(text)
+    if match:
+        when = match.group("when").lower()
+        if when == "tomorrow":
+            return reference + datetime.timedelta(days=1)
+        if when in ("today", "eod") or when.endswith("day"):
+            return reference
+        if when.endswith("week"):
+            friday = reference + datetime.timedelta(days=(4 - reference.weekday()) % 7)
+            return friday + datetime.timedelta(days=7) if when == "next week" else friday
+        next_month = (reference.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+        return next_month - datetime.timedelta(days=1)
+    return None
+
+
+def parse_action_item(text: str, reference: datetime.date) -> Tuple[Optional[str], Optional[str]]:
+    """Returns (assignee, due date as YYYY-MM-DD) for one action item; either may be None."""
+    due = parse_due_date(text, reference)
+    return parse_assignee(text), due.isoformat() if due else None
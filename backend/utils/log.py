@@ -0,0 +1,172 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Optional
+
+# --- Configuration ---
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower() # 'text' or 'json'
+# Longest rendering of a Truncated value (transcripts, summaries, raw LLM output)
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+# Fraction of records logged with extra={"sample": True} that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+# Records waiting for the writer thread; new records are dropped (and counted) when full
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Correlation ID of the job being processed; set once per task and inherited by
+# everything it awaits, so service-level records carry it automatically.
+job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("job_id", default=None)
+
+dropped_records = 0
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def _bounded_repr(value: Any, limit: int) -> str:
+    """repr() of strings and (nested) containers, rendering little more than `limit` characters."""
+    if isinstance(value, str):
+        return repr(value[:limit + 1])
+    if not isinstance(value, (list, tuple, set, frozenset, dict)):
+        return repr(value)
+    if isinstance(value, tuple):
+        opening, closing = "(", ")"
+    elif isinstance(value, list):
+        opening, closing = "[", "]"
+    else:
+        opening, closing = "{", "}"
+    parts, length = [], 0
+    for item in (value.items() if isinstance(value, dict) else value):
+        if length > limit:
+            parts.append("...")
+            break
+        remaining = max(limit - length, 0)
+        if isinstance(value, dict):
+            part = f"{_bounded_repr(item[0], remaining)}: {_bounded_repr(item[1], remaining)}"
+        else:
+            part = _bounded_repr(item, remaining)
+        parts.append(part)
+        length += len(part) + 2
+    return opening + ", ".join(parts) + closing
+
+
+class Truncated:
+    """Wraps a large value so it is only rendered (and cut to LOG_MAX_FIELD_CHARS) when logged."""
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: int = LOG_MAX_FIELD_CHARS):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        if isinstance(self.value, str):
+            text = self.value
+        elif isinstance(self.value, (list, tuple, set, frozenset, dict)):
+            # Built item by item, so a huge list is not rendered in full just to be cut
+            text = _bounded_repr(self.value, self.limit)
+            return text if len(text) <= self.limit else f"{text[:self.limit]}...(truncated)"
+        else:
+            text = repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}...(+{len(text) - self.limit} chars)"
+
+    __repr__ = __str__
+
+
+class _ContextFilter(logging.Filter):
+    """Attaches the current job ID and applies sampling, in the caller's context."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", False) and LOG_SAMPLE_RATE < 1.0 and random.random() >= LOG_SAMPLE_RATE:
+            return False
+        if not hasattr(record, "job_id"):
+            record.job_id = job_id_var.get()
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking or raising when the queue is full.
+    Records are queued unformatted (the base class would format them on the calling
+    thread), so log arguments should not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # job_id was already resolved by _ContextFilter in the caller's context
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord):
+        global dropped_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, job_id, msg (+ exc)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "job_id": getattr(record, "job_id", None),
+            "msg": record.getMessage(),
+        }
+        if record.exc_text or record.exc_info:
+            entry["exc"] = record.exc_text or self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s%(job)s %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        job_id = getattr(record, "job_id", None)
+        record.job = f" [job {job_id}]" if job_id else ""
+        return super().format(record)
+
+
+def setup_logging():
+    """
+    Routes the 'backend' logger through a bounded queue to a background writer thread.
+    Callers only pay for building the record; message and traceback formatting and the
+    stdout write happen on the writer thread. Safe to call more than once.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        queue_handler = _NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(_ContextFilter())
+
+        logger = logging.getLogger("backend")
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop) # Flush remaining records on shutdown
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a logger under the 'backend' hierarchy (pass __name__)."""
+    setup_logging()
+    if not name.startswith("backend"):
+        name = f"backend.{name}"
+    return logging.getLogger(name)
@@ -0,0 +1,195 @@
+# Remote ASR worker: transcribes jobs that the API queued (ASR_REMOTE_WORKERS=true), so
+# Whisper can run on machines other than the API server. Run from the project root,
+# with the backend requirements installed:
+#   python -m backend.worker --server http://api-host:8000 --processes 4
+#
+# Each process loads its own Whisper model (WHISPER_MODEL_NAME / ASR_DEVICE, as for the
+# API) and handles one job at a time: claim it with a lease (see routers/workers.py),
+# download the audio, stream Whisper segments (diarized alongside, see
+# services/diarization.py) while heartbeating progress, then post the segments back.
+# Summarization and saving stay on the API side. Several processes on one
+# machine, or workers on several machines, simply compete for the same queue.
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from typing import Any, Dict
+
+import httpx
+
+from .utils.log import get_logger
+
+logger = get_logger(__name__)
+
+SEGMENT_KEYS = ("id", "start", "end", "text", "avg_logprob", "no_speech_prob", "speaker") # Same fields ingest.py keeps
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+CLAIM_WAIT_S = 20 # Long-poll for this long per claim request
+RETRY_DELAY_S = 5 # After an error talking to the API
+
+
+class LeaseLost(Exception):
+    """The API no longer recognises our lease (it expired and the job may be with another worker)."""
+
+
+async def _download(client: httpx.AsyncClient, job: Dict[str, Any], path: str):
+    async with client.stream("GET", job["audio_url"], headers={"X-Lease-Token": job["lease_token"]}) as response:
+        if response.status_code == 409:
+            raise LeaseLost()
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                f.write(chunk)
+
+
+async def _heartbeat(client: httpx.AsyncClient, job: Dict[str, Any], progress: Dict[str, float]):
+    """Renews the lease every third of its length until cancelled; raises LeaseLost on 409."""
+    while True:
+        await asyncio.sleep(job["lease_s"] / 3)
+        try:
+            response = await client.post(
+                f"/workers/jobs/{job['job_id']}/heartbeat",
+                json={"lease_token": job["lease_token"], "progress": progress["value"]},
+            )
+        except httpx.HTTPError as e:
+            logger.warning("Heartbeat for job %s failed: %s", job["job_id"], e) # The lease has slack for a missed beat
+            continue
+        if response.status_code == 409:
+            raise LeaseLost()
+
+
+async def _transcribe(asr, diarization, path: str, language, progress: Dict[str, float]) -> Dict[str, Any]:
+    info: Dict[str, Any] = {}
+    segments = []
+    diarization_task = None
+
+    def on_audio(audio):
+        # Speakers are found here too, alongside Whisper, so the API gets labelled segments
+        nonlocal diarization_task
+        diarization_task = diarization.start(audio)
+
+    started = time.perf_counter()
+    try:
+        async for segment in asr.stream_segments(path, language, info=info, on_audio=on_audio):
+            segments.append({key: segment.get(key) for key in SEGMENT_KEYS})
+            if info.get("duration"):
+                progress["value"] = min(segment["end"] / info["duration"], 1.0)
+        await diarization.finish(diarization_task, segments)
+    finally:
+        if diarization_task is not None and not diarization_task.done():
+            diarization_task.cancel()
+    return {
+        "segments": segments,
+        "language": info.get("language"),
+        "duration": info.get("duration"),
+        "asr_seconds": time.perf_counter() - started,
+    }
+
+
+async def _run_job(client: httpx.AsyncClient, asr, diarization, job: Dict[str, Any], workdir: str):
+    path = os.path.join(workdir, job["job_id"] + os.path.splitext(job["filename"])[1])
+    progress = {"value": 0.0}
+    heartbeat = asyncio.create_task(_heartbeat(client, job, progress))
+    try:
+        await _download(client, job, path)
+        transcription = asyncio.create_task(_transcribe(asr, diarization, path, job["language"], progress))
+        await asyncio.wait({heartbeat, transcription}, return_when=asyncio.FIRST_COMPLETED)
+        if heartbeat.done():
+            transcription.cancel()
+            heartbeat.result() # Raises LeaseLost
+        result = transcription.result()
+    finally:
+        heartbeat.cancel()
+        if os.path.exists(path):
+            os.remove(path)
+
+    response = await client.post(f"/workers/jobs/{job['job_id']}/result", json={"lease_token": job["lease_token"], **result})
+    if response.status_code == 409:
+        raise LeaseLost()
+    response.raise_for_status()
+    return result
+
+
+async def work(args):
+    """Claims and transcribes jobs until --max-jobs are done (forever by default)."""
+    from .services import asr, diarization # Loads the Whisper model in this process
+
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    timeout = httpx.Timeout(30.0, read=CLAIM_WAIT_S + 30.0)
+    handled = 0
+    async with httpx.AsyncClient(base_url=args.server, headers=headers, timeout=timeout) as client:
+        with tempfile.TemporaryDirectory(prefix="fluent-worker-") as workdir:
+            logger.info("Worker %s polling %s", worker_id, args.server)
+            while not args.max_jobs or handled < args.max_jobs:
+                try:
+                    response = await client.post("/workers/claim", params={"worker_id": worker_id, "wait_s": CLAIM_WAIT_S})
+                    if response.status_code == 204:
+                        continue
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    logger.warning("Claiming a job failed: %s; retrying in %ss", e, RETRY_DELAY_S)
+                    await asyncio.sleep(RETRY_DELAY_S)
+                    continue
+
+                job = response.json()
+                handled += 1
+                try:
+                    result = await _run_job(client, asr, diarization, job, workdir)
+                    logger.info(
+                        "Job %s: %d segments, %.0fs of audio in %.1fs",
+                        job["job_id"], len(result["segments"]), result["duration"] or 0, result["asr_seconds"],
+                    )
+                except LeaseLost:
+                    logger.warning("Lost the lease on job %s; dropping it", job["job_id"])
+                except Exception as e:
+                    logger.exception("Job %s failed: %s", job["job_id"], e)
+                    try:
+                        await client.post(
+                            f"/workers/jobs/{job['job_id']}/fail",
+                            json={"lease_token": job["lease_token"], "error": str(e), "retry": True},
+                        )
+                    except httpx.HTTPError:
+                        pass # The lease expires and the job is claimable again
+
+
+def _run_process(args, threads: int):
+    # Set before Whisper/torch are imported, so the processes share the CPU instead of
+    # each one assuming it owns every core
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    os.environ.setdefault("MKL_NUM_THREADS", str(threads))
+    try:
+        asyncio.run(work(args))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remote Whisper worker for the Fluent Note Taker API")
+    parser.add_argument("--server", default=os.getenv("ASR_WORKER_SERVER", "http://localhost:8000"), help="API base URL")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes (each loads its own Whisper model)")
+    parser.add_argument("--token", default=os.getenv("ASR_WORKER_TOKEN", ""), help="Shared secret (ASR_WORKER_TOKEN on the API)")
+    parser.add_argument("--max-jobs", type=int, default=0, help="Exit after this many jobs per process (0 = run forever)")
+    args = parser.parse_args()
+
+    threads = max(1, (os.cpu_count() or 1) // args.processes)
+    if args.processes == 1:
+        _run_process(args, threads)
+        return
+    context = multiprocessing.get_context("spawn") # Fresh interpreters: no forked torch/CUDA state
+    processes = [context.Process(target=_run_process, args=(args, threads)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()